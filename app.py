@@ -4,64 +4,205 @@ import json
 import logging
 import os
 import re
-import secrets
-import subprocess
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.cookiejar import DefaultCookiePolicy
 
-import paramiko
 import requests
-from flask import Flask, request, Response, jsonify, render_template
+from flask import Flask, g, request, Response, jsonify, render_template
 from flask_sock import Sock
 from functools import wraps
 
 from config import BOTS, BOT_HOST
+from bot_registry import BotRegistry
+from extractors import BotRecord
+from latency import LatencyTracker
+from ssh_shell import SSH_HOST, SSH_PORT, SSH_USER, SSH_PASSWORD, SSH_KEY_PATH, open_shell
+from static_assets import AssetManifest, IMMUTABLE
+from ws_tokens import issue_token as _issue_ws_token, validate_token as _validate_ws_token
+import capital_rollups
+import container_logs
+import http_cache
+import federation
+import mobile_sync
+import push_ingest
+import terminal_sessions
+import warm_start
 
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 sock = Sock(app)
 
-PROXY_TIMEOUT = 5  # seconds
+PROXY_TIMEOUT = 5  # seconds; default until a bot endpoint's latency is known (latency.py)
+HEALTH_TIMEOUT_MAX = 2 * PROXY_TIMEOUT  # a fetch cycle waits at most this long on one bot
 
 PORTAL_USER = os.environ.get("PORTAL_USER", "")
 PORTAL_PASS = os.environ.get("PORTAL_PASS", "")
 AUTH_ENABLED = bool(PORTAL_USER and PORTAL_PASS)
 
 
+def _check_auth():
+    """None if the request may proceed, else the 401 response."""
+    if not AUTH_ENABLED:
+        return None
+    auth = request.authorization
+    if not auth or auth.username != PORTAL_USER or auth.password != PORTAL_PASS:
+        return Response("Unauthorized", 401,
+                        {"WWW-Authenticate": 'Basic realm="Kalshi Portal"'})
+    return None
+
+
 def _auth_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        if not AUTH_ENABLED:
-            return f(*args, **kwargs)
-        auth = request.authorization
-        if not auth or auth.username != PORTAL_USER or auth.password != PORTAL_PASS:
-            return Response("Unauthorized", 401,
-                            {"WWW-Authenticate": 'Basic realm="Kalshi Portal"'})
+        denied = _check_auth()
+        if denied is not None:
+            return denied
         return f(*args, **kwargs)
     return decorated
 
 
+@app.after_request
+def _compress_and_validate(response):
+    """br/gzip compression and strong ETags (see http_cache)."""
+    return http_cache.finalize(request, response)
+
+
+# ---------------------------------------------------------------------------
+# Background services — started once per worker, on its first request
+# ---------------------------------------------------------------------------
+
+_background_started = False
+_background_lock = threading.Lock()
+
+
+def start_background():
+    """Start this worker's background loops; idempotent.
+
+    gunicorn calls this when the worker boots (``post_worker_init`` in
+    gunicorn.conf.py), so the lease-holding loops run after a deploy with
+    no request needed.  The ``before_request`` hook covers other servers.
+    """
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+    _get_registry()
+    threading.Thread(target=_telemetry_loop, daemon=True).start()
+    threading.Thread(target=_pnl_compact_loop, daemon=True).start()
+    threading.Thread(target=_risk_loop, daemon=True).start()
+    threading.Thread(target=_reconcile_loop, daemon=True).start()
+
+
+@app.before_request
+def _start_background():
+    if not _background_started:
+        start_background()
+
+
+# Last-known payloads on disk, served by a fresh worker until its own
+# fetch cycle and inventories are ready (warm_start.py)
+_warm_snapshots = {}
+
+
+def _warm_snapshot(name):
+    if name not in _warm_snapshots:
+        _warm_snapshots[name] = warm_start.WarmSnapshot(name)
+    return _warm_snapshots[name]
+
+
+# ---------------------------------------------------------------------------
+# Bot registry — config.BOTS overlaid by BOTS_FILE and Docker labels
+# ---------------------------------------------------------------------------
+
+_registry = None
+
+
+def _get_registry():
+    global _registry
+    if _registry is None:
+        _registry = BotRegistry(
+            BOTS, BOT_HOST,
+            path=os.environ.get("BOTS_FILE") or None,
+            docker_labels=os.environ.get("BOT_DISCOVERY", "") == "docker",
+        )
+        _registry.on_change(_on_registry_change)
+    return _registry
+
+
+def _bots():
+    """Current registry snapshot; take it once per request for a consistent view."""
+    return _get_registry().snapshot()
+
+
+def _on_registry_change(snap, changed):
+    """Drop per-bot state for the bots whose config changed."""
+    for bot_id in changed:
+        session = _bot_sessions.pop(bot_id, None)
+        if session is not None:
+            session.close()
+        if _latency is not None:
+            _latency.forget(bot_id)
+    if _container_telemetry is not None:
+        _container_telemetry.set_containers(snap.by_host)
+
+
+@app.route("/api/registry")
+@_auth_required
+def api_registry():
+    """Registry version, last validation error and the bot ids loaded."""
+    reg = _get_registry()
+    snap = reg.snapshot()
+    return jsonify({"version": snap.version, "loaded_at": snap.loaded_at,
+                    "error": reg.error, "bots": sorted(snap.bots)})
+
+
+@app.route("/api/latency")
+@_auth_required
+def api_latency():
+    """This worker's observed bot latency, derived timeouts and hedge counts."""
+    return jsonify(_get_latency().stats())
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
+_bot_sessions = {}  # bot_id -> requests.Session (keep-alive pool per bot)
+_latency = None
+_latency_lock = threading.Lock()
+
+
+def _get_latency():
+    global _latency
+    if _latency is None:
+        with _latency_lock:
+            if _latency is None:
+                _latency = LatencyTracker()
+    return _latency
+
+
+def _bot_session(bot_id: str) -> requests.Session:
+    session = _bot_sessions.get(bot_id)
+    if session is None:
+        session = requests.Session()
+        # Shared across users — never carry a bot's cookies between requests
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        session = _bot_sessions.setdefault(bot_id, session)
+    return session
+
+
 def _bot_base(bot_id: str) -> str:
     """Return the base URL for a bot."""
-    host = BOTS[bot_id].get("host", BOT_HOST)
-    return f"http://{host}:{BOTS[bot_id]['port']}"
+    return _bots().base_url[bot_id]
 
 
 def _bot_auth(bot_id: str):
     """Return (user, password) tuple or None."""
-    cfg = BOTS[bot_id].get("auth")
-    if not cfg:
-        return None
-    user = os.environ.get(cfg["user_env"], "")
-    pw = os.environ.get(cfg["pass_env"], "")
-    if user and pw:
-        return (user, pw)
-    return None
+    return _bots().auth.get(bot_id)
 
 
 def _proxy(bot_id: str, path: str):
@@ -69,20 +210,31 @@ def _proxy(bot_id: str, path: str):
     url = f"{_bot_base(bot_id)}/{path}"
     headers = {k: v for k, v in request.headers if k.lower() not in
                 ("host", "connection", "transfer-encoding")}
-    try:
-        # Some endpoints (e.g. /api/fills) paginate Kalshi API and take longer
-        slow_paths = ('fills', 'settlements')
-        effective_timeout = 60 if any(path.endswith(p) for p in slow_paths) else PROXY_TIMEOUT
-        resp = requests.request(
+    # Some endpoints (e.g. /api/fills) paginate Kalshi API and take longer;
+    # this only seeds the timeout until their latency has been observed
+    slow_paths = ('fills', 'settlements')
+    default_timeout = 60 if any(path.endswith(p) for p in slow_paths) else PROXY_TIMEOUT
+
+    # Inside /api/batch: give up with the batch rather than hold a pool thread past it
+    deadline = g.get("batch_deadline")
+
+    def send(timeout):
+        if deadline is not None:
+            timeout = max(0.1, min(timeout, deadline - time.monotonic()))
+        return _bot_session(bot_id).request(
             method=request.method,
             url=url,
             headers=headers,
             params=request.args,
             data=request.get_data(),
             auth=_bot_auth(bot_id),
-            timeout=effective_timeout,
+            timeout=timeout,
             allow_redirects=False,
         )
+
+    try:
+        resp = _get_latency().call(bot_id, "/" + path, send, default_timeout,
+                                   timeout_errors=(requests.Timeout,))
         excluded = {"transfer-encoding", "connection", "content-encoding", "content-length"}
         fwd_headers = [(k, v) for k, v in resp.headers.items()
                        if k.lower() not in excluded]
@@ -100,11 +252,101 @@ def _proxy(bot_id: str, path: str):
 @app.route("/proxy/<bot_id>/<path:path>", methods=["GET", "POST", "PUT", "DELETE"])
 @_auth_required
 def proxy_route(bot_id, path):
-    if bot_id not in BOTS:
+    if bot_id not in _bots():
         return jsonify({"error": f"Unknown bot: {bot_id}"}), 404
     return _proxy(bot_id, path)
 
 
+# ---------------------------------------------------------------------------
+# Batch endpoint — several GETs (proxied or internal) in one round trip
+# ---------------------------------------------------------------------------
+
+BATCH_MAX_ITEMS = 20
+BATCH_TIMEOUT = 10   # seconds, default deadline for the whole batch
+BATCH_TIMEOUT_RANGE = (0.1, 60)  # seconds; requested deadlines are clamped to this
+_batch_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="batch")
+
+
+def _batch_call(path, query, headers, deadline):
+    """Dispatch one GET through the URL map; returns ``(status, body)``."""
+    if time.monotonic() >= deadline:
+        return 504, {"error": "Deadline exceeded"}  # queued behind other batches too long
+    with app.test_request_context(path, method="GET", query_string=query, headers=headers):
+        g.batch_deadline = deadline
+        try:
+            rule, args = request.url_rule, request.view_args
+            if rule is None:
+                exc = request.routing_exception
+                return getattr(exc, "code", 404), {"error": getattr(exc, "description", "Not found")}
+            view = app.view_functions[rule.endpoint]
+            if rule.endpoint == "api_batch":
+                return 400, {"error": "Nested batch not allowed"}
+            # The batch itself was authenticated; skip the per-view check
+            resp = app.make_response(getattr(view, "__wrapped__", view)(**args))
+        except Exception as e:
+            logger.exception("Batch item %s failed", path)
+            return 500, {"error": str(e)}
+        if resp.is_streamed:
+            resp.close()
+            return 400, {"error": "Streaming endpoints cannot be batched"}
+        body = resp.get_json(silent=True)
+        if body is None:
+            body = resp.get_data(as_text=True)
+        return resp.status_code, body
+
+
+@app.route("/api/batch", methods=["POST"])
+@_auth_required
+def api_batch():
+    """Run several GETs in parallel under one deadline.
+
+    Body: ``{"requests": [{"id", "path", "headers"?}, ...], "timeout"?}``
+    where ``path`` is any GET route (``/proxy/<bot>/...`` or ``/api/...``),
+    optionally with a query string.  Returns ``{"responses": {id: {"status",
+    "body"}}}``; items still running at the deadline report status 504.
+    ``timeout`` (seconds) is clamped to ``BATCH_TIMEOUT_RANGE``.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get("requests")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "requests must be a non-empty list"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {BATCH_MAX_ITEMS} requests per batch"}), 400
+    timeout = data.get("timeout", BATCH_TIMEOUT)
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout != timeout:
+        return jsonify({"error": "timeout must be a number of seconds"}), 400
+    lo, hi = BATCH_TIMEOUT_RANGE
+    deadline = time.monotonic() + max(lo, min(timeout, hi))
+
+    futures = {}
+    responses = {}
+    for i, item in enumerate(items):
+        item_id = str(item.get("id", i)) if isinstance(item, dict) else str(i)
+        path = item.get("path", "") if isinstance(item, dict) else ""
+        if not path.startswith(("/api/", "/proxy/")):
+            responses[item_id] = {"status": 400, "body": {"error": "path must start with /api/ or /proxy/"}}
+            continue
+        extra = item.get("headers") or {}
+        if not isinstance(extra, dict) or not all(isinstance(k, str) and isinstance(v, str)
+                                                  for k, v in extra.items()):
+            responses[item_id] = {"status": 400,
+                                  "body": {"error": "headers must be an object of strings"}}
+            continue
+        path, _, query = path.partition("?")
+        headers = {"Authorization": request.headers.get("Authorization", "")}
+        headers.update(extra)
+        futures[item_id] = _batch_pool.submit(_batch_call, path, query, headers, deadline)
+
+    for item_id, fut in futures.items():
+        try:
+            status, body = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            fut.cancel()  # if not started yet; running proxy calls end at the deadline too
+            status, body = 504, {"error": "Deadline exceeded"}
+        responses[item_id] = {"status": status, "body": body}
+    return jsonify({"responses": responses})
+
+
 # ---------------------------------------------------------------------------
 # Bot dashboard injection — fetch root HTML, inject fetch interceptor
 # ---------------------------------------------------------------------------
@@ -125,6 +367,27 @@ _INTERCEPT_TEMPLATE = """
         return _origOpen.apply(this, arguments);
     }};
 
+    // Same-host WebSockets go through /proxy/<bot>/ (relayed by the hub);
+    // browsers don't reliably send Basic auth on upgrades, so add a token
+    var _OrigWS = window.WebSocket;
+    function _PortalWS(url, protocols) {{
+        var u = new URL(url, location.href);
+        if (u.host === location.host && u.pathname.indexOf('/proxy/') !== 0) {{
+            u.protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+            u.pathname = '/proxy/{bot_id}' + u.pathname;
+            try {{
+                var x = new XMLHttpRequest();
+                _origOpen.call(x, 'GET', '/terminal/token', false);
+                x.send();
+                if (x.status === 200) u.searchParams.set('portal_token', JSON.parse(x.responseText).token);
+            }} catch (e) {{}}
+        }}
+        return protocols === undefined ? new _OrigWS(u.href) : new _OrigWS(u.href, protocols);
+    }}
+    _PortalWS.prototype = _OrigWS.prototype;
+    ['CONNECTING', 'OPEN', 'CLOSING', 'CLOSED'].forEach(function(k) {{ _PortalWS[k] = _OrigWS[k]; }});
+    window.WebSocket = _PortalWS;
+
     // --- Capital allocation banner ---
     var _botId = '{bot_id}';
     var _botColor = '{bot_color}';
@@ -184,16 +447,18 @@ _INTERCEPT_TEMPLATE = """
 @app.route("/bot/<bot_id>/")
 @_auth_required
 def bot_dashboard(bot_id):
-    if bot_id not in BOTS:
+    snap = _bots()
+    if bot_id not in snap:
         return jsonify({"error": f"Unknown bot: {bot_id}"}), 404
+    cfg = snap.bots[bot_id]
     try:
-        resp = requests.get(
+        resp = _bot_session(bot_id).get(
             _bot_base(bot_id) + "/",
             auth=_bot_auth(bot_id),
             timeout=PROXY_TIMEOUT,
         )
         html = resp.text
-        bot_color = BOTS[bot_id].get("color", "#888")
+        bot_color = cfg.get("color", "#888")
         intercept = _INTERCEPT_TEMPLATE.format(bot_id=bot_id, bot_color=bot_color)
         # Inject right after <head> (or at start if no <head>)
         if re.search(r"<head[^>]*>", html, re.IGNORECASE):
@@ -203,117 +468,225 @@ def bot_dashboard(bot_id):
         return Response(html, content_type="text/html")
     except requests.RequestException:
         return f"<html><body style='background:#0a0e14;color:#f44;font-family:monospace;padding:2rem'>" \
-               f"<h2>{BOTS[bot_id]['name']} is unreachable</h2>" \
-               f"<p>The bot at port {BOTS[bot_id]['port']} is not responding.</p></body></html>", 502
+               f"<h2>{cfg['name']} is unreachable</h2>" \
+               f"<p>The bot at port {cfg['port']} is not responding.</p></body></html>", 502
 
 
 # ---------------------------------------------------------------------------
 # Overview aggregation
 # ---------------------------------------------------------------------------
 
-def _extract_bounce_back(data):
-    summary = data.get("summary", {})
-    return {
-        "healthy": data.get("running", False),
-        "running": data.get("running", False),
-        "mode": (data.get("mode") or "PAPER").upper(),
-        "pnl": round(summary.get("total_pnl", 0), 3),
-        "completed": summary.get("settled", 0),
-        "wins": summary.get("wins", 0),
-        "win_rate": round(summary.get("win_rate", 0) * 100, 1),
-        "open_positions": summary.get("open", 0),
-    }
+_fetch_plan = None
 
 
-def _extract_weather(data):
-    pt = data.get("paper_trading", {})
-    lt = data.get("live_trading", {})
-    armed = lt.get("armed", False)
-    realized = pt.get("realized_pnl", 0) / 100.0
-    balance = pt.get("current_balance", 0) / 100.0
-    starting = pt.get("starting_balance", 0) / 100.0
-    total_pnl = balance - starting
-    return {
-        "healthy": True,
-        "mode": "LIVE" if armed else "PAPER",
-        "pnl": round(total_pnl, 2),
-        "realized_pnl": round(realized, 2),
-        "open_positions": pt.get("open_positions_count", 0),
-        "daily_trades": pt.get("daily_trades", 0),
-    }
+def _fetch_bot_json(bot_id, path):
+    """GET a health/status endpoint; hedged, since these reads are idempotent."""
+    def get(timeout):
+        resp = _bot_session(bot_id).get(_bot_base(bot_id) + path, auth=_bot_auth(bot_id),
+                                        timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
 
+    return _get_latency().call(bot_id, path, get, PROXY_TIMEOUT, hedge=True,
+                               timeout_errors=(requests.Timeout,),
+                               max_timeout=HEALTH_TIMEOUT_MAX)
 
-def _extract_btc_range(data):
-    pnl_sum = data.get("pnl_summary", {})
-    return {
-        "healthy": True,
-        "mode": data.get("mode", "unknown").upper(),
-        "running": data.get("running", False),
-        "pnl": round(pnl_sum.get("total_pnl", 0), 2),
-        "win_rate": round(pnl_sum.get("win_rate", 0) * 100, 1),
-        "completed": pnl_sum.get("completed", 0),
-        "wins": pnl_sum.get("wins", 0),
-    }
 
+def _get_fetch_plan():
+    global _fetch_plan
+    if _fetch_plan is None:
+        from extractors import FetchPlan
+        plan = FetchPlan(_fetch_bot_json, on_cycle=_on_fetch_cycle,
+                         pushed=lambda snap: _get_push_store().records(snap.bots))
+        saved_at, saved = _warm_snapshot("overview").load()
+        if saved:
+            try:
+                plan.warm({bot_id: BotRecord(**r) for bot_id, r in saved.items()}, saved_at)
+            except TypeError as e:  # saved by a version with other fields
+                logger.warning("Ignoring warm overview snapshot: %s", e)
+        _fetch_plan = plan
+    return _fetch_plan
 
-def _extract_sports_arb_health(data):
-    return {
-        "healthy": data.get("status") == "healthy",
-        "bot_running": data.get("bot_running", False),
-        "ws_connected": data.get("websocket_connected", False),
-    }
 
+def _on_fetch_cycle(records):
+    _record_pnl_samples(records)
+    _warm_snapshot("overview").save({bot_id: r.to_dict() for bot_id, r in records.items()})
 
-def _extract_sports_arb_status(data):
-    pnl_sum = data.get("pnl_summary", {})
-    bot_st = data.get("bot_status", {})
-    return {
-        "mode": "LIVE" if not bot_st.get("dry_run", True) else "DRY RUN",
-        "pnl": round(pnl_sum.get("total_pnl", 0) / 100.0, 2),
-        "win_rate": round(pnl_sum.get("win_rate", 0) * 100, 1),
-        "completed": pnl_sum.get("completed", 0),
-        "wins": pnl_sum.get("wins", 0),
-        "status": bot_st.get("status", "unknown"),
-    }
+
+def _bot_records():
+    """``{bot_id: BotRecord}`` from the shared fetch cycle."""
+    return _get_fetch_plan().collect(_bots())
+
+
+def _collect_overview(warm=False):
+    """Build the overview payload from the current fetch cycle.
+
+    With ``warm``, a worker that has not finished a cycle yet serves the
+    last saved one instead of waiting, marked ``warm_start``.
+    """
+    fed = _get_federation()
+    if fed is not None:
+        return fed.overview()
+    snap = _bots()
+    if warm:
+        records, as_of = _get_fetch_plan().collect_warm(snap)
+    else:
+        records, as_of = _get_fetch_plan().collect(snap), None
+    results = {}
+    for bot_id, cfg in snap.bots.items():
+        entry = {"name": cfg["name"], "short": cfg["short"], "color": cfg["color"]}
+        # A bot added mid-cycle has no record until the next cycle
+        entry.update(records.get(bot_id, BotRecord(error="Unreachable")).to_dict())
+        results[bot_id] = entry
+
+    total_pnl = sum(b.get("pnl", 0) for b in results.values())
+    data = {"bots": results, "total_pnl": round(total_pnl, 2)}
+    if as_of is not None:
+        data["warm_start"] = warm_start.marker(as_of)
+    return data
 
 
 @app.route("/api/overview")
 @_auth_required
 def overview():
-    results = {}
-    for bot_id, cfg in BOTS.items():
-        entry = {"name": cfg["name"], "short": cfg["short"], "color": cfg["color"],
-                 "healthy": False, "mode": "UNKNOWN", "pnl": 0}
-        try:
-            health_url = _bot_base(bot_id) + cfg["health_endpoint"]
-            resp = requests.get(health_url, auth=_bot_auth(bot_id), timeout=PROXY_TIMEOUT)
-            resp.raise_for_status()
-            data = resp.json()
-
-            extractor = cfg.get("pnl_extractor")
-            if extractor == "weather":
-                entry.update(_extract_weather(data))
-            elif extractor == "btc_range":
-                entry.update(_extract_btc_range(data))
-            elif extractor == "bounce_back":
-                entry.update(_extract_bounce_back(data))
-            elif extractor == "sports_arb":
-                entry.update(_extract_sports_arb_health(data))
-                # Sports arb health endpoint doesn't have P&L; fetch status
+    return jsonify(_collect_overview(warm=True))
+
+
+_pnl_history = None
+
+
+def _get_pnl_history():
+    global _pnl_history
+    if _pnl_history is None:
+        from pnl_history import PnlHistory
+        _pnl_history = PnlHistory()
+    return _pnl_history
+
+
+_last_pnl = {}  # bot_id -> P&L at its last reachable fetch
+
+
+def _record_pnl_samples(records):
+    """Append a fetch cycle's P&L to the history store (reachable bots only).
+
+    ``total`` counts an unreachable bot at its last reachable P&L, so a
+    missed poll is not a dip in the equity curve.
+    """
+    samples = {bot_id: r.pnl for bot_id, r in records.items() if r.error is None}
+    _last_pnl.update(samples)
+    if samples:
+        samples["total"] = round(sum(_last_pnl.get(bot_id, 0.0) for bot_id in records), 2)
+    try:
+        _get_pnl_history().record(samples)
+    except Exception as e:
+        logger.warning("Failed to record P&L history: %s", e)
+
+
+def _pnl_compact_loop():
+    """Compact the P&L history files when due, in the lease-holding worker only."""
+    from worker_lease import WorkerLease
+    lease = WorkerLease("pnl-compact")
+    while True:
+        if lease.held():
+            history = _get_pnl_history()
+            if history.compact_due():
                 try:
-                    status_url = _bot_base(bot_id) + cfg.get("status_endpoint", "/api/status")
-                    sr = requests.get(status_url, auth=_bot_auth(bot_id), timeout=PROXY_TIMEOUT)
-                    sr.raise_for_status()
-                    entry.update(_extract_sports_arb_status(sr.json()))
-                except requests.RequestException:
-                    pass
-        except requests.RequestException as e:
-            logger.error("Overview health check for %s failed: %s %s", bot_id, type(e).__name__, e)
-            entry["error"] = "Unreachable"
-        results[bot_id] = entry
+                    history.compact()
+                except Exception:
+                    logger.exception("P&L history compaction failed")
+        time.sleep(60)
 
-    total_pnl = sum(b.get("pnl", 0) for b in results.values())
-    return jsonify({"bots": results, "total_pnl": round(total_pnl, 2)})
+
+@app.route("/api/overview/history")
+@_auth_required
+def overview_history():
+    """Downsampled P&L history for one bot (or ``total``).
+
+    Query params: ``bot`` (default ``total``), ``from`` / ``to`` (epoch
+    seconds, default the last 24 h), ``points`` (default 300, max 2000) and
+    ``method`` (``lttb`` or ``minmax``).
+    """
+    bot_id = request.args.get("bot", "total")
+    if bot_id != "total" and bot_id not in _bots():
+        return jsonify({"error": f"Unknown bot: {bot_id}"}), 404
+    now = time.time()
+    t1 = request.args.get("to", now, type=float)
+    t0 = request.args.get("from", t1 - 86400, type=float)
+    points = max(3, min(request.args.get("points", 300, type=int), 2000))
+    method = request.args.get("method", "lttb")
+    if t0 >= t1:
+        return jsonify({"error": "from must be before to"}), 400
+    tier, ts, values = _get_pnl_history().query(bot_id, t0, t1, points, method)
+    return jsonify({
+        "bot": bot_id,
+        "tier": tier,
+        "t": [round(t, 1) for t in ts],
+        "pnl": [round(v, 2) for v in values],
+    })
+
+
+# ---------------------------------------------------------------------------
+# Push ingestion — bots report their own status (see push_ingest.py)
+# ---------------------------------------------------------------------------
+
+INGEST_MAX_BYTES = 16 * 1024
+
+_push_store = None
+_push_store_lock = threading.Lock()
+
+
+def _get_push_store():
+    global _push_store
+    if _push_store is None:
+        with _push_store_lock:
+            if _push_store is None:
+                _push_store = push_ingest.PushStore()
+    return _push_store
+
+
+@app.route("/api/ingest/<bot_id>", methods=["POST"])
+def ingest_push(bot_id):
+    """A bot's status update; authenticated with its ingest key, not portal auth.
+
+    409 asks the bot to resend its full state (sequence gap or new epoch).
+    """
+    auth = request.headers.get("Authorization", "")
+    if not push_ingest.check_key(bot_id, auth[7:] if auth.startswith("Bearer ") else ""):
+        return jsonify({"error": "Unauthorized"}), 401
+    if bot_id not in _bots():
+        return jsonify({"error": f"Unknown bot: {bot_id}"}), 404
+    if (request.content_length or 0) > INGEST_MAX_BYTES:
+        return jsonify({"error": "Update too large"}), 413
+    # A chunked body has no Content-Length, so count the bytes actually read
+    body = request.stream.read(INGEST_MAX_BYTES + 1)
+    if len(body) > INGEST_MAX_BYTES:
+        return jsonify({"error": "Update too large"}), 413
+    try:
+        update = json.loads(body)
+    except ValueError:
+        update = None
+    try:
+        result = _get_push_store().apply(bot_id, update)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    result["heartbeat"] = push_ingest.HEARTBEAT
+    return jsonify(result), 409 if result["resync"] else 200
+
+
+@app.route("/api/ingest")
+@_auth_required
+def ingest_status():
+    """Whether each bot is currently served from pushes or polled."""
+    return jsonify(_get_push_store().status(_bots().bots))
+
+
+@app.route("/api/ingest/<bot_id>/key")
+@_auth_required
+def ingest_key(bot_id):
+    """The bearer key to configure on ``bot_id`` for pushing."""
+    if bot_id not in _bots():
+        return jsonify({"error": f"Unknown bot: {bot_id}"}), 404
+    return jsonify({"bot_id": bot_id, "key": push_ingest.ingest_key(bot_id)})
 
 
 # ---------------------------------------------------------------------------
@@ -344,78 +717,65 @@ def _get_capital_store():
 
 
 def _get_bot_pnl():
-    """Fetch P&L for each bot (in dollars). Returns {bot_id: pnl_dollars}."""
-    pnl = {}
-    for bot_id, cfg in BOTS.items():
-        try:
-            health_url = _bot_base(bot_id) + cfg["health_endpoint"]
-            resp = requests.get(health_url, auth=_bot_auth(bot_id), timeout=PROXY_TIMEOUT)
-            resp.raise_for_status()
-            data = resp.json()
-            extractor = cfg.get("pnl_extractor")
-            if extractor == "weather":
-                pnl[bot_id] = _extract_weather(data).get("pnl", 0)
-            elif extractor == "btc_range":
-                pnl[bot_id] = _extract_btc_range(data).get("pnl", 0)
-            elif extractor == "bounce_back":
-                pnl[bot_id] = _extract_bounce_back(data).get("pnl", 0)
-            elif extractor == "sports_arb":
-                try:
-                    status_url = _bot_base(bot_id) + cfg.get("status_endpoint", "/api/status")
-                    sr = requests.get(status_url, auth=_bot_auth(bot_id), timeout=PROXY_TIMEOUT)
-                    sr.raise_for_status()
-                    pnl[bot_id] = _extract_sports_arb_status(sr.json()).get("pnl", 0)
-                except requests.RequestException:
-                    pnl[bot_id] = 0
-        except requests.RequestException:
-            pnl[bot_id] = 0
-    return pnl
+    """P&L (dollars) of each reachable bot from the shared fetch cycle."""
+    return {bot_id: r.pnl for bot_id, r in _bot_records().items() if r.error is None}
+
+
+# The capital view is reconciled by one worker on a schedule (capital_reconciler.py)
+RECONCILE_INTERVAL = int(os.environ.get("RECONCILE_INTERVAL", "30"))
+
+_reconciler = None
+
+
+def _get_reconciler():
+    global _reconciler
+    if _reconciler is None:
+        from capital_reconciler import CapitalReconciler
+        # The client (and its private key) is only loaded by the worker that reconciles
+        _reconciler = CapitalReconciler(_get_capital_store(), _get_bot_pnl, _get_kalshi_client,
+                                        interval=RECONCILE_INTERVAL)
+    return _reconciler
+
+
+def _reconcile_loop():
+    """Reconcile capital on a schedule, in the lease-holding worker only."""
+    from worker_lease import WorkerLease
+    lease = WorkerLease("reconcile")
+    while True:
+        if lease.held():
+            try:
+                _get_reconciler().run_once()
+            except Exception:
+                logger.exception("Capital reconciliation failed")
+        time.sleep(RECONCILE_INTERVAL)
+
+
+def _capital_changed():
+    """Republish the capital view after a ledger write."""
+    try:
+        _get_reconciler().refresh()
+    except Exception:
+        logger.exception("Capital view refresh failed")
+
+
+def _collect_capital():
+    """The latest reconciled capital view, with bot colors; no live calls."""
+    view = _get_reconciler().view()
+    fed = _get_federation()
+    if fed is not None:
+        return fed.capital(view["real_balance"])
+    bots = _bots().bots
+    view["accounts"] = [dict(a, color=bots[a["id"]]["color"] if a["id"] in bots else "#888")
+                        for a in view["accounts"]]
+    return view
 
 
 @app.route("/api/capital", methods=["GET"])
 @_auth_required
 def get_capital():
-    """Return virtual accounts merged with real Kalshi balance and bot P&L."""
-    store = _get_capital_store()
-    accounts = store.get_accounts()
-    total_allocated = store.get_total_allocated()
-
-    # Real Kalshi balance (cents), None if creds not set
-    real_balance = None
-    client = _get_kalshi_client()
-    if client:
-        try:
-            real_balance = client.get_balance()
-        except Exception as e:
-            logger.warning("Failed to fetch Kalshi balance: %s", e)
-
-    # Bot P&L
-    bot_pnl = _get_bot_pnl()
-
-    # Build account list
-    account_list = []
-    for bot_id, acct in accounts.items():
-        alloc = acct.get("allocation", 0)
-        pnl_dollars = bot_pnl.get(bot_id, 0)
-        pnl_cents = int(round(pnl_dollars * 100))
-        color = BOTS[bot_id]["color"] if bot_id in BOTS else "#888"
-        account_list.append({
-            "id": bot_id,
-            "label": acct.get("label", bot_id),
-            "allocation": alloc,
-            "pnl": pnl_cents,
-            "effective": alloc + pnl_cents,
-            "color": color,
-        })
-
-    unallocated = (real_balance - total_allocated) if real_balance is not None else None
-
-    return jsonify({
-        "real_balance": real_balance,
-        "total_allocated": total_allocated,
-        "unallocated": unallocated,
-        "accounts": account_list,
-    })
+    """Virtual accounts joined with the Kalshi balance and bot P&L (amounts in
+    cents), as of the last reconciliation; see capital_reconciler."""
+    return jsonify(_collect_capital())
 
 
 @app.route("/api/capital/allocate", methods=["POST"])
@@ -435,6 +795,7 @@ def allocate_capital():
     try:
         amount_cents = int(round(float(amount) * 100))
         _get_capital_store().allocate(bot_id, label, amount_cents)
+        _capital_changed()
         return jsonify({"ok": True})
     except Exception as e:
         logger.exception("Allocate failed")
@@ -447,6 +808,7 @@ def remove_capital(bot_id):
     """Remove a virtual allocation."""
     try:
         _get_capital_store().remove(bot_id)
+        _capital_changed()
         return jsonify({"ok": True})
     except Exception as e:
         logger.exception("Remove failed")
@@ -468,6 +830,7 @@ def transfer_capital():
     try:
         amount_cents = int(round(float(amount) * 100))
         _get_capital_store().transfer(from_id, to_id, amount_cents)
+        _capital_changed()
         return jsonify({"ok": True})
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
@@ -497,6 +860,9 @@ def get_capital_limit(bot_id):
 def get_capital_transfers():
     """Return recent transfer history."""
     limit = request.args.get("limit", 20, type=int)
+    fed = _get_federation()
+    if fed is not None:
+        return jsonify({"transfers": fed.transfers(limit)})
     try:
         transfers = _get_capital_store().get_transfers(limit=limit)
         return jsonify({"transfers": transfers})
@@ -505,6 +871,243 @@ def get_capital_transfers():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/capital/flows", methods=["GET"])
+@_auth_required
+def capital_flows():
+    """Inflow, outflow and net per account and day (or month) from the rollups.
+
+    Query params: ``by`` (``day`` or ``month``), ``from`` / ``to``
+    (``YYYY-MM-DD`` or ``YYYY-MM``; default the last 30 days or 12 months)
+    and ``bot`` to restrict to one account.  Amounts are in cents.
+    """
+    granularity = request.args.get("by", "day")
+    try:
+        start, end = capital_rollups.parse_range(granularity, request.args.get("from"),
+                                                 request.args.get("to"))
+        flows = _get_capital_store().get_flows(start, end, granularity,
+                                               request.args.get("bot") or None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"by": granularity, "from": start.isoformat(), "to": end.isoformat(),
+                    **flows})
+
+
+# ---------------------------------------------------------------------------
+# Mobile sync — one masked, delta-encoded request per app refresh
+# ---------------------------------------------------------------------------
+
+def _sync_delta(mask, since):
+    """mobile_sync response for ``mask`` relative to the token ``since``."""
+    prev = mobile_sync.SyncToken.decode(since, mask)
+    overview = _collect_overview(warm=True) if "bots" in mask or "totals" in mask else None
+    capital = None
+    if "accounts" in mask or "totals" in mask:
+        capital = _collect_capital()
+    totals = None
+    if "totals" in mask:
+        totals = {"total_pnl": overview["total_pnl"],
+                  **{k: capital[k] for k in ("real_balance", "total_allocated", "unallocated")}}
+    transfers, transfer_count = [], 0
+    if "transfers" in mask:
+        transfers, transfer_count = _get_capital_store().get_transfers_since(
+            mobile_sync.transfer_start(prev), limit=mobile_sync.TRANSFER_LIMIT)
+
+    return mobile_sync.build(
+        prev, mask,
+        bots=overview["bots"] if "bots" in mask else None,
+        accounts={a["id"]: a for a in capital["accounts"]} if "accounts" in mask else None,
+        totals=totals, transfers=transfers, transfer_count=transfer_count,
+        since=since,
+    )
+
+
+@app.route("/api/mobile/sync")
+@_auth_required
+def mobile_sync_route():
+    """Changed bots, accounts, totals and new transfers since ``?since=``.
+
+    ``?fields=`` is a field mask such as ``bots(pnl,healthy),transfers``;
+    see mobile_sync for the token and response format.
+    """
+    try:
+        mask = mobile_sync.parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(_sync_delta(mask, request.args.get("since")))
+
+
+# ---------------------------------------------------------------------------
+# Federation — aggregate child portals (FEDERATION_NODES, see federation.py)
+# ---------------------------------------------------------------------------
+
+# Routes that act on one bot and are served by the node that owns it
+_FEDERATED_BY_BOT = {"proxy_route", "bot_dashboard", "remove_capital", "get_capital_limit",
+                     "allocate_capital", "transfer_capital", "overview_history",
+                     "capital_flows"}
+
+_federation = None  # False when FEDERATION_NODES is unset
+_federation_lock = threading.Lock()
+
+
+def _get_federation():
+    """The Federation when ``FEDERATION_NODES`` is set, else None."""
+    global _federation
+    if _federation is None:
+        with _federation_lock:
+            if _federation is None:
+                nodes = federation.parse_nodes(os.environ.get("FEDERATION_NODES", ""))
+                _federation = federation.Federation(nodes) if nodes else False
+    return _federation or None
+
+
+def _proxy_to_node(node, path):
+    """Forward the current request to a child portal and return its response."""
+    headers = {k: v for k, v in request.headers if k.lower() not in
+               ("host", "connection", "transfer-encoding", "authorization")}
+
+    def send(timeout):
+        return node.session.request(
+            method=request.method,
+            url=node.url + path,
+            headers=headers,
+            params=request.args,
+            data=request.get_data(),
+            auth=node.auth,
+            timeout=timeout,
+            allow_redirects=False,
+        )
+
+    try:
+        resp = _get_latency().call(f"node:{node.name}", path, send, PROXY_TIMEOUT,
+                                   timeout_errors=(requests.Timeout,))
+    except requests.RequestException as e:
+        logger.error("Federated request to %s failed: %s %s", node.name, type(e).__name__, e)
+        return jsonify({"error": "Node unreachable", "node": node.name}), 502
+    excluded = {"transfer-encoding", "connection", "content-encoding", "content-length"}
+    fwd_headers = [(k, v) for k, v in resp.headers.items() if k.lower() not in excluded]
+    return Response(resp.content, status=resp.status_code, headers=fwd_headers)
+
+
+@app.before_request
+def _federation_route():
+    """In federation mode, hand per-bot requests to the node that owns the bot."""
+    if request.endpoint not in _FEDERATED_BY_BOT:
+        return None
+    fed = _get_federation()
+    if fed is None:
+        return None
+    if request.endpoint == "overview_history" and request.args.get("bot", "total") == "total":
+        return None  # no single node holds the portfolio total
+    if request.endpoint == "capital_flows" and not request.args.get("bot"):
+        return None
+    denied = _check_auth()
+    if denied is not None:
+        return denied
+
+    body = request.get_json(silent=True) or {}
+    if request.endpoint == "transfer_capital":
+        owners = {fed.owner(body.get(k)) for k in ("from", "to") if body.get(k) != "unallocated"}
+        if len(owners) != 1 or None in owners:
+            return jsonify({"error": "Transfers must stay within one node"}), 400
+        return _proxy_to_node(owners.pop(), request.path)
+    bot_id = ((request.view_args or {}).get("bot_id") or body.get("bot_id")
+              or request.args.get("bot"))
+    node = fed.owner(bot_id)
+    if node is None:
+        return jsonify({"error": f"Unknown bot: {bot_id}"}), 404
+    return _proxy_to_node(node, request.path)
+
+
+@app.route("/api/federation")
+@_auth_required
+def api_federation():
+    """Node health and the bots each node serves (empty outside federation mode)."""
+    fed = _get_federation()
+    return jsonify({"nodes": fed.node_status() if fed else {}})
+
+
+@app.route("/api/federation/stream")
+@_auth_required
+def federation_stream():
+    """SSE of incremental snapshots for a parent portal.
+
+    ``sync`` events carry a mobile_sync delta of this portal's bots,
+    accounts, totals and transfers; each event id is the token to resume
+    from (``Last-Event-ID``).  ``system`` events carry the top-level
+    sections of ``/api/system`` that changed (all of them first).  A
+    keepalive comment goes out every quiet cycle.
+
+    Behind the hub (hub.py) this route is not reached; the hub serves the
+    same stream without holding a worker thread for its lifetime.
+    """
+    mask = mobile_sync.parse_fields(None)
+    since = request.headers.get("Last-Event-ID") or request.args.get("since")
+
+    def generate():
+        token, system, system_at = since, None, 0
+        while True:
+            delta = _sync_delta(mask, token)
+            if "token" in delta:
+                token = delta.pop("token")
+                delta.pop("next_poll", None)
+                yield f"id: {token}\n" + _sse(delta, event="sync")
+            else:
+                yield ": keepalive\n\n"
+            if time.time() - system_at >= federation.SYSTEM_EVERY:
+                system_at = time.time()
+                current = _collect_system()
+                changed = federation.system_changes(system, current)
+                if changed:
+                    system = current
+                    yield _sse(changed, event="system")
+            time.sleep(mobile_sync.POLL_MIN)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---------------------------------------------------------------------------
+# Risk engine — drawdown / volatility per bot, polled by one worker
+# ---------------------------------------------------------------------------
+
+RISK_POLL_INTERVAL = int(os.environ.get("RISK_POLL_INTERVAL", "15"))
+
+_risk_engine = None
+
+
+def _get_risk_engine():
+    global _risk_engine
+    if _risk_engine is None:
+        from config import RISK_THRESHOLDS
+        from risk_engine import RiskEngine
+        _risk_engine = RiskEngine(RISK_THRESHOLDS, os.environ.get("RISK_WEBHOOK_URL", ""))
+    return _risk_engine
+
+
+def _risk_loop():
+    """Feed the risk engine from the overview poll, in the lease-holding worker only."""
+    from worker_lease import WorkerLease
+    lease = WorkerLease("risk")
+    while True:
+        if lease.held():
+            try:
+                data = _collect_overview()
+                _get_risk_engine().update(data["bots"], _get_capital_store().get_accounts())
+            except Exception:
+                logger.exception("Risk poll failed")
+        time.sleep(RISK_POLL_INTERVAL)
+
+
+@app.route("/api/risk")
+@_auth_required
+def api_risk():
+    """Per-bot and portfolio HWM, drawdown, volatility and return."""
+    return jsonify(_get_risk_engine().snapshot())
+
+
 # ---------------------------------------------------------------------------
 # Claude Code integration
 # ---------------------------------------------------------------------------
@@ -514,16 +1117,70 @@ CLAUDE_WORK_DIR = os.environ.get("CLAUDE_WORK_DIR",
                                   os.path.dirname(os.path.abspath(__file__)))
 CLAUDE_MAX_TURNS = int(os.environ.get("CLAUDE_MAX_TURNS", "10"))
 
-_claude_lock = threading.Lock()
+CLAUDE_KEEPALIVE = 15  # seconds between SSE comments on a quiet job stream
+
+_claude_jobs = None
+
+
+def _get_claude_jobs():
+    global _claude_jobs
+    if _claude_jobs is None:
+        from claude_jobs import JobQueue
+        _claude_jobs = JobQueue(CLAUDE_WORK_DIR, CLAUDE_MAX_TURNS)
+    return _claude_jobs
+
+
+def _claude_disabled():
+    return jsonify({"error": "Claude Code integration is disabled. "
+                    "Set CLAUDE_ENABLED=1 to enable."}), 403
+
+
+def _claude_job_stream(job_id, offset=0):
+    """SSE of a job's output from byte ``offset``; event ids are offsets."""
+    jobs = _get_claude_jobs()
+
+    def generate():
+        pos = offset
+        quiet_since = time.time()
+        yield _sse({"type": "job", "id": job_id})
+        while True:
+            # Check status before reading so the final lines are never missed
+            meta = jobs.get(job_id)
+            if meta is None:
+                yield _sse({"type": "error", "error": "Job no longer exists"})
+                return
+            lines = jobs.read(job_id, pos)
+            for line, pos in lines:
+                yield f"id: {pos}\ndata: {line}\n\n"
+            if lines:
+                quiet_since = time.time()
+                continue
+            if meta["status"] in ("done", "error", "cancelled"):
+                yield f"id: {pos}\ndata: [DONE]\n\n"
+                return
+            if time.time() - quiet_since > CLAUDE_KEEPALIVE:
+                quiet_since = time.time()
+                yield ": keepalive\n\n"
+            time.sleep(0.25)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no",
+                 "X-Claude-Job-Id": job_id},
+    )
 
 
 @app.route("/api/claude", methods=["POST"])
 @_auth_required
 def claude_chat():
-    """Run a Claude Code prompt and stream results via SSE."""
+    """Run a Claude Code prompt as a queued job and stream its output via SSE.
+
+    Kept for older clients; the job keeps running if the stream drops and
+    can be resumed from ``/api/claude/jobs/<id>/stream``.
+    """
     if not CLAUDE_ENABLED:
-        return jsonify({"error": "Claude Code integration is disabled. "
-                        "Set CLAUDE_ENABLED=1 to enable."}), 403
+        return _claude_disabled()
 
     data = request.get_json(force=True)
     prompt = data.get("prompt", "").strip()
@@ -531,116 +1188,145 @@ def claude_chat():
     if not prompt:
         return jsonify({"error": "prompt is required"}), 400
 
-    if not _claude_lock.acquire(blocking=False):
-        return jsonify({"error": "Another Claude request is already running. "
-                        "Please wait for it to finish."}), 429
+    job = _get_claude_jobs().submit(prompt, session_id)
+    return _claude_job_stream(job["id"])
 
-    def generate():
-        proc = None
-        try:
-            cmd = [
-                "claude", "-p",
-                "--output-format", "stream-json",
-                "--verbose",
-                "--max-turns", str(CLAUDE_MAX_TURNS),
-                "--allowedTools",
-                "Bash(curl:*)", "Bash(git:*)",
-                "Read", "Edit", "Write", "Glob", "Grep",
-            ]
-            # Resume a previous conversation if session_id is provided
-            if session_id:
-                cmd += ["--resume", session_id]
-            cmd += ["--", prompt]
-            proc = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                cwd=CLAUDE_WORK_DIR,
-                text=True,
-                bufsize=1,
-            )
-            for line in proc.stdout:
-                line = line.strip()
-                if line:
-                    yield f"data: {line}\n\n"
-            proc.wait(timeout=300)
-            if proc.returncode != 0:
-                err = proc.stderr.read()
-                yield f"data: {json.dumps({'type': 'error', 'error': err})}\n\n"
-            yield "data: [DONE]\n\n"
-        except FileNotFoundError:
-            yield ("data: " + json.dumps({
-                "type": "error",
-                "error": "claude CLI not found. "
-                         "Install: npm install -g @anthropic-ai/claude-code"
-            }) + "\n\n")
-            yield "data: [DONE]\n\n"
-        except subprocess.TimeoutExpired:
-            if proc:
-                proc.kill()
-            yield ("data: " + json.dumps({
-                "type": "error",
-                "error": "Request timed out (5 min limit)"
-            }) + "\n\n")
-            yield "data: [DONE]\n\n"
-        except GeneratorExit:
-            pass
-        except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
-            yield "data: [DONE]\n\n"
-        finally:
-            if proc and proc.poll() is None:
-                proc.kill()
-            _claude_lock.release()
 
-    return Response(
-        generate(),
-        mimetype="text/event-stream",
-        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
-    )
+@app.route("/api/claude/jobs", methods=["GET"])
+@_auth_required
+def claude_jobs_list():
+    limit = max(1, min(request.args.get("limit", 50, type=int), 500))
+    return jsonify({"jobs": _get_claude_jobs().list(limit)})
+
+
+@app.route("/api/claude/jobs", methods=["POST"])
+@_auth_required
+def claude_jobs_submit():
+    """Queue a prompt; returns the job id to stream or cancel."""
+    if not CLAUDE_ENABLED:
+        return _claude_disabled()
+    data = request.get_json(force=True)
+    prompt = data.get("prompt", "").strip()
+    if not prompt:
+        return jsonify({"error": "prompt is required"}), 400
+    job = _get_claude_jobs().submit(prompt, data.get("session_id", "").strip())
+    return jsonify(job), 202
+
+
+@app.route("/api/claude/jobs/<job_id>", methods=["GET"])
+@_auth_required
+def claude_job_get(job_id):
+    job = _get_claude_jobs().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job)
+
+
+@app.route("/api/claude/jobs/<job_id>/stream")
+@_auth_required
+def claude_job_stream(job_id):
+    """Stream job output; resumes from ``?offset=`` or the Last-Event-ID header."""
+    if _get_claude_jobs().get(job_id) is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    offset = request.args.get("offset", type=int)
+    if offset is None:
+        offset = request.headers.get("Last-Event-ID", 0, type=int)
+    return _claude_job_stream(job_id, max(0, offset))
+
+
+@app.route("/api/claude/jobs/<job_id>/cancel", methods=["POST"])
+@_auth_required
+def claude_job_cancel(job_id):
+    job = _get_claude_jobs().cancel(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(_get_claude_jobs().get(job_id))
 
 
 # ---------------------------------------------------------------------------
 # System info
 # ---------------------------------------------------------------------------
 
+_container_inventory = None
+_service_probes = None
+
+
+def _get_container_inventory():
+    global _container_inventory
+    if _container_inventory is None:
+        from container_inventory import ContainerInventory
+        _container_inventory = ContainerInventory()
+    return _container_inventory
+
+
+def _get_service_probes():
+    global _service_probes
+    if _service_probes is None:
+        from container_inventory import ServiceProbes
+        _service_probes = ServiceProbes({"nginx": ("host.docker.internal", 80)})
+    return _service_probes
+
+
+_container_telemetry = None
+
+
+def _get_container_telemetry():
+    global _container_telemetry
+    if _container_telemetry is None:
+        from container_telemetry import ContainerTelemetry
+        _container_telemetry = ContainerTelemetry(_bots().by_host)
+    return _container_telemetry
+
+
+def _telemetry_loop():
+    """Sample container stats on a timer, in the lease-holding worker only."""
+    from worker_lease import WorkerLease
+    lease = WorkerLease("telemetry")
+    telemetry = _get_container_telemetry()
+    while True:
+        started = time.time()
+        if lease.held():
+            try:
+                telemetry.sample_once()
+            except Exception:
+                logger.exception("Container telemetry sampling failed")
+        time.sleep(max(0.0, telemetry.interval - (time.time() - started)))
+
+
 @app.route("/api/system")
 @_auth_required
 def api_system():
-    """Return Docker container statuses, cron jobs, and host resource usage."""
+    """Return Docker container statuses, cron jobs, and host resource usage.
+
+    Containers and service probes come from background-maintained caches,
+    so this never blocks on Docker or the network.  In federation mode
+    every node's payload is merged, tagged with its node.
+    """
+    fed = _get_federation()
+    return jsonify(fed.system() if fed is not None else _collect_system())
+
+
+def _collect_system():
     import shutil
 
-    # Docker containers — query via Docker socket API
-    containers = []
-    try:
-        import http.client, urllib.parse
-        conn = http.client.HTTPConnection("localhost")
-        conn.sock = __import__('socket').socket(__import__('socket').AF_UNIX, __import__('socket').SOCK_STREAM)
-        conn.sock.connect("/var/run/docker.sock")
-        conn.request("GET", "/containers/json?all=true")
-        resp = conn.getresponse()
-        raw = json.loads(resp.read())
-        for c in raw:
-            name = c.get("Names", ["?"])[0].lstrip("/")
-            status = c.get("Status", "")
-            image = c.get("Image", "")
-            running = c.get("State", "") == "running"
-            ports_list = c.get("Ports", [])
-            port_str = ", ".join(
-                f"{p.get('PublicPort','?')}→{p.get('PrivatePort','?')}"
-                for p in ports_list if p.get("PublicPort")
-            ) or "—"
-            bot_meta = next((
-                {"id": bid, "color": b.get("color","#888"), "description": b.get("description","")}
-                for bid, b in BOTS.items() if b.get("host","") == name
-            ), None)
-            containers.append({
-                "name": name, "status": status, "ports": port_str,
-                "image": image, "running": running, "bot": bot_meta,
-            })
-        conn.close()
-    except Exception as e:
-        containers = [{"error": str(e)}]
+    # Until this worker's inventory and probes have synced once, serve the
+    # last saved containers and services rather than waiting on them
+    inventory, probes = _get_container_inventory(), _get_service_probes()
+    saved_at, saved = None, None
+    if not (inventory.ready() and probes.ready()):
+        saved_at, saved = _warm_snapshot("system").load()
+
+    # Docker containers — served from the event-driven inventory
+    error = None
+    if saved is not None:
+        containers = saved["containers"]
+    else:
+        listing, error = inventory.snapshot()
+        if error and not listing:
+            containers = [{"error": error}]
+        else:
+            by_host = _bots().by_host
+            containers = [dict(c, bot=by_host.get(c["name"])) for c in listing]
 
     # Cron jobs
     cron_jobs = [
@@ -650,18 +1336,15 @@ def api_system():
         {"schedule": "59 7 * * *",   "label": "Sports Scoring → Drive", "script": "sports-arb/sync_scoring_to_gdrive.sh","description": "Daily upload of sports scoring data to Google Drive (08:00 UTC)"},
     ]
 
-    # Infrastructure services — infer from what's reachable inside container
-    import socket as _socket
-    services = []
-    # Docker: active if we successfully talked to the socket above
-    services.append({"name": "docker", "active": not any("error" in c for c in containers)})
-    # nginx: try TCP connect to host port 80
-    try:
-        s = _socket.create_connection(("host.docker.internal", 80), timeout=2)
-        s.close()
-        services.append({"name": "nginx", "active": True})
-    except Exception:
-        services.append({"name": "nginx", "active": False})
+    # Infrastructure services — docker from the inventory, the rest probed
+    # in the background
+    if saved is not None:
+        services = saved["services"]
+    else:
+        services = [{"name": "docker", "active": error is None}]
+        services += [{"name": name, "active": up} for name, up in probes.results().items()]
+        if error is None:
+            _warm_snapshot("system").save({"containers": containers, "services": services})
 
     # Host resources
     mem_info = {}
@@ -688,51 +1371,118 @@ def api_system():
     except Exception:
         pass
 
-    return jsonify({
+    data = {
         "containers": containers,
         "cron_jobs":  cron_jobs,
         "services":   services,
         "resources":  {"mem_total_mb": total_mb, "mem_used_mb": used_mb, "mem_avail_mb": avail_mb, "disk": disk},
-    })
+    }
+    if saved is not None:
+        data["warm_start"] = warm_start.marker(saved_at)
+    return data
+
+
+@app.route("/api/system/history")
+@_auth_required
+def api_system_history():
+    """Per-container CPU/memory history for charting.
+
+    Query params: ``res`` (``5s`` = last hour, ``1m`` = last 24 h),
+    optional ``container`` (container name or bot id; default all bot
+    containers) and ``since`` (epoch seconds).  Each series is columnar:
+    ``{"start", "step", "cpu", "mem_mb", "mem_pct"}`` with None for gaps.
+    """
+    from container_telemetry import RESOLUTIONS
+    res = request.args.get("res", "5s")
+    if res not in RESOLUTIONS:
+        return jsonify({"error": f"res must be one of {', '.join(RESOLUTIONS)}"}), 400
+    names = None
+    container = request.args.get("container")
+    if container:
+        names = [_bots().container.get(container, container)]
+    since = request.args.get("since", type=float)
+    series = _get_container_telemetry().history(res, names, since)
+    return jsonify({"res": res, "series": series})
 
 
 # ---------------------------------------------------------------------------
-# SSH Terminal
+# Container logs
 # ---------------------------------------------------------------------------
 
-SSH_HOST = os.environ.get("SSH_HOST", BOT_HOST)
-SSH_PORT = int(os.environ.get("SSH_PORT", "22"))
-SSH_USER = os.environ.get("SSH_USER", "")
-SSH_PASSWORD = os.environ.get("SSH_PASSWORD", "")
-SSH_KEY_PATH = os.environ.get("SSH_KEY_PATH", "")
+LOG_KEEPALIVE = 15  # seconds between SSE comments on a quiet stream
 
-# Short-lived tokens for WebSocket authentication
-_ws_tokens = {}  # token -> expiry timestamp
-_ws_tokens_lock = threading.Lock()
 
+def _sse(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
 
-def _clean_expired_tokens():
-    now = time.time()
-    expired = [t for t, exp in _ws_tokens.items() if exp < now]
-    for t in expired:
-        _ws_tokens.pop(t, None)
 
+@app.route("/api/logs/<bot_id>/stream")
+@_auth_required
+def stream_bot_logs(bot_id):
+    """Stream a bot container's logs as SSE.
+
+    Query params: ``tail`` (backlog lines, default 100), ``since`` (UNIX
+    timestamp or age like ``15m``; replaces ``tail`` with a history fetch),
+    ``grep`` (case-insensitive regex) and ``level`` (minimum log level).
+    All viewers of a container share one upstream Docker stream.
+    """
+    snap = _bots()
+    if bot_id not in snap:
+        return jsonify({"error": f"Unknown bot: {bot_id}"}), 404
+    container = snap.container[bot_id]
+    try:
+        flt = container_logs.LogFilter(grep=request.args.get("grep"),
+                                       level=request.args.get("level"))
+        since = container_logs.parse_since(request.args.get("since"))
+    except (re.error, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    tail = max(0, min(request.args.get("tail", 100, type=int), container_logs.RECENT_LINES))
 
-def _issue_ws_token():
-    with _ws_tokens_lock:
-        _clean_expired_tokens()
-        token = secrets.token_urlsafe(32)
-        _ws_tokens[token] = time.time() + 600  # 10 min expiry
-        return token
+    def generate():
+        # With ?since, history covers up to the cutoff and the live stream after it
+        cutoff = time.time_ns() if since is not None else 0
+        sub = container_logs.subscribe(container, flt, tail=0 if since else tail,
+                                       after_ns=cutoff)
+        try:
+            if since is not None:
+                try:
+                    backlog = container_logs.history(container, flt, since, until_ns=cutoff)
+                except Exception as e:
+                    yield _sse({"error": str(e)}, event="error")
+                    backlog = []
+                for entry in backlog:
+                    yield _sse(container_logs.public(entry))
+            while True:
+                entries = sub.get(timeout=LOG_KEEPALIVE)
+                if entries is None:
+                    break
+                if not entries:
+                    yield ": keepalive\n\n"
+                    continue
+                dropped = sub.take_dropped()
+                if dropped:
+                    yield _sse({"count": dropped}, event="dropped")
+                for entry in entries:
+                    if "error" in entry:
+                        yield _sse(entry, event="error")
+                    else:
+                        yield _sse(container_logs.public(entry))
+        except GeneratorExit:
+            pass
+        finally:
+            sub.close()
 
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-def _validate_ws_token(token):
-    with _ws_tokens_lock:
-        exp = _ws_tokens.get(token)
-        if exp and exp > time.time():
-            return True
-        return False
 
+# ---------------------------------------------------------------------------
+# SSH Terminal
+# ---------------------------------------------------------------------------
 
 @app.route("/terminal")
 @_auth_required
@@ -754,180 +1504,128 @@ def terminal_token():
     return jsonify({"token": _issue_ws_token()})
 
 
+def _ws_error(ws, message, **extra):
+    ws.send(json.dumps(dict({"type": "status", "status": "error",
+                             "message": message}, **extra)))
+
+
 @sock.route("/terminal/ws")
 def terminal_ws(ws):
-    """WebSocket handler: relay between browser and SSH session."""
+    """WebSocket handler: attach the browser to a persistent SSH session.
+
+    The first message is either ``connect`` (open a new shell) or
+    ``attach`` (resume an existing session from a stream offset).  Both may
+    carry ``window`` (credit in bytes) and ``compress``; output is then
+    paced by the client's ``ack`` messages.  Closing the socket only
+    detaches; the shell keeps running until it exits, the client sends
+    ``close``, or the session idles out.
+
+    Behind the hub (hub.py) this route is not reached; the hub serves the
+    same protocol without holding a worker thread.
+    """
     # Validate token from query string
     token = request.args.get("token", "")
     if AUTH_ENABLED and not _validate_ws_token(token):
-        ws.send(json.dumps({"type": "status", "status": "error",
-                            "message": "Unauthorized — reload the page"}))
+        _ws_error(ws, "Unauthorized — reload the page")
         return
 
-    # Wait for connect message
+    # Wait for connect/attach message
     try:
         raw = ws.receive(timeout=30)
         if raw is None:
             return
         msg = json.loads(raw)
     except Exception:
-        ws.send(json.dumps({"type": "status", "status": "error",
-                            "message": "Invalid connect message"}))
+        _ws_error(ws, "Invalid connect message")
         return
 
-    if msg.get("type") != "connect":
-        ws.send(json.dumps({"type": "status", "status": "error",
-                            "message": "Expected connect message"}))
-        return
-
-    host = msg.get("host", SSH_HOST) or SSH_HOST
-    port = int(msg.get("port", SSH_PORT) or SSH_PORT)
-    username = msg.get("username", SSH_USER) or SSH_USER
-
-    # Determine auth method
-    password = None
-    pkey = None
-    if msg.get("use_default_auth"):
-        password = SSH_PASSWORD or None
-        if SSH_KEY_PATH and os.path.isfile(SSH_KEY_PATH):
-            try:
-                pkey = paramiko.RSAKey.from_private_key_file(SSH_KEY_PATH)
-            except Exception:
-                try:
-                    pkey = paramiko.Ed25519Key.from_private_key_file(SSH_KEY_PATH)
-                except Exception:
-                    pass
+    if msg.get("type") == "attach":
+        session = terminal_sessions.get_session(msg.get("session_id"))
+        if session is None:
+            _ws_error(ws, "Session expired", code="session_not_found")
+            return
+        offset = msg.get("offset")
+        offset = session.acked if offset is None else int(offset)
+    elif msg.get("type") == "connect":
+        try:
+            client, channel, label = open_shell(msg)
+        except ValueError as e:
+            _ws_error(ws, str(e))
+            return
+        session = terminal_sessions.open_session(client, channel, label,
+                                                 flow=msg.get("flow", "drop"))
+        offset = 0
     else:
-        password = msg.get("password") or None
-
-    if not username:
-        ws.send(json.dumps({"type": "status", "status": "error",
-                            "message": "Username is required"}))
-        return
-
-    # Establish SSH connection
-    client = paramiko.SSHClient()
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    try:
-        connect_kwargs = {
-            "hostname": host,
-            "port": port,
-            "username": username,
-            "timeout": 10,
-            "allow_agent": False,
-            "look_for_keys": False,
-        }
-        if pkey:
-            connect_kwargs["pkey"] = pkey
-        elif password:
-            connect_kwargs["password"] = password
-        else:
-            connect_kwargs["look_for_keys"] = True
-            connect_kwargs["allow_agent"] = True
-        client.connect(**connect_kwargs)
-    except paramiko.AuthenticationException:
-        ws.send(json.dumps({"type": "status", "status": "error",
-                            "message": "Authentication failed — check credentials"}))
-        client.close()
-        return
-    except Exception as e:
-        ws.send(json.dumps({"type": "status", "status": "error",
-                            "message": f"SSH connection failed: {e}"}))
-        client.close()
-        return
-
-    # Open interactive shell
-    try:
-        channel = client.invoke_shell(
-            term="xterm-256color",
-            width=80,
-            height=24,
-        )
-        channel.settimeout(0.1)
-    except Exception as e:
-        ws.send(json.dumps({"type": "status", "status": "error",
-                            "message": f"Failed to open shell: {e}"}))
-        client.close()
+        _ws_error(ws, "Expected connect message")
         return
 
-    ws.send(json.dumps({"type": "status", "status": "connected",
-                        "message": f"Connected to {username}@{host}"}))
-
-    # SSH -> WebSocket reader thread
-    stop_event = threading.Event()
-
-    def ssh_reader():
-        try:
-            while not stop_event.is_set():
-                if channel.recv_ready():
-                    data = channel.recv(4096)
-                    if not data:
-                        break
-                    try:
-                        ws.send(json.dumps({
-                            "type": "output",
-                            "data": data.decode("utf-8", errors="replace"),
-                        }))
-                    except Exception:
-                        break
-                elif channel.closed:
-                    break
-                else:
-                    time.sleep(0.02)
-        except Exception:
-            pass
-        finally:
-            try:
-                ws.send(json.dumps({"type": "status", "status": "disconnected"}))
-            except Exception:
-                pass
-
-    reader = threading.Thread(target=ssh_reader, daemon=True)
-    reader.start()
+    session.attach(ws.send, offset, {"type": "status", "status": "connected",
+                                     "message": f"Connected to {session.label}"},
+                   window=msg.get("window"), compress=msg.get("compress", False))
 
     # WebSocket -> SSH writer loop (runs in this thread)
+    close_session = False
     try:
-        while not stop_event.is_set():
+        while not session.closed:
             raw = ws.receive(timeout=1)
             if raw is None:
-                break
+                continue
             try:
                 msg = json.loads(raw)
             except Exception:
                 continue
             if msg.get("type") == "input":
                 data = msg.get("data", "")
-                if data and not channel.closed:
-                    channel.sendall(data.encode("utf-8"))
+                if data:
+                    session.write(data.encode("utf-8"))
             elif msg.get("type") == "resize":
-                cols = int(msg.get("cols", 80))
-                rows = int(msg.get("rows", 24))
-                if not channel.closed:
-                    channel.resize_pty(width=cols, height=rows)
+                session.resize(int(msg.get("cols", 80)), int(msg.get("rows", 24)))
+            elif msg.get("type") == "ack":
+                session.ack(msg.get("offset", 0))
+            elif msg.get("type") == "close":
+                close_session = True
+                break
     except Exception:
         pass
     finally:
-        stop_event.set()
-        try:
-            channel.close()
-        except Exception:
-            pass
-        try:
-            client.close()
-        except Exception:
-            pass
-        reader.join(timeout=2)
+        session.detach(ws.send)
+        if close_session:
+            session.close()
 
 
 # ---------------------------------------------------------------------------
 # Index
 # ---------------------------------------------------------------------------
 
+_assets = AssetManifest()
+app.jinja_env.globals["asset_url"] = _assets.url
+
+_portal_page = (None, "")  # (registry version, rendered shell)
+
+
+@app.route("/assets/<name>")
+@_auth_required
+def static_asset(name):
+    """Fingerprinted JS/CSS; the URL changes with the content, so cache forever."""
+    asset = _assets.get(name)
+    if asset is None:
+        return jsonify({"error": "Unknown asset"}), 404
+    body, mimetype = asset
+    return Response(body, mimetype=mimetype, headers={"Cache-Control": IMMUTABLE})
+
+
 @app.route("/")
 @_auth_required
 def index():
-    from config import BOT_CATEGORIES
-    return render_template("portal.html", bots=BOTS, categories=BOT_CATEGORIES)
+    """Portal shell — rendered once per registry version; JS/CSS live in /assets."""
+    global _portal_page
+    snap = _bots()
+    version, html = _portal_page
+    if version != snap.version:
+        from config import BOT_CATEGORIES
+        html = render_template("portal.html", bots=snap.bots, categories=BOT_CATEGORIES)
+        _portal_page = (snap.version, html)
+    return Response(html, mimetype="text/html", headers={"Cache-Control": "no-cache"})
 
 
 # ---------------------------------------------------------------------------
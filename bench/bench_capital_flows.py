@@ -0,0 +1,119 @@
+"""Benchmark capital-flow queries — rollups vs scanning the transfer log.
+
+Builds a capital store whose log holds ``--transfers`` entries spread over
+``--days`` days between the configured bots and ``unallocated``, then
+answers two questions both ways:
+
+* "how much moved into <bot> this month" (one month bucket);
+* "net flow per bot per day over the last 30 days" (30 day buckets).
+
+``scan`` reads capital.json and walks every transfer, as answering this
+required before; ``rollups`` is ``CapitalStore.get_flows``.  Also checks
+that both agree and that the incrementally maintained rollups match a
+rebuild, and times one ``transfer`` and its rollup update.
+
+    python bench/bench_capital_flows.py [--transfers 100000] [--days 730]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capital_rollups  # noqa: E402
+from config import BOTS  # noqa: E402
+from subaccount_store import CapitalStore  # noqa: E402
+
+
+def make_log(n, days, now):
+    accounts = sorted(BOTS) + ["unallocated"]
+    start = now - timedelta(days=days)
+    step = timedelta(days=days) / n
+    log = []
+    for i in range(n):
+        src, dst = random.sample(accounts, 2)
+        log.append({"from": src, "to": dst, "amount": random.randint(100, 100000),
+                    "ts": (start + step * i).isoformat()})
+    return log
+
+
+def scan(path, start, end, account=None):
+    """The pre-rollup answer: parse the ledger and walk every transfer."""
+    with open(path) as f:
+        transfers = json.load(f)["transfers"]
+    lo, hi = start.isoformat(), end.isoformat()
+    flows = {}
+    for t in transfers:
+        day = t["ts"][:10]
+        if not lo <= day <= hi:
+            continue
+        for name, key in ((t["from"], "out"), (t["to"], "in")):
+            if account is None or name == account:
+                f = flows.setdefault(name, {"in": 0, "out": 0})
+                f[key] += t["amount"]
+    return {name: dict(f, net=f["in"] - f["out"]) for name, f in flows.items()}
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1e3, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transfers", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=730)
+    args = parser.parse_args()
+    random.seed(1)
+    now = datetime.now(timezone.utc)
+    today = now.date()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "capital.json")
+        store = CapitalStore(path)
+        log = make_log(args.transfers, args.days, now)
+        data = store._read()
+        data["accounts"] = {bot_id: {"label": bot_id, "allocation": 10 ** 9} for bot_id in BOTS}
+        # Feed the log through the incremental path in chunks, as writes would
+        for i in range(0, len(log), 1000):
+            data["transfers"] = log[:i + 1000]
+            store._commit(data, len(data["transfers"]) - i)
+        incremental = json.load(open(store.rollups.path))
+        rebuilt = store.rebuild_rollups()
+        assert incremental == rebuilt, "incremental rollups differ from a rebuild"
+
+        bot = sorted(BOTS)[0]
+        month = capital_rollups.parse_range("month", today.strftime("%Y-%m"),
+                                            today.strftime("%Y-%m"))
+        last30 = capital_rollups.parse_range("day", today=today)
+        print(f"{args.transfers} transfers over {args.days} days, "
+              f"capital.json {os.path.getsize(path) / 1e6:.1f} MB, "
+              f"rollups {os.path.getsize(store.rollups.path) / 1e3:.0f} kB")
+        for label, (start, end), granularity, account in (
+                (f"into {bot} this month", month, "month", bot),
+                ("net per bot per day, 30 days", last30, "day", None)):
+            scan_ms, expected = timed(lambda: scan(path, start, end, account))
+            roll_ms, flows = timed(lambda: store.get_flows(start, end, granularity, account))
+            assert flows["totals"] == expected, (flows["totals"], expected)
+            print(f"  {label:30s} scan {scan_ms:8.2f} ms   rollups {roll_ms:6.2f} ms  "
+                  f"({len(flows['buckets'])} buckets)")
+
+        src, dst = sorted(BOTS)[:2]
+        transfer_ms, _ = timed(lambda: store.transfer(src, dst, 100), repeat=3)
+        transfers = store._read()["transfers"]
+        update_ms, _ = timed(lambda: store.rollups.update(transfers, 0))
+        print(f"  one transfer: {transfer_ms:.1f} ms, of which the rollup update {update_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark /api/capital served from the reconciled view vs live joins.
+
+The Kalshi client and the bot fetch cycle are stubbed with fixed latencies
+(``--kalshi-ms``, ``--bots-ms``, the fetch cycle expiring between
+requests as it does for a page polled every 10 s).  ``live`` does what
+``/api/capital`` did per request: Kalshi balance, bot P&L and ledger,
+joined on the spot.  ``view`` is the endpoint now, reading what
+``CapitalReconciler.run_once`` last published.
+
+    python bench/bench_capital_view.py [--requests 50] [--kalshi-ms 250]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from capital_reconciler import CapitalReconciler, build_view  # noqa: E402
+from subaccount_store import CapitalStore  # noqa: E402
+
+
+class SlowKalshi:
+    def __init__(self, ms):
+        self.delay = ms / 1e3
+
+    def get_balance(self):
+        time.sleep(self.delay)
+        return 1_000_000
+
+    def get_positions(self):
+        time.sleep(self.delay)
+        return [{"ticker": "KXBTC", "market_exposure": 12_500}]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--kalshi-ms", type=float, default=250)
+    parser.add_argument("--bots-ms", type=float, default=150)
+    args = parser.parse_args()
+
+    kalshi = SlowKalshi(args.kalshi_ms)
+
+    def bot_pnl():
+        time.sleep(args.bots_ms / 1e3)
+        return {bot_id: 12.5 for bot_id in app._bots().bots}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CapitalStore(os.path.join(tmp, "capital.json"))
+        for bot_id, cfg in app._bots().bots.items():
+            store.allocate(bot_id, cfg["name"], 50_000)
+        app._capital_store = store
+        app._reconciler = CapitalReconciler(store, bot_pnl, lambda: kalshi, data_dir=tmp)
+        app._reconciler.run_once()
+        client = app.app.test_client()
+
+        def live():
+            accounts, _ = store.get_ledger()
+            inputs = {"balance": kalshi.get_balance(),
+                      "pnl": {b: int(round(p * 100)) for b, p in bot_pnl().items()}}
+            return build_view(accounts, inputs, None)
+
+        rows = []
+        for label, call in (("live", live), ("view", lambda: client.get("/api/capital"))):
+            samples = []
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                call()
+                samples.append((time.perf_counter() - started) * 1e3)
+            samples.sort()
+            rows.append((label, statistics.median(samples), samples[int(len(samples) * 0.95)]))
+        print(f"/api/capital, Kalshi {args.kalshi_ms:.0f} ms, bot fetch cycle {args.bots_ms:.0f} ms")
+        for label, p50, p95 in rows:
+            print(f"  {label:5s} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms")
+        started = time.perf_counter()
+        app._reconciler.run_once()
+        print(f"  one background reconciliation (balance + positions + P&L): "
+              f"{(time.perf_counter() - started) * 1e3:.0f} ms every "
+              f"{app.RECONCILE_INTERVAL} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark response compression and ETag revalidation — bytes per client-hour.
+
+Simulates one mobile client for an hour: ``/api/overview`` every 5 s,
+``/api/capital`` every 10 s and a portal page load every 10 min, against
+the real Flask app with the bot fetch plan stubbed out.  Bot P&L changes
+every ``--change-every`` seconds; in between, polls return the same body.
+Capital is reconciled every ``RECONCILE_INTERVAL`` seconds, as in the app.
+
+    python bench/bench_http_cache.py [--change-every 30]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import http_cache  # noqa: E402
+from capital_reconciler import CapitalReconciler  # noqa: E402
+from extractors import BotRecord  # noqa: E402
+from subaccount_store import CapitalStore  # noqa: E402
+
+HOUR = 3600
+SCHEDULE = (("/api/overview", 5), ("/api/capital", 10), ("/", 600))
+
+
+class StubPlan:
+    """Stands in for FetchPlan; P&L drifts when ``tick`` says so."""
+
+    def __init__(self, bots):
+        self.pnl = {bot_id: round(random.uniform(-50, 50), 2) for bot_id in bots}
+
+    def tick(self):
+        for bot_id in self.pnl:
+            self.pnl[bot_id] = round(self.pnl[bot_id] + random.uniform(-2, 2), 2)
+
+    def collect(self, snapshot):
+        return {bot_id: BotRecord(healthy=True, mode="PAPER", running=True, pnl=self.pnl[bot_id],
+                                  win_rate=55.0, completed=120, wins=66)
+                for bot_id in snapshot.bots}
+
+    def collect_warm(self, snapshot):
+        return self.collect(snapshot), None
+
+
+def run(mode, change_every, seed=1):
+    """Total response body bytes for one simulated client-hour."""
+    random.seed(seed)
+    plan = StubPlan(app._bots().bots)
+    app._get_fetch_plan = lambda: plan
+    client = app.app.test_client()
+    etags = {}
+    total = requests = not_modified = 0
+    for t in range(0, HOUR, 5):
+        if t and t % change_every == 0:
+            plan.tick()
+        if t % app.RECONCILE_INTERVAL == 0:
+            app._get_reconciler().run_once()
+        for path, every in SCHEDULE:
+            if t % every:
+                continue
+            headers = {}
+            if mode != "identity":
+                headers["Accept-Encoding"] = "gzip" if mode == "gzip" else "br, gzip"
+            if mode == "br+etag" and path in etags:
+                headers["If-None-Match"] = etags[path]
+            resp = client.get(path, headers=headers)
+            etags[path] = resp.headers.get("ETag")
+            total += len(resp.data)
+            requests += 1
+            not_modified += resp.status_code == 304
+    return total, requests, not_modified
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--change-every", type=int, default=30,
+                        help="seconds between P&L changes (multiple of 5)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CapitalStore(os.path.join(tmp, "capital.json"))
+        for bot_id, cfg in app._bots().bots.items():
+            store.allocate(bot_id, cfg["name"], 50000)
+        app._capital_store = store
+        app._reconciler = CapitalReconciler(store, app._get_bot_pnl, data_dir=tmp,
+                                            interval=app.RECONCILE_INTERVAL)
+
+        print(f"One client-hour, P&L changing every {args.change_every} s "
+              f"(brotli {'available' if http_cache.brotli else 'missing'})")
+        base = None
+        for mode in ("identity", "gzip", "br", "br+etag"):
+            if mode.startswith("br") and not http_cache.brotli:
+                continue
+            started = time.perf_counter()
+            total, requests, not_modified = run(mode, args.change_every)
+            elapsed = time.perf_counter() - started
+            base = base or total
+            print(f"  {mode:9s} {total / 1024:9.1f} KiB  ({total / base:6.1%} of identity)  "
+                  f"{requests} requests, {not_modified} x 304, "
+                  f"{elapsed / requests * 1e3:.2f} ms/request server time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Benchmark the asyncio hub — idle connection cost and /api/overview latency.
+
+Starts gunicorn (2 workers x 8 threads, as in entrypoint.sh) and hub.py as
+subprocesses, with every bot pointed at an in-process fake bot whose P&L
+changes on each poll, so the hub pushes a fresh overview to every
+subscriber once per ``--interval``.  Then:
+
+1. measures ``/api/overview`` latency through the hub with no idle load;
+2. opens ``--push`` idle ``/api/overview/stream`` subscribers and
+   ``--terminals`` idle SSH terminals (against an in-process paramiko
+   server) and measures again;
+3. reports the hub's RSS and thread count before and after.
+
+    python bench/bench_hub.py [--push 1000] [--terminals 20] [--requests 200]
+
+Each terminal still costs one paramiko transport thread in the hub; push
+connections cost none.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+import paramiko
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import BOTS  # noqa: E402
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeBot(BaseHTTPRequestHandler):
+    """Answers every health/status endpoint with drifting P&L."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        pnl = round(random.uniform(-50, 50), 2)
+        body = json.dumps({
+            "running": True, "mode": "paper", "status": "healthy", "bot_running": True,
+            "summary": {"total_pnl": pnl, "settled": 10, "wins": 6, "win_rate": 0.6, "open": 1},
+            "pnl_summary": {"total_pnl": pnl, "win_rate": 0.6, "completed": 10, "wins": 6},
+            "paper_trading": {"realized_pnl": 100, "current_balance": 10000 + pnl * 100,
+                              "starting_balance": 10000},
+            "bot_status": {"dry_run": True, "status": "ok"},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _AcceptAll(paramiko.ServerInterface):
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_channel_pty_request(self, *args):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        return True
+
+
+def start_ssh_server(port):
+    """Idle shells: print a prompt, then wait for input until closed."""
+    key = paramiko.RSAKey.generate(2048)
+    listener = socket.socket()
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("127.0.0.1", port))
+    listener.listen(512)
+
+    def serve(conn):
+        transport = paramiko.Transport(conn)
+        transport.add_server_key(key)
+        transport.start_server(server=_AcceptAll())
+        channel = transport.accept(30)
+        if channel is not None:
+            channel.sendall(b"$ ")
+            while channel.recv(1024):
+                pass
+        transport.close()
+
+    def accept():
+        while True:
+            conn, _ = listener.accept()
+            threading.Thread(target=serve, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+
+
+def proc_status(pid):
+    fields = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            fields[key] = value.strip()
+    return int(fields["VmRSS"].split()[0]), int(fields["Threads"])
+
+
+async def measure_overview(session, base, n):
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        async with session.get(base + "/api/overview") as r:
+            await r.read()
+            assert r.status == 200, r.status
+        samples.append((time.perf_counter() - started) * 1e3)
+        await asyncio.sleep(0.01)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+async def hold_push(session, base, received):
+    async with session.get(base + "/api/overview/stream") as r:
+        async for line in r.content:
+            if line.startswith(b"data: "):
+                received[0] += 1
+
+
+async def hold_terminal(session, base, ssh_port, ready):
+    async with session.ws_connect(base + "/terminal/ws") as ws:
+        await ws.send_str(json.dumps({"type": "connect", "host": "127.0.0.1", "port": ssh_port,
+                                      "username": "bench", "password": "bench"}))
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT and '"connected"' in msg.data:
+                ready[0] += 1
+            elif msg.type == aiohttp.WSMsgType.BINARY:
+                await ws.send_str(json.dumps({"type": "ack", "offset": 2}))
+
+
+async def run(args, base, hub_pid, ssh_port):
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await measure_overview(session, base, 20)  # warm up the fetch plan and pools
+        rss0, threads0 = proc_status(hub_pid)
+        p50, p99 = await measure_overview(session, base, args.requests)
+        print(f"idle hub        rss {rss0 / 1024:7.1f} MiB  threads {threads0:3d}  "
+              f"/api/overview p50 {p50:6.2f} ms  p99 {p99:6.2f} ms")
+
+        received, ready = [0], [0]
+        tasks = [asyncio.ensure_future(hold_push(session, base, received))
+                 for _ in range(args.push)]
+        tasks += [asyncio.ensure_future(hold_terminal(session, base, ssh_port, ready))
+                  for _ in range(args.terminals)]
+        deadline = time.time() + 60
+        while (received[0] < args.push or ready[0] < args.terminals) and time.time() < deadline:
+            await asyncio.sleep(0.5)
+        await asyncio.sleep(args.interval * 2)  # let a couple of fan-out rounds pass
+
+        rss1, threads1 = proc_status(hub_pid)
+        p50, p99 = await measure_overview(session, base, args.requests)
+        conns = args.push + args.terminals
+        print(f"{conns:5d} held      rss {rss1 / 1024:7.1f} MiB  threads {threads1:3d}  "
+              f"/api/overview p50 {p50:6.2f} ms  p99 {p99:6.2f} ms")
+        per_conn = (rss1 - rss0) / max(1, conns)
+        print(f"  {args.push} push subscribers ({received[0]} overview pushes delivered), "
+              f"{ready[0]}/{args.terminals} terminals connected")
+        print(f"  ~{per_conn:.1f} KiB RSS per connection, "
+              f"{threads1 - threads0} extra threads (paramiko transports: {args.terminals})")
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--push", type=int, default=1000, help="idle overview SSE subscribers")
+    parser.add_argument("--terminals", type=int, default=20, help="idle SSH terminals")
+    parser.add_argument("--requests", type=int, default=200, help="latency samples per phase")
+    parser.add_argument("--interval", type=int, default=1, help="hub overview poll interval (s)")
+    args = parser.parse_args()
+
+    fake_bots = {}
+    for bot_id in BOTS:
+        server = fake_bots[bot_id] = ThreadingHTTPServer(("127.0.0.1", 0), FakeBot)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    ssh_port = _free_port()
+    start_ssh_server(ssh_port)
+
+    upstream_port, hub_port = _free_port(), _free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        bots_file = os.path.join(tmp, "bots.json")
+        with open(bots_file, "w") as f:
+            json.dump({bot_id: dict(cfg, host="127.0.0.1", port=fake_bots[bot_id].server_address[1],
+                                    auth=None)
+                       for bot_id, cfg in BOTS.items()}, f)
+        env = dict(os.environ, BOTS_FILE=bots_file, PORTAL_USER="", PORTAL_PASS="",
+                   HUB_PORT=str(hub_port), HUB_HOST="127.0.0.1",
+                   HUB_UPSTREAM=f"http://127.0.0.1:{upstream_port}",
+                   HUB_OVERVIEW_INTERVAL=str(args.interval))
+        procs = [
+            subprocess.Popen(["gunicorn", "app:app", "--bind", f"127.0.0.1:{upstream_port}",
+                              "--worker-class", "gthread", "--workers", "2", "--threads", "8",
+                              "--log-level", "warning"],
+                             cwd=ROOT, env=env),
+            subprocess.Popen([sys.executable, "hub.py"], cwd=ROOT, env=env,
+                             stdout=subprocess.DEVNULL),
+        ]
+        try:
+            for port in (upstream_port, hub_port):
+                for _ in range(100):
+                    try:
+                        socket.create_connection(("127.0.0.1", port), 0.2).close()
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+            print(f"gunicorn 2x8 gthread behind hub.py; {args.push} push + "
+                  f"{args.terminals} terminal connections, overview pushed every {args.interval} s")
+            asyncio.run(run(args, f"http://127.0.0.1:{hub_port}", procs[1].pid, ssh_port))
+        finally:
+            for p in reversed(procs):
+                p.terminate()
+                p.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark adaptive timeouts and hedged reads — overview fetch-cycle latency.
+
+Points every bot at an in-process fake bot and runs back-to-back fetch
+cycles (``FetchPlan.collect`` with no result sharing), first with the old
+fixed ``PROXY_TIMEOUT`` and then through ``app._fetch_bot_json`` (adaptive
+timeouts, hedged once past the p95).  Two scenarios:
+
+* ``stalls``: every bot answers in ~20 ms, except that ``--stall-rate`` of
+  requests stall for ``--stall`` seconds (GC pause, event-loop hiccup);
+* ``slow bot``: as above, plus one bot whose status call takes
+  ``--slow`` seconds, longer than the fixed 5 s timeout.
+
+    python bench/bench_latency.py [--cycles 300] [--stall-rate 0.01]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import BOTS  # noqa: E402
+
+SETTINGS = {"stall_rate": 0.0, "stall": 0.0, "slow_port": None, "slow": 0.0}
+
+
+class FakeBot(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.server.server_address[1] == SETTINGS["slow_port"]:
+            time.sleep(SETTINGS["slow"])
+        elif random.random() < SETTINGS["stall_rate"]:
+            time.sleep(SETTINGS["stall"])
+        else:
+            time.sleep(random.uniform(0.015, 0.025))
+        body = json.dumps({
+            "running": True, "mode": "paper", "status": "healthy", "bot_running": True,
+            "summary": {"total_pnl": 1.0, "settled": 10, "wins": 6, "win_rate": 0.6, "open": 1},
+            "pnl_summary": {"total_pnl": 1.0, "win_rate": 0.6, "completed": 10, "wins": 6},
+            "paper_trading": {"realized_pnl": 100, "current_balance": 10000,
+                              "starting_balance": 10000},
+            "bot_status": {"dry_run": True, "status": "ok"},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # a hedged or timed-out request's connection was dropped
+
+
+def run_cycles(fetch, cycles):
+    import app
+    from extractors import FetchPlan
+
+    plan = FetchPlan(fetch, max_age=0)
+    snap = app._bots()
+    samples, unreachable = [], 0
+    for _ in range(cycles):
+        started = time.perf_counter()
+        records = plan.collect(snap)
+        samples.append((time.perf_counter() - started) * 1e3)
+        unreachable += sum(1 for r in records.values() if r.error)
+    samples.sort()
+    return (statistics.median(samples), samples[int(len(samples) * 0.99) - 1],
+            samples[-1], unreachable / cycles)
+
+
+def compare(name, cycles):
+    import app
+    from latency import LatencyTracker
+
+    def fixed(bot_id, path):
+        resp = app._bot_session(bot_id).get(app._bot_base(bot_id) + path,
+                                            auth=app._bot_auth(bot_id), timeout=app.PROXY_TIMEOUT)
+        resp.raise_for_status()
+        return resp.json()
+
+    print(name)
+    for label, fetch in (("fixed 5 s", fixed), ("adaptive", app._fetch_bot_json)):
+        app._latency = LatencyTracker()
+        p50, p99, worst, down = run_cycles(fetch, cycles)
+        print(f"  {label:10s} cycle p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  max {worst:7.1f} ms  "
+              f"unreachable bots/cycle {down:.2f}")
+    for bot_id, classes in sorted(app._latency.stats().items()):
+        for cls, s in classes.items():
+            print(f"    {bot_id:14s} {cls:22s} p95 {s['p95'] * 1e3:7.1f} ms  "
+                  f"timeout {s.get('timeout', 0):6.2f} s  hedged {s['hedged']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cycles", type=int, default=300)
+    parser.add_argument("--stall-rate", type=float, default=0.01)
+    parser.add_argument("--stall", type=float, default=1.0, help="stall length (s)")
+    parser.add_argument("--slow", type=float, default=6.0, help="slow bot's latency (s)")
+    args = parser.parse_args()
+    logging.getLogger("extractors").setLevel(logging.CRITICAL)
+
+    servers = {}
+    for bot_id in BOTS:
+        server = servers[bot_id] = QuietServer(("127.0.0.1", 0), FakeBot)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bots_file = os.path.join(tmp, "bots.json")
+        with open(bots_file, "w") as f:
+            json.dump({bot_id: dict(cfg, host="127.0.0.1", port=servers[bot_id].server_address[1],
+                                    auth=None)
+                       for bot_id, cfg in BOTS.items()}, f)
+        os.environ["BOTS_FILE"] = bots_file
+
+        SETTINGS.update(stall_rate=args.stall_rate, stall=args.stall)
+        compare(f"stalls: {args.stall_rate:.0%} of requests stall {args.stall} s", args.cycles)
+
+        slow_bot = sorted(BOTS)[-1]
+        SETTINGS.update(slow_port=servers[slow_bot].server_address[1], slow=args.slow)
+        compare(f"slow bot: {slow_bot} answers in {args.slow} s", max(25, args.cycles // 10))
+
+
+if __name__ == "__main__":
+    main()
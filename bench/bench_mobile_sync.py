@@ -0,0 +1,176 @@
+"""Benchmark /api/mobile/sync against the iOS app's current polling — bytes and requests per hour.
+
+Simulates one phone for an hour against the real Flask app with the bot
+fetch plan stubbed out:
+
+* ``legacy``: ``/api/overview`` every 8 s (OverviewView) plus
+  ``/api/capital`` and ``/api/capital/transfers`` every 10 s (CapitalView),
+  optionally revalidating with ETags;
+* ``sync``: one ``/api/mobile/sync`` for everything the app shows (no
+  mask), polling again after the server's ``next_poll`` hint;
+* ``sync masked``: a widget-style poll of ``WIDGET_FIELDS`` only.
+
+Every ``--change-every`` seconds each bot's P&L moves with probability
+``--active``; a transfer is logged every 10 minutes, and capital is
+reconciled every ``RECONCILE_INTERVAL`` seconds.  All requests accept
+br/gzip, as URLSession does.
+
+    python bench/bench_mobile_sync.py [--change-every 10] [--active 0.3]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import http_cache  # noqa: E402
+import mobile_sync  # noqa: E402
+from capital_reconciler import CapitalReconciler  # noqa: E402
+from extractors import BotRecord  # noqa: E402
+from subaccount_store import CapitalStore  # noqa: E402
+
+HOUR = 3600
+TRANSFER_EVERY = 600
+WIDGET_FIELDS = "bots(pnl,healthy),totals(total_pnl)"
+LEGACY = (("/api/overview", 8), ("/api/capital", 10), ("/api/capital/transfers?limit=20", 10))
+HEADERS = {"Accept-Encoding": "br, gzip"}
+
+
+class StubPlan:
+    """Stands in for FetchPlan; each tick moves a random subset of bots."""
+
+    def __init__(self, bots, active):
+        self.active = active
+        self.pnl = {bot_id: round(random.uniform(-50, 50), 2) for bot_id in bots}
+
+    def tick(self):
+        for bot_id in self.pnl:
+            if random.random() < self.active:
+                self.pnl[bot_id] = round(self.pnl[bot_id] + random.uniform(-2, 2), 2)
+
+    def collect(self, snapshot):
+        return {bot_id: BotRecord(healthy=True, mode="PAPER", running=True, pnl=self.pnl[bot_id],
+                                  win_rate=55.0, completed=120, wins=66)
+                for bot_id in snapshot.bots}
+
+    def collect_warm(self, snapshot):
+        return self.collect(snapshot), None
+
+
+def setup(tmp, active, seed):
+    random.seed(seed)
+    bots = app._bots().bots
+    store = CapitalStore(os.path.join(tmp, f"capital-{seed}-{random.random()}.json"))
+    for bot_id, cfg in bots.items():
+        store.allocate(bot_id, cfg["name"], 50000)
+    app._capital_store = store
+    plan = StubPlan(bots, active)
+    app._get_fetch_plan = lambda: plan
+    app._reconciler = CapitalReconciler(store, app._get_bot_pnl,
+                                        data_dir=tempfile.mkdtemp(dir=tmp),
+                                        interval=app.RECONCILE_INTERVAL)
+    return plan, store, sorted(bots)
+
+
+def world(t, plan, store, bot_ids, change_every):
+    if t and t % change_every == 0:
+        plan.tick()
+    if t and t % TRANSFER_EVERY == 0:
+        src, dst = random.sample(bot_ids, 2)
+        store.transfer(src, dst, 100)
+        app._capital_changed()
+    if t % app.RECONCILE_INTERVAL == 0:
+        app._get_reconciler().run_once()
+
+
+def run_legacy(tmp, args, etag):
+    plan, store, bot_ids = setup(tmp, args.active, args.seed)
+    client = app.app.test_client()
+    etags, total, requests = {}, 0, 0
+    for t in range(HOUR):
+        world(t, plan, store, bot_ids, args.change_every)
+        for path, every in LEGACY:
+            if t % every:
+                continue
+            headers = dict(HEADERS)
+            if etag and path in etags:
+                headers["If-None-Match"] = etags[path]
+            resp = client.get(path, headers=headers)
+            etags[path] = resp.headers.get("ETag")
+            total += len(resp.data) + len(path)
+            requests += 1
+    return total, requests
+
+
+def _decode(resp):
+    encoding = resp.headers.get("Content-Encoding")
+    if encoding == "br":
+        return http_cache.brotli.decompress(resp.data)
+    if encoding == "gzip":
+        return gzip.decompress(resp.data)
+    return resp.data
+
+
+class SimClock:
+    """Simulated ``time`` for mobile_sync's poll back-off."""
+
+    def __init__(self):
+        self.now = 1_700_000_000
+
+    def time(self):
+        return self.now
+
+
+def run_sync(tmp, args, fields=None):
+    plan, store, bot_ids = setup(tmp, args.active, args.seed)
+    client = app.app.test_client()
+    clock = mobile_sync.time = SimClock()
+    token, next_at, total, requests = "", 0, 0, 0
+    for t in range(HOUR):
+        clock.now += 1
+        world(t, plan, store, bot_ids, args.change_every)
+        if t < next_at:
+            continue
+        query = {"since": token} if token else {}
+        if fields:
+            query["fields"] = fields
+        resp = client.get("/api/mobile/sync", query_string=query, headers=HEADERS)
+        body = json.loads(_decode(resp))
+        token = body.get("token", token)
+        next_at = t + body["next_poll"]
+        total += len(resp.data) + len(resp.request.full_path)
+        requests += 1
+    return total, requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--change-every", type=int, default=10,
+                        help="seconds between P&L ticks")
+    parser.add_argument("--active", type=float, default=0.3,
+                        help="chance each bot's P&L moves on a tick")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"One phone-hour: P&L ticks every {args.change_every} s, "
+              f"{args.active:.0%} of bots move per tick, a transfer every {TRANSFER_EVERY // 60} min")
+        rows = [("legacy", run_legacy(tmp, args, etag=False)),
+                ("legacy+etag", run_legacy(tmp, args, etag=True)),
+                ("sync", run_sync(tmp, args)),
+                ("sync masked", run_sync(tmp, args, WIDGET_FIELDS))]
+        base = rows[0][1][0]
+        for name, (total, requests) in rows:
+            print(f"  {name:12s} {total / 1024:8.1f} KiB  ({total / base:6.1%})  "
+                  f"{requests:5d} requests/hour")
+        print("  (bytes are response bodies plus request paths; headers excluded)")
+
+
+if __name__ == "__main__":
+    main()
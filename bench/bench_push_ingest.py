@@ -0,0 +1,182 @@
+"""Benchmark push ingestion against polling — load on the bots and freshness.
+
+Runs the portal in-process (werkzeug, threaded) with every bot pointed at
+an in-process fake bot whose P&L moves every ``--tick`` seconds, and reads
+``/api/overview`` once a second as the portal page does:
+
+* ``pull``: bots are only polled through the fetch cycle;
+* ``push``: each bot also runs a ``push_client.StatusPusher`` reporting
+  every P&L change;
+* ``quiet``: one bot's pusher stops; the bench waits for the portal to
+  fall back to polling it (``STALE_AFTER``).
+
+Reports GETs per bot per minute, push requests per bot per minute and how
+old the P&L shown in the overview was (time since the bot changed it).
+
+    python bench/bench_push_ingest.py [--seconds 60] [--tick 0.5]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import BOTS  # noqa: E402
+
+AUTH = ("bench", "bench")
+
+
+class FakeBot(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.gets += 1
+        pnl = self.server.pnl
+        body = json.dumps({
+            "running": True, "mode": "paper", "status": "healthy", "bot_running": True,
+            "summary": {"total_pnl": pnl, "settled": 10, "wins": 6, "win_rate": 0.6, "open": 1},
+            "pnl_summary": {"total_pnl": pnl, "win_rate": 0.6, "completed": 10, "wins": 6},
+            "paper_trading": {"realized_pnl": 100, "current_balance": 10000 + pnl * 100,
+                              "starting_balance": 10000},
+            "bot_status": {"dry_run": True, "status": "ok"},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def drift(servers, pushers, tick, stop):
+    """Move each bot's P&L every ``tick`` seconds, remembering when each value was set."""
+    while not stop.wait(tick):
+        for bot_id, server in servers.items():
+            pnl = round(server.pnl + random.choice((-1, 1)) * random.uniform(0.5, 2), 2)
+            server.pnl = pnl
+            server.set_at[pnl] = time.time()
+            if bot_id in pushers:
+                # The way the extractors would report it
+                pushers[bot_id].update(pnl=pnl, healthy=True, running=True, mode="PAPER",
+                                       win_rate=60.0, completed=10, wins=6)
+
+
+def run(portal, servers, pushers, seconds, tick):
+    for server in servers.values():
+        server.gets = 0
+    stop = threading.Event()
+    threading.Thread(target=drift, args=(servers, pushers, tick, stop), daemon=True).start()
+    ages, started = [], time.time()
+    while time.time() - started < seconds:
+        bots = requests.get(portal + "/api/overview", auth=AUTH).json()["bots"]
+        now = time.time()
+        for bot_id, bot in bots.items():
+            set_at = servers[bot_id].set_at.get(bot.get("pnl"))
+            if set_at is not None:
+                ages.append(now - set_at)
+        time.sleep(1)
+    stop.set()
+    per_min = 60 / seconds
+    gets = statistics.mean(s.gets for s in servers.values()) * per_min
+    ages.sort()
+    return gets, statistics.median(ages), ages[int(len(ages) * 0.95)]
+
+
+class CountingPusher:
+    """Wraps ``StatusPusher._post`` to count requests."""
+
+    def __init__(self, pusher):
+        self.sent = 0
+        post = pusher._post
+
+        def counted(body):
+            self.sent += 1
+            return post(body)
+
+        pusher._post = counted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=int, default=60, help="length of each phase")
+    parser.add_argument("--tick", type=float, default=0.5, help="seconds between P&L moves")
+    args = parser.parse_args()
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    servers = {}
+    for bot_id in BOTS:
+        server = servers[bot_id] = ThreadingHTTPServer(("127.0.0.1", 0), FakeBot)
+        server.pnl, server.gets, server.set_at = 0.0, 0, {0.0: time.time()}
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bots_file = os.path.join(tmp, "bots.json")
+        with open(bots_file, "w") as f:
+            json.dump({bot_id: dict(cfg, host="127.0.0.1", port=servers[bot_id].server_address[1],
+                                    auth=None)
+                       for bot_id, cfg in BOTS.items()}, f)
+        os.environ.update(BOTS_FILE=bots_file, PORTAL_USER=AUTH[0], PORTAL_PASS=AUTH[1])
+
+        import config
+        config.DATA_DIR = tmp  # config was imported (for BOTS) before the env was set
+        import app
+        import push_ingest
+        from push_client import StatusPusher
+        from werkzeug.serving import make_server
+
+        httpd = make_server("127.0.0.1", 0, app.app, threaded=True)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        portal = f"http://127.0.0.1:{httpd.server_port}"
+
+        print(f"{len(servers)} bots, P&L moves every {args.tick} s, overview read every 1 s, "
+              f"{args.seconds} s per phase")
+        gets, p50, p95 = run(portal, servers, {}, args.seconds, args.tick)
+        print(f"  pull  {gets:6.1f} GETs/bot/min   {0:6.1f} pushes/bot/min   "
+              f"shown P&L age p50 {p50:5.2f} s  p95 {p95:5.2f} s")
+
+        pushers, counters, pushing_since = {}, {}, time.time()
+        for bot_id in servers:
+            pushers[bot_id] = StatusPusher(portal, bot_id, push_ingest.ingest_key(bot_id))
+            counters[bot_id] = CountingPusher(pushers[bot_id])
+            pushers[bot_id].update(pnl=servers[bot_id].pnl, healthy=True)
+            pushers[bot_id].start()
+        time.sleep(push_ingest.FLUSH_INTERVAL + 2 * args.tick)
+        gets, p50, p95 = run(portal, servers, pushers, args.seconds, args.tick)
+        pushes = (statistics.mean(c.sent for c in counters.values()) * 60
+                  / (time.time() - pushing_since))
+        print(f"  push  {gets:6.1f} GETs/bot/min   {pushes:6.1f} pushes/bot/min   "
+              f"shown P&L age p50 {p50:5.2f} s  p95 {p95:5.2f} s")
+
+        quiet = sorted(servers)[0]
+        pushers.pop(quiet).stop()
+        stopped = time.time()
+        servers[quiet].gets = 0
+        while servers[quiet].gets == 0:
+            requests.get(portal + "/api/overview", auth=AUTH)
+            time.sleep(0.5)
+        source = requests.get(portal + "/api/ingest", auth=AUTH).json()[quiet]["source"]
+        print(f"  quiet {quiet} stopped pushing: polled again after "
+              f"{time.time() - stopped:.1f} s (STALE_AFTER {push_ingest.STALE_AFTER} s), "
+              f"source now {source!r}")
+        for pusher in pushers.values():
+            pusher.stop()
+        httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark the terminal relay — keystroke echo latency and bulk throughput.
+
+Compares ssh_relay.relay_channel against the previous sleep-polling reader
+using a socketpair-backed fake channel, so no SSH server is needed.
+
+    python bench/bench_ssh_relay.py
+"""
+
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ssh_relay import relay_channel  # noqa: E402
+
+
+class FakeChannel:
+    """Just enough of paramiko.Channel for the relay: recv/recv_ready/fileno."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.closed = False
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def recv_ready(self):
+        import select
+        return bool(select.select([self.sock], [], [], 0)[0])
+
+    def recv(self, n):
+        return self.sock.recv(n)
+
+
+def legacy_relay(channel, send, stop_event):
+    """The original ssh_reader loop: 20 ms sleep poll, one frame per recv."""
+    while not stop_event.is_set():
+        if channel.recv_ready():
+            data = channel.recv(4096)
+            if not data:
+                break
+            send(data.decode("utf-8", errors="replace").encode())
+        else:
+            time.sleep(0.02)
+
+
+def _start(relay):
+    remote, local = socket.socketpair()
+    received = []
+    cond = threading.Condition()
+
+    def send(frame):
+        with cond:
+            received.append(frame)
+            cond.notify_all()
+
+    stop = threading.Event()
+    t = threading.Thread(target=relay, args=(FakeChannel(local), send, stop), daemon=True)
+    t.start()
+    return remote, received, cond, stop, t
+
+
+def bench_latency(relay, n=200):
+    remote, received, cond, stop, t = _start(relay)
+    samples = []
+    for _ in range(n):
+        with cond:
+            before = len(received)
+        t0 = time.perf_counter()
+        remote.sendall(b"x")
+        with cond:
+            cond.wait_for(lambda: len(received) > before, timeout=1)
+        samples.append((time.perf_counter() - t0) * 1000)
+        time.sleep(0.001)
+    stop.set()
+    remote.close()
+    t.join(timeout=2)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def bench_throughput(relay, total=32 * 1024 * 1024):
+    remote, received, cond, stop, t = _start(relay)
+    chunk = ("héllo wörld ✓ " * 300).encode()
+    t0 = time.perf_counter()
+    sent = 0
+    while sent < total:
+        remote.sendall(chunk)
+        sent += len(chunk)
+    remote.close()
+    t.join(timeout=60)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    got = sum(len(f) for f in received)
+    return got / elapsed / 1e6, len(received), got / max(len(received), 1)
+
+
+def main():
+    for label, relay in (("legacy poll", legacy_relay), ("select relay", relay_channel)):
+        p50, p99 = bench_latency(relay)
+        mbps, frames, avg = bench_throughput(relay)
+        print(f"{label:13s}  echo p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  |  "
+              f"{mbps:7.1f} MB/s  {frames:6d} frames  avg {avg:8.0f} B/frame")
+
+
+if __name__ == "__main__":
+    main()
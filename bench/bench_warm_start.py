@@ -0,0 +1,132 @@
+"""Benchmark a fresh worker's first requests — cold vs warm start.
+
+Every bot is pointed at an in-process fake bot answering after
+``--bot-ms``, and Docker is stubbed with a container listing that takes
+``--docker-ms``.  Each run starts a new Python process (as gunicorn does
+for a new or recycled worker) sharing one data directory, and times its
+first ``/api/overview`` and ``/api/system``:
+
+* ``cold``: empty data directory, as before warm-start snapshots;
+* ``warm``: the snapshots the previous process saved are on disk.
+
+For the warm run it also reports how long the process served the
+snapshot (``warm_start`` in the payload) before its own data replaced it.
+
+    python bench/bench_warm_start.py [--bot-ms 1500] [--docker-ms 500]
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import BOTS  # noqa: E402
+
+
+class SlowBot(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        body = json.dumps({
+            "running": True, "mode": "paper", "status": "healthy", "bot_running": True,
+            "summary": {"total_pnl": 42.0, "settled": 10, "wins": 6, "win_rate": 0.6, "open": 1},
+            "pnl_summary": {"total_pnl": 42.0, "win_rate": 0.6, "completed": 10, "wins": 6},
+            "paper_trading": {"realized_pnl": 100, "current_balance": 10000,
+                              "starting_balance": 10000},
+            "bot_status": {"dry_run": True, "status": "ok"},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def worker(docker_ms):
+    """One fresh process: time the first requests, then wait for live data."""
+    import docker_api
+
+    def list_containers(all=False, filters=None):
+        time.sleep(docker_ms / 1e3)
+        return [{"Id": f"c{i}", "Names": [f"/{bot_id}"], "Status": "Up 2 hours",
+                 "State": "running", "Image": f"{bot_id}:latest", "Ports": []}
+                for i, bot_id in enumerate(BOTS)]
+
+    def open_stream(path, params=None, timeout=None):
+        time.sleep(timeout)
+        raise TimeoutError
+
+    docker_api.list_containers, docker_api.open_stream = list_containers, open_stream
+    import app
+    client = app.app.test_client()
+    out = {}
+    for name in ("overview", "system"):
+        started = time.perf_counter()
+        data = client.get(f"/api/{name}").get_json()
+        out[name] = {"ms": (time.perf_counter() - started) * 1e3,
+                     "warm": data.get("warm_start"), "containers": len(data.get("containers", []))}
+    started = time.perf_counter()
+    while "warm_start" in client.get("/api/overview").get_json():
+        time.sleep(0.05)
+    out["live_after"] = time.perf_counter() - started + out["overview"]["ms"] / 1e3
+    # Stay up long enough for the snapshots to be saved for the next process
+    client.get("/api/system")
+    app._get_fetch_plan().collect(app._bots())
+    print(json.dumps(out))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bot-ms", type=float, default=1500)
+    parser.add_argument("--docker-ms", type=float, default=500)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        logging.disable(logging.WARNING)
+        return worker(args.docker_ms)
+
+    servers = {}
+    for bot_id in BOTS:
+        server = servers[bot_id] = ThreadingHTTPServer(("127.0.0.1", 0), SlowBot)
+        server.delay = args.bot_ms / 1e3
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bots_file = os.path.join(tmp, "bots.json")
+        with open(bots_file, "w") as f:
+            json.dump({bot_id: dict(cfg, host="127.0.0.1", port=servers[bot_id].server_address[1],
+                                    auth=None)
+                       for bot_id, cfg in BOTS.items()}, f)
+        env = dict(os.environ, BOTS_FILE=bots_file, PORTAL_DATA_DIR=tmp, PORTAL_USER="",
+                   PORTAL_PASS="")
+        print(f"{len(servers)} bots answering in {args.bot_ms:.0f} ms, "
+              f"Docker listing {args.docker_ms:.0f} ms; first requests of a new process")
+        for label in ("cold", "warm"):
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker",
+                 "--docker-ms", str(args.docker_ms)],
+                env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            for name in ("overview", "system"):
+                r = result[name]
+                note = f"snapshot {r['warm']['age']:.1f} s old" if r["warm"] else "live"
+                print(f"  {label}  /api/{name:8s} {r['ms']:8.1f} ms  ({note})")
+            if label == "warm":
+                print(f"  warm  own data replaced the snapshot after {result['live_after']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
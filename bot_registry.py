@@ -0,0 +1,279 @@
+"""Hot-reloadable bot registry — config.BOTS, a watched JSON file and Docker labels.
+
+Sources are merged in order, later ones overriding per field:
+
+    config.BOTS            built-in defaults
+    BOTS_FILE (JSON)       ``{bot_id: {...fields} | null}``; null removes a bot
+    Docker labels          containers labelled ``dashboard.bot.id=<id>``
+                           (plus ``dashboard.bot.<field>=...``), when enabled;
+                           stopped containers stay listed (and show as
+                           unreachable) rather than vanishing
+
+Each worker watches the sources itself and, on a change, validates the
+merged result and swaps in a new immutable ``Snapshot`` in one reference
+assignment.  Readers take ``registry.snapshot()`` once per request and see
+a consistent view.  Listeners get the set of bot ids whose config changed,
+so per-bot pools and caches can be dropped selectively.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import docker_api
+
+logger = logging.getLogger(__name__)
+
+FILE_POLL = 2             # seconds between BOTS_FILE stat checks
+DISCOVERY_INTERVAL = 30   # seconds between Docker label scans
+LABEL_PREFIX = "dashboard.bot."
+REQUIRED = ("name", "port", "health_endpoint")
+_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]*$")
+
+
+class RegistryError(ValueError):
+    """The merged bot config failed validation."""
+
+
+class Snapshot:
+    """One validated registry version plus tables derived from it."""
+
+    def __init__(self, bots, default_host, version):
+        self.version = version
+        self.loaded_at = time.time()
+        self.bots = bots
+        self.base_url = {}
+        self.auth = {}
+        self.container = {}
+        self.by_host = {}
+        self.fingerprint = {}
+        for bot_id, cfg in bots.items():
+            host = cfg.get("host", default_host)
+            self.base_url[bot_id] = f"http://{host}:{cfg['port']}"
+            self.auth[bot_id] = _resolve_auth(cfg.get("auth"))
+            self.container[bot_id] = cfg.get("host", bot_id)
+            if cfg.get("host"):
+                self.by_host[cfg["host"]] = {"id": bot_id, "color": cfg.get("color", "#888"),
+                                             "description": cfg.get("description", "")}
+            self.fingerprint[bot_id] = hashlib.sha1(
+                json.dumps(cfg, sort_keys=True).encode()).hexdigest()
+
+    def __contains__(self, bot_id):
+        return bot_id in self.bots
+
+
+def _resolve_auth(cfg):
+    """Return (user, password) tuple or None."""
+    if not cfg:
+        return None
+    user = os.environ.get(cfg["user_env"], "")
+    pw = os.environ.get(cfg["pass_env"], "")
+    if user and pw:
+        return (user, pw)
+    return None
+
+
+def validate(bots, default_host):
+    """Normalize ``bots`` in place; raise RegistryError on bad entries."""
+    endpoints = {}
+    for bot_id, cfg in bots.items():
+        if not _ID_RE.match(bot_id):
+            raise RegistryError(f"Invalid bot id: {bot_id!r}")
+        missing = [k for k in REQUIRED if not cfg.get(k)]
+        if missing:
+            raise RegistryError(f"{bot_id}: missing {', '.join(missing)}")
+        try:
+            cfg["port"] = int(cfg["port"])
+        except (TypeError, ValueError):
+            raise RegistryError(f"{bot_id}: port must be an integer")
+        if not 0 < cfg["port"] < 65536:
+            raise RegistryError(f"{bot_id}: port {cfg['port']} out of range")
+        auth = cfg.get("auth")
+        if auth and (auth.get("type") != "basic" or not auth.get("user_env") or not auth.get("pass_env")):
+            raise RegistryError(f"{bot_id}: auth must be basic with user_env and pass_env")
+        cfg.setdefault("short", bot_id[:3].upper())
+        cfg.setdefault("color", "#888")
+        cfg.setdefault("category", "")
+        cfg.setdefault("description", "")
+        cfg.setdefault("auth", None)
+        endpoint = (cfg.get("host", default_host), cfg["port"])
+        if endpoint in endpoints:
+            raise RegistryError(f"{bot_id} and {endpoints[endpoint]} both use "
+                                f"{endpoint[0]}:{endpoint[1]}")
+        endpoints[endpoint] = bot_id
+    return bots
+
+
+def _from_labels(container):
+    labels = container.get("Labels") or {}
+    bot_id = labels.get(LABEL_PREFIX + "id")
+    if not bot_id:
+        return None, None
+    cfg = {}
+    for key, value in labels.items():
+        if key.startswith(LABEL_PREFIX) and key != LABEL_PREFIX + "id":
+            field = key[len(LABEL_PREFIX):]
+            cfg[field] = json.loads(value) if field == "auth" else value
+    cfg["host"] = container.get("Names", ["/" + bot_id])[0].lstrip("/")
+    if "port" not in cfg:
+        ports = [p["PrivatePort"] for p in container.get("Ports", []) if p.get("PrivatePort")]
+        if ports:
+            cfg["port"] = min(ports)
+    return bot_id, cfg
+
+
+class BotRegistry:
+    """Per-worker view of the bot registry, reloaded when a source changes."""
+
+    def __init__(self, base, default_host, path=None, docker_labels=False):
+        self.base = base
+        self.default_host = default_host
+        self.path = path
+        self.docker_labels = docker_labels
+        self._file_error = None   # BOTS_FILE unreadable; its last good content stays in use
+        self._merge_error = None  # merged config failed validation; the last snapshot stays
+        self._file_bots = {}
+        self._file_sig = None
+        self._docker_bots = {}
+        self._listeners = []
+        self._reload_lock = threading.Lock()
+        self._snapshot = Snapshot(validate(_copy(base), default_host), default_host, 1)
+        self._poll_file()
+        if docker_labels:
+            self._poll_docker()
+        self._apply()
+        if path or docker_labels:
+            threading.Thread(target=self._watch, daemon=True).start()
+
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def error(self):
+        """Why the registry is not serving its sources as they stand, or None."""
+        return self._file_error or self._merge_error
+
+    def on_change(self, callback):
+        """Register ``callback(snapshot, changed_ids)`` for future reloads."""
+        self._listeners.append(callback)
+
+    # -- sources ---------------------------------------------------------
+
+    def _poll_file(self):
+        """Re-read BOTS_FILE if its stat changed; True when it did."""
+        if not self.path:
+            return False
+        try:
+            st = os.stat(self.path)
+            sig = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            sig = None
+        if sig == self._file_sig:
+            return False
+        self._file_sig = sig
+        if sig is None:
+            self._file_bots, self._file_error = {}, None
+            return True
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("top level must be an object")
+        except (OSError, ValueError) as e:
+            self._file_error = f"{self.path}: {e}"
+            logger.error("Bot registry file rejected: %s", self._file_error)
+            return False
+        self._file_bots, self._file_error = data, None
+        return True
+
+    def _poll_docker(self):
+        try:
+            listing = docker_api.list_containers(
+                all=True, filters={"label": [LABEL_PREFIX + "id"]})
+        except Exception as e:
+            logger.warning("Bot label discovery failed: %s", e)
+            return False
+        found = {}
+        # Running containers last, so they win over a stopped one with the same id
+        for c in sorted(listing, key=lambda c: c.get("State") == "running"):
+            try:
+                bot_id, cfg = _from_labels(c)
+            except ValueError as e:
+                logger.warning("Bad bot labels on %s: %s", c.get("Names"), e)
+                continue
+            if not bot_id:
+                continue
+            if "port" not in cfg:
+                # A stopped container publishes no ports; keep the one it had
+                port = self._docker_bots.get(bot_id, {}).get("port")
+                if port is None:
+                    logger.debug("Skipping %s: stopped, and no port known", bot_id)
+                    continue
+                cfg["port"] = port
+            found[bot_id] = cfg
+        if found == self._docker_bots:
+            return False
+        self._docker_bots = found
+        return True
+
+    # -- reload ----------------------------------------------------------
+
+    def _merge(self):
+        bots = _copy(self.base)
+        for layer in (self._file_bots, self._docker_bots):
+            for bot_id, cfg in layer.items():
+                if cfg is None:
+                    bots.pop(bot_id, None)
+                else:
+                    bots[bot_id] = dict(bots.get(bot_id, {}), **cfg)
+        return bots
+
+    def _apply(self):
+        with self._reload_lock:
+            old = self._snapshot
+            try:
+                bots = validate(self._merge(), self.default_host)
+            except RegistryError as e:
+                self._merge_error = str(e)
+                logger.error("Bot registry update rejected: %s", e)
+                return
+            new = Snapshot(bots, self.default_host, old.version + 1)
+            changed = {b for b in set(old.bots) | set(new.bots)
+                       if old.fingerprint.get(b) != new.fingerprint.get(b)}
+            self._merge_error = None
+            if not changed:
+                return
+            self._snapshot = new
+        logger.info("Bot registry v%d: changed %s", new.version, ", ".join(sorted(changed)))
+        for callback in self._listeners:
+            try:
+                callback(new, changed)
+            except Exception:
+                logger.exception("Bot registry listener failed")
+
+    def reload(self):
+        """Re-read every source now."""
+        self._file_sig = None
+        self._poll_file()
+        if self.docker_labels:
+            self._poll_docker()
+        self._apply()
+
+    def _watch(self):
+        next_discovery = time.time() + DISCOVERY_INTERVAL
+        while True:
+            time.sleep(FILE_POLL)
+            changed = self._poll_file()
+            if self.docker_labels and time.time() >= next_discovery:
+                next_discovery = time.time() + DISCOVERY_INTERVAL
+                changed = self._poll_docker() or changed
+            if changed:
+                self._apply()
+
+
+def _copy(bots):
+    return {bot_id: dict(cfg) for bot_id, cfg in bots.items()}
@@ -0,0 +1,206 @@
+"""Capital reconciliation — the virtual ledger joined with bot P&L and the Kalshi account.
+
+One worker (see ``app._reconcile_loop``) calls ``CapitalReconciler.run_once``
+every ``RECONCILE_INTERVAL`` seconds: it reads the Kalshi balance and open
+positions and each bot's P&L from the shared fetch cycle, joins them with
+the CapitalStore allocations, and publishes a versioned view to
+``data/capital_view.json``.  ``/api/capital`` serves that view from any
+worker without calling Kalshi or the bots.  Ledger writes call
+``refresh`` to republish at once with the last known balance and P&L.
+
+Every amount in the view is cents (bot P&L is converted once, here).  A
+source that fails keeps its last value and is listed under ``errors``.
+Drift beyond ``TOLERANCE`` is flagged:
+
+    ledger          an allocation differs from the net of its transfer log
+    overallocated   allocations plus P&L claim more than the account holds
+                    (cash balance plus position exposure at cost)
+    depleted        an account's allocation plus P&L is below zero
+"""
+
+import fcntl
+import json
+import logging
+import os
+import time
+
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+TOLERANCE = int(round(float(os.environ.get("RECONCILE_TOLERANCE", "1")) * 100))  # cents
+STALE_AFTER = 3  # intervals without a full run before the view is marked stale
+
+
+def build_view(accounts, inputs, ledger_net, tolerance=TOLERANCE):
+    """Join allocations with ``inputs`` (balance, exposure, P&L in cents).
+
+    ``ledger_net`` is ``{account: in - out}`` over the transfer log, or None
+    to skip the ledger check.  Returns the view without version fields.
+    """
+    pnl = inputs.get("pnl", {})
+    rows, drift, claims = [], [], 0
+    for bot_id, acct in accounts.items():
+        allocation = acct.get("allocation", 0)
+        bot_pnl = pnl.get(bot_id, 0)
+        effective = allocation + bot_pnl
+        rows.append({"id": bot_id, "label": acct.get("label", bot_id), "allocation": allocation,
+                     "pnl": bot_pnl, "effective": effective, "pnl_known": bot_id in pnl})
+        claims += max(0, effective)
+        if effective < -tolerance:
+            drift.append({"kind": "depleted", "account": bot_id, "amount": effective})
+    if ledger_net is not None:
+        for name in sorted((set(accounts) | set(ledger_net)) - {"unallocated"}):
+            diff = accounts.get(name, {}).get("allocation", 0) - ledger_net.get(name, 0)
+            if abs(diff) > tolerance:
+                drift.append({"kind": "ledger", "account": name, "amount": diff})
+
+    balance, exposure = inputs.get("balance"), inputs.get("positions_exposure")
+    total_allocated = sum(row["allocation"] for row in rows)
+    account_value = balance + (exposure or 0) if balance is not None else None
+    if account_value is not None and claims - account_value > tolerance:
+        drift.append({"kind": "overallocated", "account": None, "amount": claims - account_value})
+    return {
+        "real_balance": balance,
+        "positions_exposure": exposure,
+        "positions": inputs.get("positions"),
+        "account_value": account_value,
+        "total_allocated": total_allocated,
+        "unallocated": (balance - total_allocated) if balance is not None else None,
+        "accounts": rows,
+        "drift": drift,
+        "tolerance": tolerance,
+    }
+
+
+class CapitalReconciler:
+    """Publishes and serves the reconciled capital view.
+
+    ``bot_pnl()`` returns ``{bot_id: pnl in dollars}`` for reachable bots;
+    ``kalshi()`` returns a KalshiClient, or None when no credentials are set.
+    Only ``run_once`` calls it, so workers that just serve the view never
+    load the private key.
+    """
+
+    def __init__(self, store, bot_pnl, kalshi=None, interval=30, data_dir=None,
+                 tolerance=TOLERANCE):
+        data_dir = data_dir or DATA_DIR
+        os.makedirs(data_dir, exist_ok=True)
+        self.store = store
+        self.bot_pnl = bot_pnl
+        self.kalshi = kalshi
+        self.interval = interval
+        self.tolerance = tolerance
+        self.path = os.path.join(data_dir, "capital_view.json")
+        self._lock_path = os.path.join(data_dir, "capital_view.lock")
+        self._cache = (None, None)  # (file stamp, view)
+
+    # -- publishing --------------------------------------------------------
+
+    def run_once(self):
+        """Fetch every input and publish a new view."""
+        inputs, errors = {}, {}
+        try:
+            kalshi = self.kalshi() if self.kalshi is not None else None
+        except Exception as e:
+            kalshi, errors["kalshi"] = None, str(e)
+            logger.warning("Reconcile: Kalshi client unavailable: %s", e)
+        if kalshi is not None:
+            try:
+                inputs["balance"] = kalshi.get_balance()
+                positions = kalshi.get_positions()
+                inputs["positions_exposure"] = sum(p.get("market_exposure", 0) for p in positions)
+                inputs["positions"] = len(positions)
+                inputs["balance_at"] = time.time()
+            except Exception as e:
+                errors["kalshi"] = str(e)
+                logger.warning("Reconcile: Kalshi balance/positions failed: %s", e)
+        try:
+            inputs["pnl"] = {bot_id: int(round(pnl * 100))
+                             for bot_id, pnl in self.bot_pnl().items()}
+            inputs["pnl_at"] = time.time()
+        except Exception as e:
+            errors["bots"] = str(e)
+            logger.warning("Reconcile: bot P&L failed: %s", e)
+        return self._publish(inputs, errors)
+
+    def refresh(self):
+        """Republish after a ledger change, reusing the last inputs."""
+        return self._publish(None, None)
+
+    def _publish(self, inputs, errors):
+        with open(self._lock_path, "a") as lk:
+            fcntl.flock(lk, fcntl.LOCK_EX)
+            prev = self._read() or {}
+            merged = dict(prev.get("inputs", {}))
+            if inputs is not None:
+                # A failed source keeps its last value; P&L of unreachable bots too
+                pnl = dict(merged.get("pnl", {}), **inputs.pop("pnl", {}))
+                merged.update(inputs, pnl=pnl)
+            accounts, transfer_count = self.store.get_ledger()
+            count, ledger_net = self.store.rollups.net()
+            if count != transfer_count:
+                self.store.rebuild_rollups()
+                count, ledger_net = self.store.rollups.net()
+            view = build_view(accounts, merged, ledger_net, self.tolerance)
+            now = time.time()
+            view.update(
+                version=prev.get("version", 0) + 1,
+                updated_at=now,
+                reconciled_at=now if inputs is not None else prev.get("reconciled_at"),
+                errors=errors if errors is not None else prev.get("errors", {}),
+                inputs=merged,
+            )
+            self._log_drift(prev.get("drift", []), view["drift"])
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(view, f)
+            os.replace(tmp, self.path)
+        return view
+
+    @staticmethod
+    def _log_drift(before, after):
+        old = {(d["kind"], d["account"]) for d in before}
+        new = {(d["kind"], d["account"]) for d in after}
+        for d in after:
+            if (d["kind"], d["account"]) not in old:
+                logger.warning("Capital drift: %s %s by %d cents",
+                               d["kind"], d["account"] or "portfolio", d["amount"])
+        for kind, account in old - new:
+            logger.info("Capital drift resolved: %s %s", kind, account or "portfolio")
+
+    # -- serving -----------------------------------------------------------
+
+    def _read(self):
+        """The published view, parsed once per file version."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_ino, st.st_mtime_ns)
+        if self._cache[0] != stamp:
+            try:
+                with open(self.path) as f:
+                    self._cache = (stamp, json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning("Unreadable capital view: %s", e)
+                return None
+        return self._cache[1]
+
+    def view(self, now=None):
+        """The latest view plus ``stale``, without the raw inputs.
+
+        Before the first publish this is the ledger alone (``version`` 0).
+        The body only changes when a new version is published, so it
+        revalidates with ETags between reconciliations.
+        """
+        view = self._read()
+        if view is None:
+            accounts, _ = self.store.get_ledger()
+            view = dict(build_view(accounts, {}, None, self.tolerance), version=0,
+                        updated_at=None, reconciled_at=None, errors={})
+        out = {k: v for k, v in view.items() if k != "inputs"}
+        reconciled = out["reconciled_at"]
+        out["stale"] = (reconciled is None
+                        or (now or time.time()) - reconciled > STALE_AFTER * self.interval)
+        return out
@@ -0,0 +1,228 @@
+"""Capital-flow rollups — per-account daily and monthly inflow / outflow.
+
+``CapitalStore`` appends every allocation change, transfer and removal to
+the transfer log in capital.json.  This module keeps a materialized view
+of that log next to it (capital_rollups.json) so questions like "how much
+went into sports-arb this month" cost one lookup per bucket, however long
+the log is:
+
+    {"count": <transfers applied>,
+     "day":   {"2026-10-19": {"sports-arb": {"in": 50000, "out": 0}, ...}},
+     "month": {"2026-10":    {...}}}
+
+Buckets are UTC calendar days and months; amounts are cents, like the
+ledger, and ``unallocated`` is an account like any other.  ``count`` is
+the log length the view reflects: an update whose log doesn't line up
+with it (a write the view missed, or a log edited by hand) rebuilds the
+view from the whole log instead.
+
+    python capital_rollups.py rebuild [--store data/capital.json]
+"""
+
+import argparse
+import fcntl
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+
+MAX_BUCKETS = 3700  # per query; ten years of days
+
+
+def _bump(buckets, period, account, key, amount):
+    flows = buckets.setdefault(period, {}).setdefault(account, {"in": 0, "out": 0})
+    flows[key] += amount
+
+
+def _add(view, transfer):
+    ts, amount = transfer["ts"], int(transfer["amount"])
+    for granularity, period in (("day", ts[:10]), ("month", ts[:7])):
+        _bump(view[granularity], period, transfer["from"], "out", amount)
+        _bump(view[granularity], period, transfer["to"], "in", amount)
+
+
+def build(transfers):
+    """A fresh view of the whole transfer log."""
+    view = {"count": 0, "day": {}, "month": {}}
+    for transfer in transfers:
+        _add(view, transfer)
+    view["count"] = len(transfers)
+    return view
+
+
+def _periods(granularity, start, end):
+    """Bucket keys from ``start`` to ``end`` (``date``s) inclusive, oldest first."""
+    if granularity == "day":
+        return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    return [f"{start.year + (start.month - 1 + i) // 12:04d}-{(start.month - 1 + i) % 12 + 1:02d}"
+            for i in range(months)]
+
+
+def _parse_date(value, last):
+    """``YYYY-MM-DD``, or ``YYYY-MM`` for its first (or ``last``) day."""
+    if len(value) == 7:
+        first = date.fromisoformat(value + "-01")
+        if not last:
+            return first
+        return (first + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    return date.fromisoformat(value)
+
+
+def parse_range(granularity, start=None, end=None, today=None):
+    """``(start, end)`` dates for a query; ValueError if malformed.
+
+    Defaults to the last 30 days, or the last 12 months by month (UTC).
+    """
+    try:
+        end = _parse_date(end, last=True) if end else today or datetime.now(timezone.utc).date()
+        if start:
+            start = _parse_date(start, last=False)
+        elif granularity == "month":
+            start = date(end.year - 1, end.month, 1) + timedelta(days=31)
+            start = start.replace(day=1)
+        else:
+            start = end - timedelta(days=29)
+    except ValueError:
+        raise ValueError("from and to must be YYYY-MM-DD or YYYY-MM")
+    return start, end
+
+
+def _select(view, granularity, periods, account):
+    table = (view or {}).get(granularity, {})
+    buckets, totals = [], {}
+    for period in periods:
+        flows = table.get(period)
+        if not flows:
+            continue
+        out = {}
+        for name, flow in flows.items():
+            if account is not None and name != account:
+                continue
+            out[name] = {"in": flow["in"], "out": flow["out"], "net": flow["in"] - flow["out"]}
+            total = totals.setdefault(name, {"in": 0, "out": 0, "net": 0})
+            for key in total:
+                total[key] += out[name][key]
+        if out:
+            buckets.append({"period": period, "flows": out})
+    return {"buckets": buckets, "totals": totals}
+
+
+class CapitalRollups:
+    """The rollup file for one capital store.
+
+    The parsed view is cached and reused while the file's inode, size and
+    mtime are unchanged, so queries between writes don't reparse it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._cache = (None, None)  # (file stamp, view)
+
+    @staticmethod
+    def _stamp(f):
+        st = os.fstat(f.fileno())
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _locked(self):
+        f = open(self.path, "a+")
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        return f
+
+    def _load(self, f):
+        """The view in ``f`` (locked), or None if missing or unreadable."""
+        stamp = self._stamp(f)
+        if self._cache[0] == stamp:
+            return self._cache[1]
+        try:
+            view = json.loads(f.read() or "null")
+        except json.JSONDecodeError:
+            view = None
+        view = view if isinstance(view, dict) and "count" in view else None
+        self._cache = (stamp, view)
+        return view
+
+    def _save(self, f, view):
+        self._cache = (None, None)
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps(view, separators=(",", ":")))
+        f.flush()
+        self._cache = (self._stamp(f), view)
+
+    def update(self, transfers, appended):
+        """Fold in the last ``appended`` entries of ``transfers`` (the log just written)."""
+        with self._locked() as f:
+            view = self._load(f)
+            if view is None or view["count"] != len(transfers) - appended:
+                view = build(transfers)
+            else:
+                self._cache = (None, None)  # about to change in place
+                for transfer in transfers[len(transfers) - appended:]:
+                    _add(view, transfer)
+                view["count"] = len(transfers)
+            self._save(f, view)
+
+    def rebuild(self, transfers):
+        """Recompute the whole view from ``transfers``; returns it."""
+        view = build(transfers)
+        with self._locked() as f:
+            self._save(f, view)
+        return view
+
+    def net(self):
+        """``(count, {account: in - out})`` over the whole log, from the month buckets."""
+        try:
+            with open(self.path) as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                view = self._load(f)
+                if view is None:
+                    return 0, {}
+                net = {}
+                for flows in view["month"].values():
+                    for name, flow in flows.items():
+                        net[name] = net.get(name, 0) + flow["in"] - flow["out"]
+                return view["count"], net
+        except FileNotFoundError:
+            return 0, {}
+
+    def query(self, start, end, granularity="day", account=None):
+        """Flows per bucket between ``start`` and ``end`` (``date``s, inclusive).
+
+        Returns ``{"buckets": [{"period", "flows": {account: {in, out, net}}}],
+        "totals": {account: {in, out, net}}}``; empty buckets are left out.
+        Raises ValueError for a bad range.
+        """
+        if granularity not in ("day", "month"):
+            raise ValueError("granularity must be day or month")
+        if start > end:
+            raise ValueError("from must not be after to")
+        periods = _periods(granularity, start, end)
+        if len(periods) > MAX_BUCKETS:
+            raise ValueError(f"range spans more than {MAX_BUCKETS} buckets")
+        try:
+            with open(self.path) as f:
+                # Held while reading: update() changes the cached view in place
+                fcntl.flock(f, fcntl.LOCK_SH)
+                return _select(self._load(f), granularity, periods, account)
+        except FileNotFoundError:
+            return _select(None, granularity, periods, account)
+
+
+def main():
+    from subaccount_store import CapitalStore, STORE_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--store", default=STORE_PATH, help="path to capital.json")
+    args = parser.parse_args()
+    if not os.path.exists(args.store):
+        raise SystemExit(f"No capital store at {args.store}")
+    store = CapitalStore(args.store)
+    view = store.rebuild_rollups()
+    print(f"Rebuilt {store.rollups.path} from {view['count']} transfers: "
+          f"{len(view['day'])} days, {len(view['month'])} months")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""Claude Code job queue — cross-worker concurrency slots and replayable output.
+
+Every job is a directory under ``data/claude_jobs/<id>/``:
+
+    meta.json    status and timestamps (replaced atomically)
+    output.log   append-only stream-json lines from the CLI
+    stderr.log   the CLI's stderr
+    claim        created with O_EXCL by whichever worker runs (or cancels) the
+                 job; holds that worker's pid and process start time
+    cancel       marker asking the running worker to stop the job
+
+Concurrency is bounded by ``CLAUDE_CONCURRENCY`` slot lock files: a worker
+must hold an exclusive ``flock`` on one of them while a job runs, so the
+limit holds across all gunicorn workers, and a crashed worker frees its slot.
+A job whose claiming worker is gone (queued or running) is failed by the
+next dispatcher scan.
+Each worker runs a dispatcher thread that starts queued jobs when a slot is
+free (the hub reads jobs with ``dispatch=False`` and leaves running them to
+the workers).  Clients read output by byte offset, so a dropped SSE connection can
+resume where it left off without affecting the job.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import secrets
+import subprocess
+import threading
+import time
+
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.path.join(DATA_DIR, "claude_jobs")
+CLAUDE_BIN = os.environ.get("CLAUDE_BIN", "claude")
+CONCURRENCY = int(os.environ.get("CLAUDE_CONCURRENCY", "2"))
+JOB_TIMEOUT = int(os.environ.get("CLAUDE_JOB_TIMEOUT", "300"))   # seconds
+RETENTION = int(os.environ.get("CLAUDE_JOB_RETENTION", str(7 * 86400)))
+DISPATCH_POLL = 1.0  # seconds between scans for jobs queued by other workers
+
+FINISHED = ("done", "error", "cancelled")
+
+
+def _new_id():
+    # Millisecond prefix keeps ids in submission order when sorted
+    return f"{int(time.time() * 1000):012x}{secrets.token_hex(3)}"
+
+
+def _start_time(pid):
+    """Start time of ``pid`` in clock ticks since boot, or None if unknown.
+
+    Together with the pid this names one process: after a container
+    restart the pids start low again, but the start times differ.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Field 22; split after the parenthesised command, which may hold spaces
+            return int(f.read().rpartition(")")[2].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _owner_alive(owner):
+    """Whether the process recorded in a claim is still running."""
+    pid = owner.get("pid")
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    started = owner.get("started")
+    return started is None or _start_time(pid) in (None, started)
+
+
+class JobQueue:
+    """Persistent Claude job queue shared by all workers through ``data_dir``."""
+
+    def __init__(self, work_dir, max_turns, data_dir=None, concurrency=CONCURRENCY,
+                 dispatch=True):
+        self.work_dir = work_dir
+        self.max_turns = max_turns
+        self.data_dir = data_dir or JOBS_DIR
+        self.concurrency = max(1, concurrency)
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._wake = threading.Event()
+        if dispatch:
+            threading.Thread(target=self._dispatch, daemon=True).start()
+
+    # -- storage ---------------------------------------------------------
+
+    def _dir(self, job_id):
+        return os.path.join(self.data_dir, job_id)
+
+    def _path(self, job_id, name):
+        return os.path.join(self.data_dir, job_id, name)
+
+    def _write_meta(self, meta):
+        tmp = self._path(meta["id"], "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path(meta["id"], "meta.json"))
+
+    def get(self, job_id):
+        """Job metadata plus the current output size, or None."""
+        if not job_id or "/" in job_id or job_id.startswith("."):
+            return None
+        try:
+            with open(self._path(job_id, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            meta["output_bytes"] = os.path.getsize(self._path(job_id, "output.log"))
+        except OSError:
+            meta["output_bytes"] = 0
+        return meta
+
+    def list(self, limit=50):
+        ids = sorted((n for n in os.listdir(self.data_dir) if not n.startswith(".")), reverse=True)
+        jobs = []
+        for job_id in ids[:limit]:
+            meta = self.get(job_id)
+            if meta:
+                meta.pop("prompt", None)
+                jobs.append(meta)
+        return jobs
+
+    # -- client API ------------------------------------------------------
+
+    def submit(self, prompt, session_id=""):
+        job_id = _new_id()
+        os.makedirs(self._dir(job_id))
+        open(self._path(job_id, "output.log"), "a").close()
+        meta = {"id": job_id, "status": "queued", "prompt": prompt,
+                "session_id": session_id, "created": time.time(),
+                "started": None, "finished": None, "returncode": None, "error": None}
+        self._write_meta(meta)
+        self._wake.set()
+        return meta
+
+    def cancel(self, job_id):
+        """Cancel a queued job outright, or ask the running worker to stop it."""
+        meta = self.get(job_id)
+        if meta is None or meta["status"] in FINISHED:
+            return meta
+        if self._claim(job_id):
+            self._finish(meta, "cancelled")
+            return meta
+        open(self._path(job_id, "cancel"), "a").close()
+        return meta
+
+    def read(self, job_id, offset, limit=65536):
+        """Return ``[(line, end_offset), ...]`` for complete lines after ``offset``."""
+        with open(self._path(job_id, "output.log"), "rb") as f:
+            f.seek(offset)
+            data = f.read(limit)
+        if len(data) == limit and b"\n" not in data:
+            # One over-long line — hand it out in pieces
+            return [(data.decode("utf-8", errors="replace"), offset + len(data))]
+        lines = []
+        for raw in data.split(b"\n")[:-1]:
+            offset += len(raw) + 1
+            lines.append((raw.decode("utf-8", errors="replace"), offset))
+        return lines
+
+    # -- dispatcher ------------------------------------------------------
+
+    def _claim(self, job_id):
+        try:
+            fd = os.open(self._path(job_id, "claim"), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        pid = os.getpid()
+        os.write(fd, json.dumps({"pid": pid, "started": _start_time(pid)}).encode())
+        os.close(fd)
+        return True
+
+    def _claim_owner(self, job_id):
+        """``{"pid", "started"}`` from the claim file, or None if absent or still being written."""
+        try:
+            with open(self._path(job_id, "claim")) as f:
+                data = f.read()
+        except OSError:
+            return None
+        if not data:
+            return None
+        try:
+            owner = json.loads(data)
+        except ValueError:
+            return None
+        if isinstance(owner, int):  # written before the start time was recorded
+            owner = {"pid": owner, "started": None}
+        return owner if isinstance(owner, dict) and owner.get("pid") else None
+
+    def _take_slot(self):
+        for n in range(self.concurrency):
+            fh = open(os.path.join(self.data_dir, f".slot-{n}.lock"), "a")
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fh
+            except OSError:
+                fh.close()
+        return None
+
+    def _finish(self, meta, status, error=None, returncode=None):
+        meta.pop("output_bytes", None)
+        meta.update(status=status, finished=time.time(), error=error, returncode=returncode)
+        self._write_meta(meta)
+
+    def _reap(self, meta):
+        """Fail claimed jobs whose worker died; drop expired job directories.
+
+        A queued job can be claimed too: by a worker that died before
+        ``_run`` marked it running, or by ``cancel``.  Nobody else can
+        claim it after that, so it is failed like a running one.
+        """
+        job_id = meta["id"]
+        if meta["status"] in ("queued", "running"):
+            owner = self._claim_owner(job_id)
+            if owner is None or _owner_alive(owner):
+                return
+            self._finish(meta, "error", error="Worker exited while the job was running"
+                         if meta["status"] == "running" else "Worker exited before the job started")
+        elif meta["status"] in FINISHED and time.time() - (meta["finished"] or 0) > RETENTION:
+            for name in os.listdir(self._dir(job_id)):
+                os.unlink(self._path(job_id, name))
+            os.rmdir(self._dir(job_id))
+
+    def _dispatch(self):
+        while True:
+            self._wake.wait(DISPATCH_POLL)
+            self._wake.clear()
+            try:
+                for job_id in sorted(os.listdir(self.data_dir)):
+                    if job_id.startswith("."):
+                        continue
+                    meta = self.get(job_id)
+                    if meta is None:
+                        continue
+                    if meta["status"] != "queued":
+                        self._reap(meta)
+                        continue
+                    slot = self._take_slot()
+                    if slot is None:
+                        break
+                    if not self._claim(job_id):
+                        slot.close()
+                        self._reap(meta)
+                        continue
+                    threading.Thread(target=self._run, args=(meta, slot), daemon=True).start()
+            except Exception:
+                logger.exception("Claude job dispatch failed")
+
+    def _command(self, meta):
+        cmd = [
+            CLAUDE_BIN, "-p",
+            "--output-format", "stream-json",
+            "--verbose",
+            "--max-turns", str(self.max_turns),
+            "--allowedTools",
+            "Bash(curl:*)", "Bash(git:*)",
+            "Read", "Edit", "Write", "Glob", "Grep",
+        ]
+        # Resume a previous conversation if session_id is provided
+        if meta.get("session_id"):
+            cmd += ["--resume", meta["session_id"]]
+        return cmd + ["--", meta["prompt"]]
+
+    def _run(self, meta, slot):
+        job_id = meta["id"]
+        proc = None
+        try:
+            meta.pop("output_bytes", None)
+            meta.update(status="running", started=time.time())
+            self._write_meta(meta)
+            with open(self._path(job_id, "output.log"), "ab") as out, \
+                    open(self._path(job_id, "stderr.log"), "wb") as err:
+                try:
+                    proc = subprocess.Popen(self._command(meta), stdout=subprocess.PIPE,
+                                            stderr=err, cwd=self.work_dir)
+                except FileNotFoundError:
+                    self._append_error(out, f"{CLAUDE_BIN} CLI not found. "
+                                            "Install: npm install -g @anthropic-ai/claude-code")
+                    self._finish(meta, "error", error="claude CLI not found")
+                    return
+                stopped = threading.Event()
+                reason = {}
+                threading.Thread(target=self._watch, args=(job_id, proc, stopped, reason),
+                                 daemon=True).start()
+                for line in proc.stdout:
+                    if line.strip():
+                        out.write(line.rstrip(b"\r\n") + b"\n")
+                        out.flush()
+                proc.wait()
+                stopped.set()
+            if "cancelled" in reason:
+                self._finish(meta, "cancelled", returncode=proc.returncode)
+            elif "timeout" in reason:
+                with open(self._path(job_id, "output.log"), "ab") as out:
+                    self._append_error(out, f"Request timed out ({JOB_TIMEOUT // 60} min limit)")
+                self._finish(meta, "error", error="timeout", returncode=proc.returncode)
+            elif proc.returncode != 0:
+                with open(self._path(job_id, "stderr.log"), "rb") as f:
+                    stderr = f.read().decode("utf-8", errors="replace")
+                with open(self._path(job_id, "output.log"), "ab") as out:
+                    self._append_error(out, stderr)
+                self._finish(meta, "error", error=stderr[-500:], returncode=proc.returncode)
+            else:
+                self._finish(meta, "done", returncode=0)
+        except Exception as e:
+            logger.exception("Claude job %s failed", job_id)
+            self._finish(meta, "error", error=str(e))
+        finally:
+            if proc and proc.poll() is None:
+                proc.kill()
+            slot.close()
+            self._wake.set()
+
+    @staticmethod
+    def _append_error(out, message):
+        out.write(json.dumps({"type": "error", "error": message}).encode() + b"\n")
+        out.flush()
+
+    def _watch(self, job_id, proc, stopped, reason):
+        """Kill the process on a cancel marker or after JOB_TIMEOUT."""
+        deadline = time.time() + JOB_TIMEOUT
+        while not stopped.wait(0.5):
+            if os.path.exists(self._path(job_id, "cancel")):
+                reason["cancelled"] = True
+            elif time.time() > deadline:
+                reason["timeout"] = True
+            else:
+                continue
+            proc.kill()
+            return
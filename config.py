@@ -4,6 +4,9 @@ import os
 
 BOT_HOST = os.environ.get("BOT_HOST", "host.docker.internal")
 
+# Portal state shared by every worker and the hub (jobs, P&L history, capital, leases, ...)
+DATA_DIR = os.environ.get("PORTAL_DATA_DIR") or os.path.join(os.path.dirname(__file__), "data")
+
 # Categories for grouping bots in the overview and tab bar
 BOT_CATEGORIES = {
     "crypto":  {"label": "Crypto",  "color": "#f7931a"},
@@ -91,3 +94,20 @@ BOTS = {
         "auth": None,
     },
 }
+
+# Risk alert thresholds (see risk_engine.METRICS). Dollar limits apply to
+# P&L drawdown; percentages are relative to the CapitalStore allocation.
+# "default" applies to every bot and can be overridden per bot id;
+# "portfolio" applies to the sum across bots. None disables a check.
+RISK_THRESHOLDS = {
+    "default": {
+        "max_drawdown": float(os.environ.get("RISK_MAX_DRAWDOWN", 50)),
+        "max_drawdown_pct": float(os.environ.get("RISK_MAX_DRAWDOWN_PCT", 20)),
+        "max_volatility": None,
+        "min_return_pct": None,
+    },
+    "portfolio": {
+        "max_drawdown": float(os.environ.get("RISK_PORTFOLIO_MAX_DRAWDOWN", 150)),
+        "max_drawdown_pct": float(os.environ.get("RISK_PORTFOLIO_MAX_DRAWDOWN_PCT", 15)),
+    },
+}
@@ -0,0 +1,173 @@
+"""Background-maintained Docker inventory and infrastructure probes for /api/system.
+
+``ContainerInventory`` lists containers once, then follows Docker's
+``/events`` stream and re-lists only the container an event names.  The
+events connection is recycled every ``RESYNC_INTERVAL`` seconds, busy or
+quiet, with a full re-list, which refreshes the human-readable "Up 5
+minutes" status text and covers any missed events.  ``ServiceProbes`` runs TCP checks
+concurrently on a timer.  Both only ever block their own threads; request
+handlers read the cached results.
+"""
+
+import json
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import docker_api
+
+logger = logging.getLogger(__name__)
+
+RESYNC_INTERVAL = 60  # seconds between full container re-lists
+RETRY_DELAY = 5       # seconds after the Docker socket fails
+PROBE_INTERVAL = 15   # seconds between service probe rounds
+PROBE_TIMEOUT = 2     # seconds per TCP probe
+
+
+def _summarize(c):
+    ports = ", ".join(
+        f"{p.get('PublicPort','?')}→{p.get('PrivatePort','?')}"
+        for p in c.get("Ports", []) if p.get("PublicPort")
+    ) or "—"
+    return {
+        "name": c.get("Names", ["?"])[0].lstrip("/"),
+        "status": c.get("Status", ""),
+        "ports": ports,
+        "image": c.get("Image", ""),
+        "running": c.get("State", "") == "running",
+    }
+
+
+class ContainerInventory:
+    """In-memory container list kept current from the Docker events stream."""
+
+    def __init__(self):
+        self._containers = {}  # container id -> summary dict
+        self._error = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._conn = None  # open /events connection, closed by stop()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """End the sync thread; the last snapshot stays readable."""
+        self._stop.set()
+        with self._lock:
+            conn = self._conn
+        if conn is not None and conn.sock is not None:
+            try:
+                conn.sock.shutdown(2)  # unblocks the events readline
+            except OSError:
+                pass
+
+    def ready(self):
+        """True once the first sync (or its failure) has completed."""
+        return self._ready.is_set()
+
+    def snapshot(self, wait=2.0):
+        """Return ``(containers, error)``; waits briefly for the first sync."""
+        self._ready.wait(wait)
+        with self._lock:
+            containers = sorted(self._containers.values(), key=lambda c: c["name"])
+            return [dict(c) for c in containers], self._error
+
+    def _resync(self):
+        listing = docker_api.list_containers(all=True)
+        with self._lock:
+            self._containers = {c["Id"]: _summarize(c) for c in listing}
+            self._error = None
+        self._ready.set()
+
+    def _refresh_one(self, container_id):
+        found = docker_api.list_containers(all=True, filters={"id": [container_id]})
+        with self._lock:
+            if found:
+                self._containers[container_id] = _summarize(found[0])
+            else:
+                self._containers.pop(container_id, None)
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                since = int(time.time())
+                self._resync()
+                conn, resp = docker_api.open_stream(
+                    "/events",
+                    {"since": since, "filters": json.dumps({"type": ["container"]})},
+                    timeout=RESYNC_INTERVAL,
+                )
+                with self._lock:
+                    self._conn = conn
+                if self._stop.is_set():
+                    break
+                deadline = time.monotonic() + RESYNC_INTERVAL
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break  # periodic resync, even while events keep arriving
+                    conn.sock.settimeout(remaining)
+                    line = resp.readline()
+                    if not line:
+                        break
+                    line = line.strip()
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    container_id = event.get("id") or event.get("Actor", {}).get("ID")
+                    if container_id:
+                        self._refresh_one(container_id)
+            except (socket.timeout, TimeoutError):
+                continue  # periodic resync
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning("Docker inventory sync failed: %s", e)
+                with self._lock:
+                    self._error = str(e)
+                self._ready.set()
+                self._stop.wait(RETRY_DELAY)
+            finally:
+                with self._lock:
+                    self._conn = None
+                if conn is not None:
+                    conn.close()
+
+
+class ServiceProbes:
+    """Periodic, concurrent TCP reachability checks for host services."""
+
+    def __init__(self, targets):
+        self.targets = targets  # {name: (host, port)}
+        self._results = {name: False for name in targets}
+        self._ready = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(targets)),
+                                        thread_name_prefix="probe")
+        threading.Thread(target=self._run, daemon=True).start()
+
+    @staticmethod
+    def _probe(addr):
+        try:
+            socket.create_connection(addr, timeout=PROBE_TIMEOUT).close()
+            return True
+        except OSError:
+            return False
+
+    def _run(self):
+        while True:
+            futures = {name: self._pool.submit(self._probe, addr)
+                       for name, addr in self.targets.items()}
+            self._results = {name: f.result() for name, f in futures.items()}
+            self._ready.set()
+            time.sleep(PROBE_INTERVAL)
+
+    def ready(self):
+        return self._ready.is_set()
+
+    def results(self, wait=PROBE_TIMEOUT + 0.5):
+        self._ready.wait(wait)
+        return dict(self._results)
@@ -0,0 +1,285 @@
+"""Shared container log streams — one Docker follow per container, filtered fan-out.
+
+Every viewer of a container's logs subscribes to a single ``LogFanout``,
+which holds one upstream ``/logs?follow=1`` connection to the Docker
+daemon plus a ring of recent lines.  Each subscriber has its own grep /
+level filter, applied on the server so only matching lines are queued, and
+a bounded queue so a slow viewer drops old lines instead of growing memory.
+The upstream connection is closed when the last viewer leaves, and the
+ring with it, so the next viewer is primed with a fresh backlog rather than
+a replay of the idle gap.
+"""
+
+import collections
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+import docker_api
+
+logger = logging.getLogger(__name__)
+
+RECENT_LINES = 1000       # ring kept per container for new viewers' backlog
+SUBSCRIBER_QUEUE = 2000   # max undelivered lines per viewer
+HISTORY_MAX_LINES = 5000  # cap for one-shot ?since= history fetches
+RECONNECT_DELAY = 3       # seconds before re-following after upstream ends
+
+LEVELS = {"debug": 10, "info": 20, "warn": 30, "warning": 30,
+          "error": 40, "critical": 50, "fatal": 50}
+_LEVEL_RE = re.compile(r"\b(DEBUG|INFO|WARN(?:ING)?|ERROR|CRITICAL|FATAL)\b", re.IGNORECASE)
+_SINCE_RE = re.compile(r"^(\d+)([smhd])$")
+
+
+class LogFilter:
+    """Server-side line filter: optional regex and minimum log level."""
+
+    def __init__(self, grep=None, level=None):
+        self.grep = re.compile(grep, re.IGNORECASE) if grep else None
+        self.min_level = None
+        if level:
+            if level.lower() not in LEVELS:
+                raise ValueError(f"unknown level '{level}'")
+            self.min_level = LEVELS[level.lower()]
+
+    def matches(self, line):
+        if self.grep is not None and not self.grep.search(line):
+            return False
+        if self.min_level is not None:
+            m = _LEVEL_RE.search(line)
+            if not m or LEVELS[m.group(1).lower()] < self.min_level:
+                return False
+        return True
+
+
+def parse_since(value):
+    """Accept a UNIX timestamp or a relative age like ``15m`` / ``2h``."""
+    if not value:
+        return None
+    m = _SINCE_RE.match(value.strip())
+    if m:
+        scale = {"s": 1, "m": 60, "h": 3600, "d": 86400}[m.group(2)]
+        return time.time() - int(m.group(1)) * scale
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError("since must be a UNIX timestamp or an age like 15m")
+
+
+def _ts_ns(ts):
+    """RFC3339Nano timestamp from Docker -> integer nanoseconds (sortable)."""
+    try:
+        base, _, frac = ts.rstrip("Z").partition(".")
+        secs = datetime.strptime(base, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+        return int(secs) * 1_000_000_000 + int((frac + "000000000")[:9])
+    except ValueError:
+        return 0
+
+
+def _entry(stream, raw):
+    ts, _, line = raw.partition(" ")
+    return {"ts": ts, "stream": stream, "line": line, "_ns": _ts_ns(ts)}
+
+
+def public(entry):
+    """Strip internal keys before sending an entry to a client."""
+    return {k: v for k, v in entry.items() if not k.startswith("_")}
+
+
+class Subscription:
+    """One viewer's filtered, bounded queue of log entries."""
+
+    def __init__(self, fanout, flt, after_ns=0):
+        self.fanout = fanout
+        self.filter = flt
+        self.dropped = 0
+        self.after_ns = after_ns  # ignore entries at or before this timestamp
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        # Optional callback for non-thread readers (the hub's event loop);
+        # called after every put/close, from the fanout thread.
+        self.wakeup = None
+
+    def _wake(self):
+        if self.wakeup is not None:
+            self.wakeup()
+
+    def put(self, entry):
+        if entry.get("_ns") and entry["_ns"] <= self.after_ns:
+            return
+        if "line" in entry and not self.filter.matches(entry["line"]):
+            return
+        with self._cond:
+            if len(self._queue) >= SUBSCRIBER_QUEUE:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(entry)
+            self._cond.notify()
+        self._wake()
+
+    def get(self, timeout):
+        """Return queued entries (possibly empty on timeout), or None once closed."""
+        with self._cond:
+            if not self._queue and not self._closed:
+                self._cond.wait(timeout)
+            if self._closed and not self._queue:
+                return None
+            entries = list(self._queue)
+            self._queue.clear()
+            return entries
+
+    def take_dropped(self):
+        with self._cond:
+            n, self.dropped = self.dropped, 0
+            return n
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._wake()
+        self.fanout.unsubscribe(self)
+
+
+class LogFanout:
+    """Single upstream follow of one container's logs, shared by viewers."""
+
+    def __init__(self, container):
+        self.container = container
+        self.recent = collections.deque(maxlen=RECENT_LINES)
+        self._subs = set()
+        self._lock = threading.Lock()
+        self._prime_lock = threading.Lock()
+        self._conn = None
+        self._thread = None
+        self._last_ns = 0
+
+    def _prime(self):
+        """Fill the recent-lines ring before the first follow starts, so the
+        first viewer gets its backlog the same way later ones do."""
+        started = time.time_ns()
+        try:
+            conn, resp, tty = docker_api.open_logs(self.container, follow=False, tail=RECENT_LINES)
+            try:
+                entries = [_entry(s, raw) for s, raw in docker_api.iter_log_lines(resp, tty)]
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning("Log backlog for %s failed: %s", self.container, e)
+            entries = []
+        with self._lock:
+            self.recent.extend(entries)
+            self._last_ns = max([started] + [e["_ns"] for e in entries[-1:]])
+
+    def subscribe(self, flt, tail=100, after_ns=0):
+        with self._prime_lock:
+            with self._lock:
+                cold = self._thread is None and not self._last_ns
+            if cold:
+                self._prime()
+        sub = Subscription(self, flt, after_ns)
+        with self._lock:
+            if tail:
+                backlog = [e for e in self.recent if flt.matches(e["line"])]
+                for entry in backlog[-tail:]:
+                    sub.put(entry)
+            self._subs.add(sub)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+            if self._subs:
+                return
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            # Unblocks the reader thread, which then sees no subscribers and exits
+            try:
+                conn.sock.shutdown(2)
+            except Exception:
+                pass
+            conn.close()
+
+    def _broadcast(self, entry):
+        with self._lock:
+            subs = list(self._subs)
+        for sub in subs:
+            sub.put(entry)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subs:
+                    # Idle from here on: the next viewer re-primes instead of
+                    # being sent stale backlog and then the whole gap
+                    self._thread = None
+                    self._last_ns = 0
+                    self.recent.clear()
+                    return
+            try:
+                with self._lock:
+                    since = self._last_ns // 1_000_000_000 if self._last_ns else int(time.time())
+                conn, resp, tty = docker_api.open_logs(self.container, follow=True, since=since)
+                with self._lock:
+                    orphaned = not self._subs
+                    if not orphaned:
+                        self._conn = conn
+                if orphaned:
+                    # The last viewer left while connecting, before there was
+                    # a connection for unsubscribe() to shut down
+                    conn.close()
+                    continue
+                for stream, raw in docker_api.iter_log_lines(resp, tty):
+                    entry = _entry(stream, raw)
+                    with self._lock:
+                        if entry["_ns"] and entry["_ns"] <= self._last_ns:
+                            continue  # overlap after a reconnect
+                        self._last_ns = entry["_ns"] or self._last_ns
+                        self.recent.append(entry)
+                    self._broadcast(entry)
+            except Exception as e:
+                with self._lock:
+                    active = bool(self._subs)
+                if active:
+                    logger.warning("Log stream for %s failed: %s", self.container, e)
+                    self._broadcast({"error": str(e)})
+            finally:
+                with self._lock:
+                    conn, self._conn = self._conn, None
+                if conn is not None:
+                    conn.close()
+            time.sleep(RECONNECT_DELAY)
+
+
+_fanouts = {}  # container name -> LogFanout
+_fanouts_lock = threading.Lock()
+
+
+def subscribe(container, flt, tail=100, after_ns=0):
+    """Join (or start) the shared stream for ``container``.
+
+    Entries timestamped at or before ``after_ns`` are not queued; a viewer
+    that reads ``history(..., until_ns=after_ns)`` gets each line once.
+    """
+    with _fanouts_lock:
+        fanout = _fanouts.get(container)
+        if fanout is None:
+            fanout = _fanouts[container] = LogFanout(container)
+    return fanout.subscribe(flt, tail, after_ns)
+
+
+def history(container, flt, since, tail=HISTORY_MAX_LINES, until_ns=None):
+    """One-shot, non-following fetch of filtered lines since ``since``
+    (and, with ``until_ns``, up to that timestamp)."""
+    conn, resp, tty = docker_api.open_logs(container, follow=False,
+                                           since=int(since), tail=tail)
+    try:
+        return [e for e in (_entry(s, raw) for s, raw in docker_api.iter_log_lines(resp, tty))
+                if flt.matches(e["line"]) and (until_ns is None or e["_ns"] <= until_ns)]
+    finally:
+        conn.close()
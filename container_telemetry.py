@@ -0,0 +1,306 @@
+"""Per-container CPU/memory telemetry sampled from Docker stats into ring buffers.
+
+Samples land in several fixed-size ``RingSeries`` at different resolutions
+(5 s for the last hour, 1 min for the last day).  Each series stores its
+fields in preallocated ``array('d')`` columns indexed by time slot, so
+memory is constant and there are no per-sample objects.
+
+One worker samples (see ``app._telemetry_loop``) and publishes each ring
+to its own binary file, ``data/telemetry/<container>.<res>.ring`` (header,
+then the raw columns).  After a round only the slots it touched and the
+header are rewritten in place, so publishing costs one slot per ring, not
+the whole history.  The other workers answer ``history`` by reading those
+files back into arrays, so every worker serves the same series and Docker
+is polled once.  The sampling worker reloads the files when it takes over,
+so history survives restarts.
+"""
+
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import docker_api
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 5  # seconds
+FIELDS = ("cpu", "mem_mb", "mem_pct")
+RESOLUTIONS = {
+    "5s": (5, 720),    # 1 hour
+    "1m": (60, 1440),  # 24 hours
+}
+# step, capacity, first_slot, last_slot (-1: empty), version (bumped on every write)
+HEADER = struct.Struct("<qqqqq")
+
+
+class RingSeries:
+    """Fixed-capacity, slot-aligned time series with one typed array per field.
+
+    A sample at time ``ts`` falls into slot ``ts // step``; several samples
+    in one slot are averaged.  Slots skipped between samples read as gaps.
+    """
+
+    def __init__(self, step, capacity, fields=FIELDS):
+        self.step = step
+        self.capacity = capacity
+        self.fields = fields
+        self._cols = {f: array("d", [math.nan]) * capacity for f in fields}
+        self._counts = array("H", [0]) * capacity
+        self.first_slot = None
+        self.last_slot = None
+        self.dirty = None  # (first, last) slots changed since the last write_to
+        self.version = 0
+
+    def add(self, ts, values):
+        slot = int(ts // self.step)
+        if self.last_slot is not None and slot < self.last_slot:
+            return  # out of order — ignore
+        if self.last_slot is None or slot > self.last_slot:
+            first = slot if self.last_slot is None else max(self.last_slot + 1, slot - self.capacity + 1)
+            self.dirty = (first if self.dirty is None else self.dirty[0], slot)
+            for s in range(first, slot + 1):
+                i = s % self.capacity
+                self._counts[i] = 0
+                for col in self._cols.values():
+                    col[i] = math.nan
+            self.last_slot = slot
+            if self.first_slot is None:
+                self.first_slot = slot
+        elif self.dirty is None:
+            self.dirty = (slot, slot)
+        i = slot % self.capacity
+        n = self._counts[i] + 1
+        self._counts[i] = min(n, 65535)
+        for f, col in self._cols.items():
+            x = values.get(f)
+            if x is None:
+                continue
+            col[i] = x if n == 1 or math.isnan(col[i]) else col[i] + (x - col[i]) / n
+
+    def export(self, since=None):
+        """Compact columnar dict: ``start`` (epoch s), ``step`` and one list
+        per field, oldest first, with gaps as None."""
+        if self.last_slot is None:
+            return {"start": None, "step": self.step, **{f: [] for f in self.fields}}
+        first = max(self.first_slot, self.last_slot - self.capacity + 1)
+        if since is not None:
+            first = max(first, int(since // self.step))
+        slots = range(first, self.last_slot + 1)
+        out = {"start": first * self.step, "step": self.step}
+        for f, col in self._cols.items():
+            out[f] = [None if math.isnan(v) else round(v, 2)
+                      for v in (col[s % self.capacity] for s in slots)]
+        return out
+
+    # -- binary file: HEADER, one float64 column per field, then the counts --
+
+    def _header(self):
+        self.version += 1
+        return HEADER.pack(self.step, self.capacity,
+                           -1 if self.first_slot is None else self.first_slot,
+                           -1 if self.last_slot is None else self.last_slot, self.version)
+
+    @property
+    def nbytes(self):
+        """Size of ``to_bytes()``."""
+        return HEADER.size + self.capacity * (8 * len(self.fields) + 2)
+
+    def to_bytes(self):
+        return self._header() + b"".join(
+            [self._cols[f].tobytes() for f in self.fields] + [self._counts.tobytes()])
+
+    @classmethod
+    def from_bytes(cls, data, fields=FIELDS):
+        """The ring stored in ``data``; ValueError if it is truncated or corrupt."""
+        step, capacity, first, last, version = HEADER.unpack_from(data)
+        if step <= 0 or capacity <= 0 or len(data) != HEADER.size + capacity * (8 * len(fields) + 2):
+            raise ValueError("not a ring file of this layout")
+        ring = cls(step, capacity, fields)
+        col_bytes = capacity * 8
+        offset = HEADER.size
+        for f in fields:
+            ring._cols[f] = array("d", data[offset:offset + col_bytes])
+            offset += col_bytes
+        ring._counts = array("H", data[offset:])
+        ring.first_slot = None if first < 0 else first
+        ring.last_slot = None if last < 0 else last
+        ring.version = version
+        return ring
+
+    def write_to(self, fd):
+        """Write the slots changed since the last call, then the header, at
+        their offsets in ``fd`` (a file holding this ring's ``to_bytes``)."""
+        if self.dirty is None:
+            return
+        first, last = self.dirty
+        slots = sorted({s % self.capacity for s in range(max(first, last - self.capacity + 1),
+                                                          last + 1)})
+        col_bytes = self.capacity * 8
+        for i in slots:
+            for n, f in enumerate(self.fields):
+                os.pwrite(fd, self._cols[f][i:i + 1].tobytes(), HEADER.size + n * col_bytes + i * 8)
+            os.pwrite(fd, self._counts[i:i + 1].tobytes(),
+                      HEADER.size + len(self.fields) * col_bytes + i * 2)
+        os.pwrite(fd, self._header(), 0)
+        self.dirty = None
+
+
+def _size(path):
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return None
+
+
+class ContainerTelemetry:
+    """Docker stats for a set of containers, sampled by one worker and shared by file."""
+
+    def __init__(self, containers, interval=SAMPLE_INTERVAL, data_dir=None):
+        data_dir = data_dir or DATA_DIR
+        os.makedirs(data_dir, exist_ok=True)
+        self.containers = list(containers)
+        self.interval = interval
+        self.dir = os.path.join(data_dir, "telemetry")
+        os.makedirs(self.dir, exist_ok=True)
+        self._series = {name: {res: RingSeries(step, cap) for res, (step, cap) in RESOLUTIONS.items()}
+                        for name in self.containers}
+        self._prev_cpu = {}  # name -> (container_cpu_ns, system_cpu_ns)
+        self._sampling = False  # True in the worker that runs sample_once
+        self._cache = {}  # path -> (inode and header, RingSeries) for the other workers
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(8, len(self.containers))),
+                                        thread_name_prefix="stats")
+
+    def _sample(self, name):
+        stats = docker_api.get_json(f"/containers/{name}/stats",
+                                    {"stream": "false", "one-shot": "true"})
+        cpu = stats.get("cpu_stats", {})
+        total = cpu.get("cpu_usage", {}).get("total_usage")
+        system = cpu.get("system_cpu_usage")
+        ncpu = cpu.get("online_cpus") or len(cpu.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+        cpu_pct = None
+        prev = self._prev_cpu.get(name)
+        if total is not None and system is not None:
+            if prev and system > prev[1]:
+                cpu_pct = (total - prev[0]) / (system - prev[1]) * ncpu * 100.0
+            self._prev_cpu[name] = (total, system)
+
+        mem = stats.get("memory_stats", {})
+        detail = mem.get("stats", {})
+        # Match `docker stats`: exclude page cache (cgroup v2 / v1 key names)
+        cache = detail.get("inactive_file", detail.get("total_inactive_file", detail.get("cache", 0)))
+        usage = mem.get("usage")
+        limit = mem.get("limit")
+        mem_mb = mem_pct = None
+        if usage is not None:
+            used = max(0, usage - cache)
+            mem_mb = used / (1024 * 1024)
+            if limit:
+                mem_pct = used / limit * 100.0
+        return {"cpu": cpu_pct, "mem_mb": mem_mb, "mem_pct": mem_pct}
+
+    def sample_once(self):
+        """Sample every container once and publish the rings."""
+        if not self._sampling:
+            self._restore()
+            self._sampling = True
+        started = time.time()
+        futures = {name: self._pool.submit(self._sample, name) for name in self.containers}
+        for name, fut in futures.items():
+            try:
+                values = fut.result()
+            except Exception as e:
+                logger.debug("Stats for %s failed: %s", name, e)
+                continue
+            with self._lock:
+                for series in self._series.get(name, {}).values():
+                    series.add(started, values)
+        self._publish()
+
+    def _path(self, name, res):
+        return os.path.join(self.dir, f"{name}.{res}.ring")
+
+    def _restore(self):
+        """Pick up the rings the previous sampling worker published."""
+        with self._lock:
+            for name, by_res in self._series.items():
+                for res, series in by_res.items():
+                    saved = self._read(name, res)
+                    if saved is not None and series.last_slot is None and \
+                            (saved.step, saved.capacity) == (series.step, series.capacity):
+                        by_res[res] = saved
+            self._cache.clear()
+
+    def _publish(self):
+        """Write each ring's changed slots in place; a missing or mismatched
+        file is written whole."""
+        with self._lock:
+            for name, by_res in self._series.items():
+                for res, series in by_res.items():
+                    path = self._path(name, res)
+                    try:
+                        if _size(path) != series.nbytes:
+                            tmp = f"{path}.{os.getpid()}.tmp"
+                            with open(tmp, "wb") as f:
+                                f.write(series.to_bytes())
+                            os.replace(tmp, path)
+                            series.dirty = None
+                            continue
+                        fd = os.open(path, os.O_WRONLY)
+                        try:
+                            series.write_to(fd)
+                        finally:
+                            os.close(fd)
+                    except OSError as e:
+                        logger.warning("Failed to publish telemetry for %s: %s", name, e)
+
+    def _read(self, name, res):
+        """The published ring for ``name`` at ``res``, re-read when its header
+        (whose version every write bumps, last) changes."""
+        path = self._path(name, res)
+        try:
+            with open(path, "rb") as f:
+                stamp = (os.fstat(f.fileno()).st_ino, f.read(HEADER.size))
+                cached = self._cache.get(path)
+                if cached is None or cached[0] != stamp:
+                    cached = self._cache[path] = (stamp, RingSeries.from_bytes(stamp[1] + f.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning("Unreadable telemetry ring %s: %s", path, e)
+            return None
+        return cached[1]
+
+    def set_containers(self, containers):
+        """Replace the sampled set, keeping history for containers that stay."""
+        containers = list(containers)
+        with self._lock:
+            self._series = {name: self._series.get(name) or
+                            {res: RingSeries(step, cap) for res, (step, cap) in RESOLUTIONS.items()}
+                            for name in containers}
+            self.containers = containers
+        for name in list(self._prev_cpu):
+            if name not in self._series:
+                self._prev_cpu.pop(name, None)
+
+    def history(self, res, names=None, since=None):
+        """Return ``{container: export}`` at resolution ``res``.
+
+        The sampling worker answers from memory, the others from the
+        published file.
+        """
+        names = self.containers if names is None else [n for n in names if n in self._series]
+        if self._sampling:
+            with self._lock:
+                return {name: self._series[name][res].export(since) for name in names}
+        out = {}
+        for name in names:
+            ring = self._read(name, res) or RingSeries(*RESOLUTIONS[res])
+            out[name] = ring.export(since)
+        return out
@@ -0,0 +1,138 @@
+"""Docker Engine API client over the local Unix socket."""
+
+import http.client
+import json
+import os
+import socket
+import urllib.parse
+
+DOCKER_SOCKET = os.environ.get("DOCKER_SOCKET", "/var/run/docker.sock")
+API_TIMEOUT = 5  # seconds
+
+STREAM_NAMES = {0: "stdin", 1: "stdout", 2: "stderr"}
+
+
+class DockerError(RuntimeError):
+    """Non-2xx response from the Docker daemon."""
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._socket_path)
+
+
+def _url(path, params=None):
+    if params:
+        clean = {k: v for k, v in params.items() if v is not None}
+        if clean:
+            return f"{path}?{urllib.parse.urlencode(clean)}"
+    return path
+
+
+def open_stream(path, params=None, timeout=None):
+    """Issue a GET and return ``(conn, resp)`` for incremental reading.
+
+    The caller owns the connection and must close it.  ``timeout=None``
+    blocks indefinitely, which is what long-lived follow streams want.
+    """
+    conn = _UnixHTTPConnection(DOCKER_SOCKET, timeout=timeout)
+    try:
+        conn.request("GET", _url(path, params))
+        resp = conn.getresponse()
+    except Exception:
+        conn.close()
+        raise
+    if resp.status >= 300:
+        body = resp.read().decode("utf-8", errors="replace")
+        conn.close()
+        try:
+            body = json.loads(body).get("message", body)
+        except ValueError:
+            pass
+        raise DockerError(f"Docker API {resp.status}: {body}")
+    return conn, resp
+
+
+def get_json(path, params=None, timeout=API_TIMEOUT):
+    conn, resp = open_stream(path, params, timeout=timeout)
+    try:
+        return json.loads(resp.read())
+    finally:
+        conn.close()
+
+
+def list_containers(all=True, filters=None):
+    params = {"all": "true" if all else None}
+    if filters:
+        params["filters"] = json.dumps(filters)
+    return get_json("/containers/json", params)
+
+
+def inspect_container(name):
+    return get_json(f"/containers/{urllib.parse.quote(name)}/json")
+
+
+def iter_log_frames(resp, tty):
+    """Yield ``(stream_name, bytes)`` chunks from a /logs response.
+
+    Non-TTY containers multiplex stdout/stderr with an 8-byte header per
+    frame (stream id, 3 padding bytes, big-endian payload length); TTY
+    containers send a raw stream which is reported as stdout.
+    """
+    if tty:
+        while True:
+            chunk = resp.read1(65536)
+            if not chunk:
+                return
+            yield "stdout", chunk
+    while True:
+        header = resp.read(8)
+        if len(header) < 8:
+            return
+        size = int.from_bytes(header[4:8], "big")
+        payload = resp.read(size)
+        if len(payload) < size:
+            return
+        yield STREAM_NAMES.get(header[0], "stdout"), payload
+
+
+def iter_log_lines(resp, tty):
+    """Yield ``(stream_name, line)`` from a /logs response, one per line.
+
+    Frames are not guaranteed to end on a newline, so partial lines are
+    carried over per stream until completed.
+    """
+    partial = {}
+    for stream, chunk in iter_log_frames(resp, tty):
+        buf = partial.get(stream, b"") + chunk
+        *lines, rest = buf.split(b"\n")
+        partial[stream] = rest
+        for line in lines:
+            yield stream, line.rstrip(b"\r").decode("utf-8", errors="replace")
+    for stream, rest in partial.items():
+        if rest:
+            yield stream, rest.decode("utf-8", errors="replace")
+
+
+def open_logs(name, follow=False, since=None, tail=None, timestamps=True):
+    """Open a /logs stream; returns ``(conn, resp, tty)``."""
+    tty = bool(inspect_container(name).get("Config", {}).get("Tty"))
+    conn, resp = open_stream(
+        f"/containers/{urllib.parse.quote(name)}/logs",
+        {
+            "stdout": 1,
+            "stderr": 1,
+            "follow": 1 if follow else 0,
+            "timestamps": 1 if timestamps else 0,
+            "since": since,
+            "tail": tail if tail is not None else "all",
+        },
+        timeout=None if follow else API_TIMEOUT,
+    )
+    return conn, resp, tty
@@ -1,7 +1,33 @@
 #!/bin/bash
 set -e
 
+# The asyncio hub (hub.py) is the front door on :8080 and serves WebSockets
+# and SSE; gunicorn handles everything else on loopback.  HUB_ENABLED=0
+# serves it all from gunicorn as before.
+if [ "${HUB_ENABLED:-1}" = "1" ]; then
+    gunicorn app:app \
+        --config gunicorn.conf.py \
+        --bind 127.0.0.1:8081 \
+        --worker-class gthread \
+        --workers 2 \
+        --threads 8 \
+        --timeout 600 \
+        --access-logfile - \
+        --error-logfile - &
+    python hub.py &
+    # Run as a pair: if either exits, stop the other and exit with its
+    # status so the container restarts instead of running half a portal.
+    trap 'kill $(jobs -p) 2>/dev/null' TERM INT
+    set +e
+    wait -n
+    status=$?
+    kill $(jobs -p) 2>/dev/null
+    wait
+    exit $status
+fi
+
 exec gunicorn app:app \
+    --config gunicorn.conf.py \
     --bind 0.0.0.0:8080 \
     --worker-class gthread \
     --workers 2 \
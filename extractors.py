@@ -0,0 +1,291 @@
+"""Bot stats extractors and the shared per-cycle fetch plan.
+
+An extractor is registered under the name bots use as ``pnl_extractor``
+and declares the endpoints it reads (``health`` -> ``health_endpoint``,
+``status`` -> ``status_endpoint``, ...).  ``FetchPlan.collect`` requests
+each (bot, endpoint) pair once per cycle, concurrently, and hands the same
+``BotRecord``s to every consumer — overview, capital and history — so a
+new bot type is one decorated function here.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CYCLE_SECONDS = 5  # results younger than this are shared, not refetched
+DEFAULT_ENDPOINTS = {"status": "/api/status", "pnl": "/api/pnl"}
+
+
+@dataclass
+class BotRecord:
+    """Normalized bot stats; None fields are omitted from ``to_dict()``."""
+
+    healthy: bool = False
+    mode: str = "UNKNOWN"
+    pnl: float = 0.0
+    running: Optional[bool] = None
+    win_rate: Optional[float] = None
+    completed: Optional[int] = None
+    wins: Optional[int] = None
+    open_positions: Optional[int] = None
+    realized_pnl: Optional[float] = None
+    daily_trades: Optional[int] = None
+    status: Optional[str] = None
+    bot_running: Optional[bool] = None
+    ws_connected: Optional[bool] = None
+    error: Optional[str] = None
+
+    def to_dict(self):
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+@dataclass(frozen=True)
+class Extractor:
+    name: str
+    fn: Callable
+    endpoints: tuple = ("health",)   # all must succeed
+    optional: tuple = ()             # fetched too; missing on failure
+
+
+EXTRACTORS = {}
+
+
+def extractor(name, endpoints=("health",), optional=()):
+    """Register ``fn(responses) -> BotRecord`` for bots with ``pnl_extractor=name``.
+
+    ``responses`` maps endpoint names to parsed JSON; optional endpoints
+    that failed are absent.
+    """
+    def register(fn):
+        EXTRACTORS[name] = Extractor(name, fn, tuple(endpoints), tuple(optional))
+        return fn
+    return register
+
+
+def endpoint_path(cfg, endpoint):
+    return cfg.get(f"{endpoint}_endpoint") or DEFAULT_ENDPOINTS[endpoint]
+
+
+# ---------------------------------------------------------------------------
+# Extractors
+# ---------------------------------------------------------------------------
+
+@extractor("bounce_back")
+def _bounce_back(r):
+    data = r["health"]
+    summary = data.get("summary", {})
+    return BotRecord(
+        healthy=data.get("running", False),
+        running=data.get("running", False),
+        mode=(data.get("mode") or "PAPER").upper(),
+        pnl=round(summary.get("total_pnl", 0), 3),
+        completed=summary.get("settled", 0),
+        wins=summary.get("wins", 0),
+        win_rate=round(summary.get("win_rate", 0) * 100, 1),
+        open_positions=summary.get("open", 0),
+    )
+
+
+@extractor("weather")
+def _weather(r):
+    data = r["health"]
+    pt = data.get("paper_trading", {})
+    lt = data.get("live_trading", {})
+    armed = lt.get("armed", False)
+    realized = pt.get("realized_pnl", 0) / 100.0
+    balance = pt.get("current_balance", 0) / 100.0
+    starting = pt.get("starting_balance", 0) / 100.0
+    return BotRecord(
+        healthy=True,
+        mode="LIVE" if armed else "PAPER",
+        pnl=round(balance - starting, 2),
+        realized_pnl=round(realized, 2),
+        open_positions=pt.get("open_positions_count", 0),
+        daily_trades=pt.get("daily_trades", 0),
+    )
+
+
+@extractor("btc_range")
+def _btc_range(r):
+    data = r["health"]
+    pnl_sum = data.get("pnl_summary", {})
+    return BotRecord(
+        healthy=True,
+        mode=data.get("mode", "unknown").upper(),
+        running=data.get("running", False),
+        pnl=round(pnl_sum.get("total_pnl", 0), 2),
+        win_rate=round(pnl_sum.get("win_rate", 0) * 100, 1),
+        completed=pnl_sum.get("completed", 0),
+        wins=pnl_sum.get("wins", 0),
+    )
+
+
+@extractor("sports_arb", optional=("status",))
+def _sports_arb(r):
+    # Health endpoint has no P&L; it comes from the status endpoint
+    health = r["health"]
+    rec = BotRecord(
+        healthy=health.get("status") == "healthy",
+        bot_running=health.get("bot_running", False),
+        ws_connected=health.get("websocket_connected", False),
+    )
+    if "status" in r:
+        pnl_sum = r["status"].get("pnl_summary", {})
+        bot_st = r["status"].get("bot_status", {})
+        rec.mode = "LIVE" if not bot_st.get("dry_run", True) else "DRY RUN"
+        rec.pnl = round(pnl_sum.get("total_pnl", 0) / 100.0, 2)
+        rec.win_rate = round(pnl_sum.get("win_rate", 0) * 100, 1)
+        rec.completed = pnl_sum.get("completed", 0)
+        rec.wins = pnl_sum.get("wins", 0)
+        rec.status = bot_st.get("status", "unknown")
+    return rec
+
+
+# Bots without a known extractor are only health-checked
+_HEALTH_ONLY = Extractor("", lambda r: BotRecord())
+
+
+# ---------------------------------------------------------------------------
+# Fetch plan
+# ---------------------------------------------------------------------------
+
+class FetchPlan:
+    """Single-flight, per-cycle collection of ``BotRecord``s for all bots.
+
+    ``fetch(bot_id, path)`` returns parsed JSON or raises.  Callers arriving
+    while a cycle is running wait for it instead of starting their own, and
+    results are reused for ``max_age`` seconds.  ``on_cycle(records)`` runs
+    once per fresh cycle.  ``pushed(snapshot)`` returns ``{bot_id: BotRecord}``
+    for bots that reported their own state recently (push_ingest.py); those
+    are not fetched, and their latest pushed records replace cached ones on
+    every call rather than once per cycle.
+
+    ``warm(records, as_of)`` seeds last-known records (warm_start.py) for
+    ``collect_warm`` to serve until this process finishes its first cycle.
+    """
+
+    def __init__(self, fetch, max_age=CYCLE_SECONDS, on_cycle=None, workers=8, pushed=None):
+        self.fetch = fetch
+        self.max_age = max_age
+        self.on_cycle = on_cycle
+        self.pushed = pushed
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="botfetch")
+        self._lock = threading.Lock()
+        self._records = None
+        self._key = None       # (registry version, finished at)
+        self._inflight = None  # Event set when the running cycle finishes
+        self._warm = None      # (records, as_of) until the first cycle finishes
+
+    def collect(self, snapshot):
+        """Return ``{bot_id: BotRecord}`` for ``snapshot.bots``."""
+        records = self._collect(snapshot)
+        pushed = self._pushed(snapshot)
+        return {**records, **pushed} if pushed else records
+
+    def warm(self, records, as_of):
+        """Seed records saved by an earlier process, fetched at ``as_of``."""
+        with self._lock:
+            if self._records is None:
+                self._warm = (records, as_of)
+
+    def collect_warm(self, snapshot):
+        """Like ``collect`` but returns ``(records, as_of)`` without waiting.
+
+        Before the first cycle finishes, and if ``warm`` seeded records,
+        those are returned with their ``as_of`` time while a cycle runs in
+        the background; otherwise ``as_of`` is None and the records are live.
+        """
+        with self._lock:
+            warm = self._warm if self._records is None else None
+            if warm is not None and self._inflight is None:
+                done = self._inflight = threading.Event()
+                threading.Thread(target=self._cycle, args=(snapshot, done), daemon=True,
+                                 name="botfetch-warm").start()
+        if warm is None:
+            return self.collect(snapshot), None
+        records, as_of = warm
+        records = {bot_id: r for bot_id, r in records.items() if bot_id in snapshot.bots}
+        pushed = self._pushed(snapshot)
+        return ({**records, **pushed} if pushed else records), as_of
+
+    def _pushed(self, snapshot):
+        if not self.pushed:
+            return {}
+        try:
+            return self.pushed(snapshot)
+        except Exception:
+            logger.exception("Reading pushed records failed; pulling every bot")
+            return {}
+
+    def _collect(self, snapshot):
+        with self._lock:
+            if (self._records is not None and self._key[0] == snapshot.version
+                    and time.time() - self._key[1] < self.max_age):
+                return self._records
+            done = self._inflight
+            if done is None:
+                done = self._inflight = threading.Event()
+                leader = True
+            else:
+                leader = False
+        if not leader:
+            done.wait()
+            return self._records or {}
+        return self._cycle(snapshot, done)
+
+    def _cycle(self, snapshot, done):
+        """Run one cycle as the leader and publish it; ``done`` is ``_inflight``."""
+        try:
+            records = self._run(snapshot)
+            with self._lock:
+                self._records, self._key = records, (snapshot.version, time.time())
+                self._warm = None
+        finally:
+            with self._lock:
+                self._inflight = None
+            done.set()
+        if self.on_cycle:
+            try:
+                self.on_cycle(records)
+            except Exception:
+                logger.exception("Fetch cycle hook failed")
+        return records
+
+    def _run(self, snapshot):
+        records = self._pushed(snapshot)
+        plans = {bot_id: EXTRACTORS.get(cfg.get("pnl_extractor"), _HEALTH_ONLY)
+                 for bot_id, cfg in snapshot.bots.items() if bot_id not in records}
+        futures = {}
+        for bot_id, ex in plans.items():
+            cfg = snapshot.bots[bot_id]
+            for endpoint in ex.endpoints + ex.optional:
+                path = endpoint_path(cfg, endpoint)
+                if (bot_id, path) not in futures:
+                    futures[bot_id, path] = self._pool.submit(self.fetch, bot_id, path)
+
+        for bot_id, ex in plans.items():
+            cfg = snapshot.bots[bot_id]
+            responses = {}
+            try:
+                for endpoint in ex.endpoints:
+                    responses[endpoint] = futures[bot_id, endpoint_path(cfg, endpoint)].result()
+            except Exception as e:
+                logger.error("Health check for %s failed: %s %s", bot_id, type(e).__name__, e)
+                records[bot_id] = BotRecord(error="Unreachable")
+                continue
+            for endpoint in ex.optional:
+                try:
+                    responses[endpoint] = futures[bot_id, endpoint_path(cfg, endpoint)].result()
+                except Exception:
+                    pass
+            try:
+                records[bot_id] = ex.fn(responses)
+            except Exception as e:
+                logger.error("Extractor %s for %s failed: %s", ex.name, bot_id, e)
+                records[bot_id] = BotRecord(error="Bad response")
+        return records
@@ -0,0 +1,8 @@
+"""Gunicorn server hooks — start each worker's background loops when it boots."""
+
+
+def post_worker_init(worker):
+    # Runs after the worker has imported app.py; without this the risk,
+    # reconcile and telemetry loops would wait for the worker's first request
+    import app
+    app.start_background()
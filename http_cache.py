@@ -0,0 +1,114 @@
+"""Response compression (br/gzip) and strong ETags for portal JSON and HTML.
+
+``finalize(request, response)`` runs as an ``after_request`` hook:
+
+* buffered 200 responses of text-like types get a strong ETag derived
+  from the body, and a matching ``If-None-Match`` becomes a bodiless 304;
+* bodies of at least ``MIN_BYTES`` are compressed with the best encoding
+  the client accepts.  Compressed bytes are kept in a small LRU keyed by
+  body hash, so unchanged bodies (the portal page, idle polls) are
+  compressed once rather than on every request.
+
+The ETag names the uncompressed body with the encoding appended
+(``"<hash>-br"``), so each representation has its own strong validator
+while a client switching encodings still revalidates.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+CACHE_ENTRIES = 64
+CACHE_MAX_BODY = 2 * 1024 * 1024   # bodies above this are compressed but not cached
+COMPRESSIBLE = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+_cache = OrderedDict()  # (digest, encoding) -> compressed bytes
+_cache_lock = threading.Lock()
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compressed(digest, body, encoding):
+    key = (digest, encoding)
+    with _cache_lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+            return data
+    data = _compress(body, encoding)
+    if len(body) <= CACHE_MAX_BODY:
+        with _cache_lock:
+            _cache[key] = data
+            while len(_cache) > CACHE_ENTRIES:
+                _cache.popitem(last=False)
+    return data
+
+
+def negotiate(accept_encoding):
+    """Pick ``br``, ``gzip`` or None from an Accept-Encoding header."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    for encoding in ("br", "gzip") if brotli else ("gzip",):
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def _client_tags(header):
+    """Base digests named in If-None-Match (encoding suffixes stripped)."""
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        tags.add(tag.rsplit("-", 1)[0] if tag.endswith(("-br", "-gzip")) else tag)
+    return tags
+
+
+def finalize(request, response):
+    if (request.method not in ("GET", "HEAD") or response.status_code != 200
+            or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or not response.mimetype.startswith(COMPRESSIBLE)):
+        return response
+    body = response.get_data()
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    encoding = negotiate(request.headers.get("Accept-Encoding", "")) if len(body) >= MIN_BYTES else None
+    response.vary.add("Accept-Encoding")
+    etag = f"{digest}-{encoding}" if encoding else digest
+    if "ETag" not in response.headers:
+        response.set_etag(etag)
+        if digest in _client_tags(request.headers.get("If-None-Match", "")):
+            response.status_code = 304
+            response.set_data(b"")
+            response.headers.pop("Content-Type", None)
+            response.headers.pop("Content-Length", None)
+            return response
+    if encoding:
+        response.set_data(_compressed(digest, body, encoding))
+        response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,863 @@
+"""Asyncio connection hub — long-lived WebSockets and SSE without gunicorn threads.
+
+The hub is the public front door (``HUB_PORT``).  It serves the long-lived
+endpoints itself on one event loop and reverse-proxies everything else to
+the gunicorn workers on ``UPSTREAM``:
+
+* ``/terminal/ws`` — SSH terminals.  Sessions live in the hub; each SSH
+  channel is read with ``loop.add_reader`` instead of a reader thread.
+* ``/api/claude`` and ``/api/claude/jobs/<id>/stream`` — job output is
+  tailed from the job directory.  Jobs are still submitted to and run by
+  the workers, which share the same ``data/claude_jobs`` directory.
+* ``/api/logs/<bot>/stream`` — container log fan-out (one Docker stream per
+  container, as before).
+* ``/api/overview/stream`` — push SSE of ``/api/overview``; the hub polls
+  the workers once per interval while anyone is subscribed and sends only
+  changes.
+* ``/api/federation/stream`` — the incremental snapshot stream a parent
+  portal follows; each poll of the workers' ``/api/mobile/sync`` and
+  ``/api/system`` is a short request instead of a thread held for good.
+* ``/proxy/<bot>/...`` WebSocket upgrades — relayed to the bot (or, in
+  federation mode, to the child portal that owns it), with one upstream
+  connection per URL shared by every browser subscribed to it.
+  Plain HTTP on these paths is proxied to the workers like everything else.
+
+An idle connection costs a coroutine and its buffers, not an OS thread.
+Blocking work (SSH connect, Docker log priming) runs in the default
+executor.  The paramiko transport still has its own thread per SSH session.
+
+    python hub.py    # with gunicorn bound to UPSTREAM (see entrypoint.sh)
+"""
+
+import asyncio
+import codecs
+import json
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from functools import partial, wraps
+from urllib.parse import urlencode
+
+from aiohttp import (BasicAuth, ClientSession, ClientTimeout, TCPConnector, WSCloseCode,
+                     WSMsgType, web)
+
+import container_logs
+import terminal_sessions
+from bot_registry import BotRegistry
+from claude_jobs import FINISHED, JobQueue
+from config import BOTS, BOT_HOST
+from federation import SYSTEM_EVERY, parse_nodes, system_changes
+from mobile_sync import POLL_MIN
+from ssh_relay import COALESCE_MAX_BYTES
+from ssh_shell import open_shell
+from ws_tokens import PORTAL_USER, PORTAL_PASS, validate_token
+
+logger = logging.getLogger(__name__)
+
+HUB_HOST = os.environ.get("HUB_HOST", "0.0.0.0")
+HUB_PORT = int(os.environ.get("HUB_PORT", "8080"))
+UPSTREAM = os.environ.get("HUB_UPSTREAM", "http://127.0.0.1:8081")
+AUTH_ENABLED = bool(PORTAL_USER and PORTAL_PASS)
+
+KEEPALIVE = 15             # seconds between SSE comments on a quiet stream
+CLAUDE_POLL = 0.25         # seconds between job output checks
+OVERVIEW_INTERVAL = int(os.environ.get("HUB_OVERVIEW_INTERVAL", "5"))
+WS_HEARTBEAT = 30          # seconds between WebSocket pings
+CLOSE_FLUSH = 2            # seconds to let final frames out before closing a socket
+
+# Hop-by-hop headers are never forwarded in either direction
+HOP_HEADERS = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+               "te", "trailers", "transfer-encoding", "upgrade", "host"}
+
+SSE_HEADERS = {"Content-Type": "text/event-stream", "Cache-Control": "no-cache",
+               "X-Accel-Buffering": "no"}
+
+
+def _auth_required(handler):
+    @wraps(handler)
+    async def decorated(request):
+        if AUTH_ENABLED:
+            auth = request.headers.get("Authorization", "")
+            try:
+                creds = BasicAuth.decode(auth)
+            except ValueError:
+                creds = None
+            if creds is None or creds.login != PORTAL_USER or creds.password != PORTAL_PASS:
+                return web.Response(status=401, text="Unauthorized",
+                                    headers={"WWW-Authenticate": 'Basic realm="Kalshi Portal"'})
+        return await handler(request)
+    return decorated
+
+
+def _json_error(message, status):
+    return web.json_response({"error": message}, status=status)
+
+
+def _worker_headers():
+    """Headers for the hub's own requests to the workers."""
+    headers = {"Accept-Encoding": "identity"}
+    if AUTH_ENABLED:
+        headers["Authorization"] = BasicAuth(PORTAL_USER, PORTAL_PASS).encode()
+    return headers
+
+
+def _sse(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n".encode()
+
+
+async def _open_sse(request, **headers):
+    resp = web.StreamResponse(headers=dict(SSE_HEADERS, **headers))
+    await resp.prepare(request)
+    return resp
+
+
+# ---------------------------------------------------------------------------
+# SSH terminal
+# ---------------------------------------------------------------------------
+
+class _ChannelReader:
+    """Feeds a session from its SSH channel on the event loop (no reader thread).
+
+    In block flow mode ``session.feed`` asks the reader to pause; the
+    session's ``on_drained`` hook resumes it once the client acks.
+    """
+
+    def __init__(self, loop, session):
+        self.loop = loop
+        self.session = session
+        self.channel = session.channel
+        self.channel.settimeout(0.0)
+        self.fd = self.channel.fileno()
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.active = False
+        self._loop_thread = threading.get_ident()
+        session.on_drained = lambda: loop.call_soon_threadsafe(self.resume)
+        session.on_close = self.stop
+        self.resume()
+
+    def resume(self):
+        if not self.active and not self.session.closed:
+            self.loop.add_reader(self.fd, self._readable)
+            self.active = True
+
+    def pause(self):
+        if self.active:
+            self.loop.remove_reader(self.fd)
+            self.active = False
+
+    def stop(self):
+        """Unregister the fd before the channel (and its pipe) is closed.
+
+        Sessions can be closed from the idle reaper thread, so hop onto the
+        loop and wait for the removal there.
+        """
+        if self.loop.is_closed():
+            return
+        if threading.get_ident() == self._loop_thread:
+            self.pause()
+            return
+        done = threading.Event()
+        self.loop.call_soon_threadsafe(lambda: (self.pause(), done.set()))
+        done.wait(5)
+
+    def _readable(self):
+        buf = bytearray()
+        eof = False
+        while len(buf) < COALESCE_MAX_BYTES:
+            try:
+                data = self.channel.recv(COALESCE_MAX_BYTES - len(buf))
+            except socket.timeout:
+                break
+            except Exception:
+                data = b""
+            if not data:
+                eof = True
+                break
+            buf += data
+            if not self.channel.recv_ready():
+                break
+        text = self.decoder.decode(bytes(buf), final=eof)
+        if text and self.session.feed(text.encode("utf-8")):
+            self.pause()
+        if eof:
+            self.pause()
+            self.loop.run_in_executor(None, self.session.close)
+
+
+async def _ws_error(ws, message, **extra):
+    await ws.send_str(json.dumps(dict({"type": "status", "status": "error",
+                                       "message": message}, **extra)))
+    await ws.close()
+
+
+async def terminal_ws(request):
+    """WebSocket terminal — the same protocol as the Flask fallback route."""
+    ws = web.WebSocketResponse(heartbeat=WS_HEARTBEAT)
+    await ws.prepare(request)
+    loop = asyncio.get_running_loop()
+
+    if AUTH_ENABLED and not validate_token(request.query.get("token", "")):
+        await _ws_error(ws, "Unauthorized — reload the page")
+        return ws
+
+    try:
+        msg = json.loads(await ws.receive_str(timeout=30))
+    except Exception:
+        await _ws_error(ws, "Invalid connect message")
+        return ws
+
+    if msg.get("type") == "attach":
+        session = terminal_sessions.get_session(msg.get("session_id"))
+        if session is None:
+            await _ws_error(ws, "Session expired", code="session_not_found")
+            return ws
+        offset = msg.get("offset")
+        offset = session.acked if offset is None else int(offset)
+    elif msg.get("type") == "connect":
+        try:
+            client, channel, label = await loop.run_in_executor(None, open_shell, msg)
+        except ValueError as e:
+            await _ws_error(ws, str(e))
+            return ws
+        session = terminal_sessions.open_session(client, channel, label,
+                                                 flow=msg.get("flow", "drop"), reader=False)
+        _ChannelReader(loop, session)
+        offset = 0
+    else:
+        await _ws_error(ws, "Expected connect message")
+        return ws
+
+    # The session calls ``send`` with its lock held, possibly from the
+    # reaper thread; frames are queued here and written by one task.  The
+    # client's credit window bounds how much can be queued.
+    outbox = asyncio.Queue()
+    send = partial(loop.call_soon_threadsafe, outbox.put_nowait)
+
+    async def pump():
+        while True:
+            frame = await outbox.get()
+            if isinstance(frame, str):
+                await ws.send_str(frame)
+            else:
+                await ws.send_bytes(frame)
+            if session.closed and outbox.empty():
+                # The shell exited; "disconnected" was the last frame
+                await ws.close()
+                return
+
+    writer = asyncio.ensure_future(pump())
+    session.attach(send, offset, {"type": "status", "status": "connected",
+                                  "message": f"Connected to {session.label}"},
+                   window=msg.get("window"), compress=msg.get("compress", False))
+
+    close_session = False
+    try:
+        async for raw in ws:
+            if raw.type != WSMsgType.TEXT:
+                continue
+            try:
+                msg = json.loads(raw.data)
+            except Exception:
+                continue
+            kind = msg.get("type")
+            # paramiko calls block on a stalled channel, so never on the loop;
+            # awaiting each keeps this client's keystrokes in order
+            if kind == "input":
+                data = msg.get("data", "").encode("utf-8")
+                if data:
+                    await loop.run_in_executor(None, session.write, data)
+            elif kind == "resize":
+                await loop.run_in_executor(None, session.resize, int(msg.get("cols", 80)),
+                                           int(msg.get("rows", 24)))
+            elif kind == "ack":
+                session.ack(msg.get("offset", 0))
+            elif kind == "close":
+                close_session = True
+                break
+    except Exception:
+        pass
+    finally:
+        session.detach(send)
+        if close_session:
+            await loop.run_in_executor(None, session.close)
+        # Let the final status frame out before tearing the socket down, unless
+        # the writer has already died or the client stopped reading
+        deadline = loop.time() + CLOSE_FLUSH
+        while (not outbox.empty() and not ws.closed and not writer.done()
+               and loop.time() < deadline):
+            await asyncio.sleep(0.01)
+        writer.cancel()
+        await ws.close()
+    return ws
+
+
+# ---------------------------------------------------------------------------
+# Claude job streams
+# ---------------------------------------------------------------------------
+
+_claude_jobs = None
+
+
+def _get_claude_jobs():
+    global _claude_jobs
+    if _claude_jobs is None:
+        # Workers run the jobs; the hub only reads them
+        _claude_jobs = JobQueue(None, 0, dispatch=False)
+    return _claude_jobs
+
+
+async def _claude_job_stream(request, job_id, offset=0):
+    """SSE of a job's output from byte ``offset``; event ids are offsets."""
+    jobs = _get_claude_jobs()
+    resp = await _open_sse(request, **{"X-Claude-Job-Id": job_id})
+    pos = offset
+    quiet_since = time.time()
+    try:
+        await resp.write(_sse({"type": "job", "id": job_id}))
+        while True:
+            # Check status before reading so the final lines are never missed
+            meta = jobs.get(job_id)
+            if meta is None:
+                await resp.write(_sse({"type": "error", "error": "Job no longer exists"}))
+                break
+            lines = jobs.read(job_id, pos)
+            for line, pos in lines:
+                await resp.write(f"id: {pos}\ndata: {line}\n\n".encode())
+            if lines:
+                quiet_since = time.time()
+                continue
+            if meta["status"] in FINISHED:
+                await resp.write(f"id: {pos}\ndata: [DONE]\n\n".encode())
+                break
+            if time.time() - quiet_since > KEEPALIVE:
+                quiet_since = time.time()
+                await resp.write(b": keepalive\n\n")
+            await asyncio.sleep(CLAUDE_POLL)
+    except ConnectionResetError:
+        pass
+    return resp
+
+
+@_auth_required
+async def claude_chat(request):
+    """Legacy one-shot endpoint: queue the prompt, then stream the job.
+
+    Submission goes through a worker (``POST /api/claude/jobs``) so its
+    dispatcher is running and picks the job up immediately.
+    """
+    body = await request.read()
+    headers = {k: v for k, v in request.headers.items()
+               if k.lower() in ("authorization", "content-type")}
+    try:
+        async with _upstream().post(UPSTREAM + "/api/claude/jobs", data=body,
+                                    headers=headers) as r:
+            payload = await r.read()
+            if r.status != 202:
+                return web.Response(status=r.status, body=payload,
+                                    content_type=r.content_type)
+    except Exception as e:
+        logger.warning("Claude job submit failed: %s", e)
+        return _json_error("Upstream unavailable", 502)
+    return await _claude_job_stream(request, json.loads(payload)["id"])
+
+
+@_auth_required
+async def claude_job_stream(request):
+    """Stream job output; resumes from ``?offset=`` or the Last-Event-ID header."""
+    job_id = request.match_info["job_id"]
+    if _get_claude_jobs().get(job_id) is None:
+        return _json_error(f"Unknown job: {job_id}", 404)
+    try:
+        offset = int(request.query.get("offset") or request.headers.get("Last-Event-ID") or 0)
+    except ValueError:
+        offset = 0
+    return await _claude_job_stream(request, job_id, max(0, offset))
+
+
+# ---------------------------------------------------------------------------
+# Container logs
+# ---------------------------------------------------------------------------
+
+_registry = None
+
+
+def _get_registry():
+    global _registry
+    if _registry is None:
+        _registry = BotRegistry(
+            BOTS, BOT_HOST,
+            path=os.environ.get("BOTS_FILE") or None,
+            docker_labels=os.environ.get("BOT_DISCOVERY", "") == "docker",
+        )
+    return _registry
+
+
+@_auth_required
+async def stream_bot_logs(request):
+    """Container log SSE — same query params as the Flask fallback route."""
+    bot_id = request.match_info["bot_id"]
+    snap = _get_registry().snapshot()
+    if bot_id not in snap:
+        return _json_error(f"Unknown bot: {bot_id}", 404)
+    container = snap.container[bot_id]
+    try:
+        flt = container_logs.LogFilter(grep=request.query.get("grep"),
+                                       level=request.query.get("level"))
+        since = container_logs.parse_since(request.query.get("since"))
+        tail = int(request.query.get("tail", 100))
+    except (re.error, ValueError) as e:
+        return _json_error(str(e), 400)
+    tail = max(0, min(tail, container_logs.RECENT_LINES))
+
+    loop = asyncio.get_running_loop()
+    resp = await _open_sse(request)
+    # With ?since, history covers up to the cutoff and the live stream after it
+    cutoff = time.time_ns() if since is not None else 0
+    sub = await loop.run_in_executor(None, container_logs.subscribe,
+                                     container, flt, 0 if since else tail, cutoff)
+    ready = asyncio.Event()
+    sub.wakeup = partial(loop.call_soon_threadsafe, ready.set)
+    try:
+        if since is not None:
+            try:
+                backlog = await loop.run_in_executor(
+                    None, partial(container_logs.history, container, flt, since, until_ns=cutoff))
+            except Exception as e:
+                await resp.write(_sse({"error": str(e)}, event="error"))
+                backlog = []
+            for entry in backlog:
+                await resp.write(_sse(container_logs.public(entry)))
+        while True:
+            entries = sub.get(0)
+            if entries is None:
+                break
+            if not entries:
+                try:
+                    await asyncio.wait_for(ready.wait(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    await resp.write(b": keepalive\n\n")
+                ready.clear()
+                continue
+            dropped = sub.take_dropped()
+            if dropped:
+                await resp.write(_sse({"count": dropped}, event="dropped"))
+            for entry in entries:
+                if "error" in entry:
+                    await resp.write(_sse(entry, event="error"))
+                else:
+                    await resp.write(_sse(container_logs.public(entry)))
+    except (ConnectionResetError, asyncio.CancelledError):
+        pass
+    finally:
+        sub.wakeup = None
+        await loop.run_in_executor(None, sub.close)
+    return resp
+
+
+# ---------------------------------------------------------------------------
+# Overview push
+# ---------------------------------------------------------------------------
+
+class OverviewFeed:
+    """Polls the workers' ``/api/overview`` while anyone listens; pushes changes.
+
+    Each subscriber holds a one-slot queue, so a slow reader only ever has
+    the latest body pending.
+    """
+
+    def __init__(self, interval=OVERVIEW_INTERVAL):
+        self.interval = interval
+        self.latest = None
+        self._subs = set()
+        self._task = None
+
+    def subscribe(self):
+        q = asyncio.Queue(maxsize=1)
+        if self.latest is not None:
+            q.put_nowait(self.latest)
+        self._subs.add(q)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return q
+
+    def unsubscribe(self, q):
+        self._subs.discard(q)
+
+    async def _run(self):
+        headers = _worker_headers()
+        while self._subs:
+            try:
+                async with _upstream().get(UPSTREAM + "/api/overview", headers=headers) as r:
+                    body = await r.read() if r.status == 200 else None
+            except Exception as e:
+                logger.warning("Overview poll failed: %s", e)
+                body = None
+            if body is not None and body != self.latest:
+                self.latest = body
+                for q in list(self._subs):
+                    if q.full():
+                        q.get_nowait()
+                    q.put_nowait(body)
+            await asyncio.sleep(self.interval)
+
+
+_overview_feed = None
+
+
+@_auth_required
+async def overview_stream(request):
+    """Push SSE of the overview JSON; one upstream poll serves every client."""
+    global _overview_feed
+    if _overview_feed is None:
+        _overview_feed = OverviewFeed()
+    resp = await _open_sse(request)
+    q = _overview_feed.subscribe()
+    try:
+        while True:
+            try:
+                body = await asyncio.wait_for(q.get(), KEEPALIVE)
+            except asyncio.TimeoutError:
+                await resp.write(b": keepalive\n\n")
+                continue
+            await resp.write(b"data: " + body.replace(b"\n", b"") + b"\n\n")
+    except (ConnectionResetError, asyncio.CancelledError):
+        pass
+    finally:
+        _overview_feed.unsubscribe(q)
+    return resp
+
+
+# ---------------------------------------------------------------------------
+# Federation stream (followed by a parent portal)
+# ---------------------------------------------------------------------------
+
+async def _worker_json(path, params=None):
+    async with _upstream().get(UPSTREAM + path, params=params, headers=_worker_headers()) as r:
+        r.raise_for_status()
+        return await r.json()
+
+
+@_auth_required
+async def federation_stream(request):
+    """SSE of incremental snapshots for a parent portal (as ``app.federation_stream``).
+
+    Every ``POLL_MIN`` seconds the stream asks the workers for a mobile_sync
+    delta against its own token, and every ``SYSTEM_EVERY`` seconds for
+    ``/api/system``.  If the workers fail the stream ends, so the parent
+    marks this node stale and reconnects with ``Last-Event-ID``.
+    """
+    token = request.headers.get("Last-Event-ID") or request.query.get("since")
+    resp = await _open_sse(request)
+    system, system_at = None, 0
+    try:
+        while True:
+            delta = await _worker_json("/api/mobile/sync", {"since": token} if token else None)
+            if "token" in delta:
+                token = delta.pop("token")
+                delta.pop("next_poll", None)
+                await resp.write(f"id: {token}\n".encode() + _sse(delta, event="sync"))
+            else:
+                await resp.write(b": keepalive\n\n")
+            if time.time() - system_at >= SYSTEM_EVERY:
+                system_at = time.time()
+                current = await _worker_json("/api/system")
+                changed = system_changes(system, current)
+                if changed:
+                    system = current
+                    await resp.write(_sse(changed, event="system"))
+            await asyncio.sleep(POLL_MIN)
+    except (ConnectionResetError, asyncio.CancelledError):
+        pass
+    except Exception as e:
+        logger.warning("Federation stream poll failed: %s", e)
+    return resp
+
+
+# ---------------------------------------------------------------------------
+# Bot WebSocket pass-through
+# ---------------------------------------------------------------------------
+
+STREAM_QUEUE = 256  # frames buffered per subscriber before it is dropped
+
+
+class BotStream:
+    """One upstream WebSocket to a bot, fanned out to every browser on the same URL.
+
+    Streams are keyed by bot, path, query and subprotocols.  Bot frames go
+    to every subscriber; subscriber frames are sent on the shared upstream
+    connection.  A subscriber that falls ``STREAM_QUEUE`` frames behind is
+    closed (1013) rather than silently skipping frames.  The upstream
+    closes once no browser is subscribed or waiting for it to open (the
+    last one left, was dropped, or gave up while it connected), and its
+    close ends every subscriber with the same code.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.ws = None
+        self.closed = False
+        self.opened = asyncio.get_running_loop().create_future()
+        self._subs = {}  # downstream ws -> asyncio.Queue
+        self.waiters = 0  # browsers awaiting ``opened``
+        self._attached = asyncio.Event()  # first subscriber sees the bot's first frame
+
+    async def run(self, url, headers, protocols):
+        try:
+            self.ws = await _upstream().ws_connect(url, headers=headers, protocols=protocols,
+                                                   heartbeat=WS_HEARTBEAT)
+        except Exception as e:
+            self._finish()
+            self.opened.set_exception(e)
+            return
+        self.opened.set_result(self.ws)
+        if self.closed:  # every browser left while it connected
+            await self.ws.close()
+            return
+        try:
+            await self._attached.wait()
+            async for msg in self.ws:
+                if msg.type in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    self._publish(msg)
+        finally:
+            self._finish()
+            for q in self._subs.values():
+                if q.full():
+                    q.get_nowait()
+                q.put_nowait(None)
+
+    def _finish(self):
+        self.closed = True
+        if _bot_streams.get(self.key) is self:
+            del _bot_streams[self.key]
+
+    def _publish(self, msg):
+        for ws, q in list(self._subs.items()):
+            try:
+                q.put_nowait(msg)
+            except asyncio.QueueFull:
+                logger.warning("Dropping slow subscriber of %s", self.key[0])
+                self._subs.pop(ws)
+                asyncio.ensure_future(ws.close(code=WSCloseCode.TRY_AGAIN_LATER,
+                                               message=b"Subscriber too slow"))
+        self.release_if_idle()
+
+    def subscribe(self, ws):
+        """Return the frame queue for ``ws``, or None if the stream has ended."""
+        if self.closed:
+            return None
+        q = self._subs[ws] = asyncio.Queue(maxsize=STREAM_QUEUE)
+        self._attached.set()
+        return q
+
+    def unsubscribe(self, ws):
+        self._subs.pop(ws, None)
+        self.release_if_idle()
+
+    def release_if_idle(self):
+        """Close the upstream if nobody is subscribed or waiting for it."""
+        if self._subs or self.waiters or self.closed:
+            return
+        self._finish()
+        self._attached.set()
+        if self.ws is not None:
+            asyncio.ensure_future(self.ws.close())
+
+
+_bot_streams = {}  # key -> BotStream
+
+# In federation mode bot streams are relayed through the owning child portal
+FEDERATION_NODES = parse_nodes(os.environ.get("FEDERATION_NODES", ""))
+OWNERS_TTL = 10  # seconds
+_owners = {"at": 0, "map": {}}  # bot_id -> node name
+
+
+def _ws_authorized(request):
+    """Basic auth (sent by most browsers on same-origin upgrades) or a
+    ``portal_token`` from ``/terminal/token`` (added by the interceptor)."""
+    if not AUTH_ENABLED:
+        return True
+    try:
+        creds = BasicAuth.decode(request.headers.get("Authorization", ""))
+    except ValueError:
+        creds = None
+    if creds is not None and creds.login == PORTAL_USER and creds.password == PORTAL_PASS:
+        return True
+    return validate_token(request.query.get("portal_token", ""))
+
+
+async def _relay_frames(ws, q, stream):
+    while True:
+        msg = await q.get()
+        if msg is None:
+            await ws.close(code=stream.ws.close_code or WSCloseCode.OK)
+            return
+        if msg.type == WSMsgType.TEXT:
+            await ws.send_str(msg.data)
+        else:
+            await ws.send_bytes(msg.data)
+
+
+async def _federation_owner(bot_id):
+    """``(name, url, auth)`` of the child portal serving ``bot_id``, from the
+    workers' ``/api/federation`` (refreshed every ``OWNERS_TTL`` seconds)."""
+    if time.time() - _owners["at"] > OWNERS_TTL:
+        try:
+            async with _upstream().get(UPSTREAM + "/api/federation",
+                                       headers=_worker_headers()) as r:
+                nodes = (await r.json())["nodes"]
+            _owners["map"] = {bot_id: name for name, node in reversed(list(nodes.items()))
+                              for bot_id in node["bots"]}
+            _owners["at"] = time.time()
+        except Exception as e:
+            logger.warning("Federation owner lookup failed: %s", e)
+    name = _owners["map"].get(bot_id)
+    return next((node for node in FEDERATION_NODES if node[0] == name), None)
+
+
+async def proxy_ws(request):
+    """``/proxy/<bot>/...``: relay WebSocket upgrades, proxy anything else."""
+    if request.headers.get("Upgrade", "").lower() != "websocket":
+        return await proxy(request)
+    if not _ws_authorized(request):
+        return _json_error("Unauthorized", 401)
+    bot_id = request.match_info["bot_id"]
+    if FEDERATION_NODES:
+        node = await _federation_owner(bot_id)
+        if node is None:
+            return _json_error(f"Unknown bot: {bot_id}", 404)
+        _, node_url, auth = node
+        base = f"{node_url}/proxy/{bot_id}"
+    else:
+        snap = _get_registry().snapshot()
+        if bot_id not in snap:
+            return _json_error(f"Unknown bot: {bot_id}", 404)
+        base, auth = snap.base_url[bot_id], snap.auth.get(bot_id)
+
+    query = tuple(sorted((k, v) for k, v in request.query.items() if k != "portal_token"))
+    path = "/" + request.match_info["path"]
+    protocols = tuple(p.strip() for p in request.headers.get("Sec-WebSocket-Protocol", "").split(",")
+                      if p.strip())
+    key = (bot_id, base, path, query, protocols)
+    stream = _bot_streams.get(key)
+    if stream is None:
+        stream = _bot_streams[key] = BotStream(key)
+        # Shared by every subscriber, so no browser cookies or headers go upstream
+        headers = {"Authorization": BasicAuth(*auth).encode()} if auth else {}
+        url = base + path + ("?" + urlencode(query) if query else "")
+        asyncio.ensure_future(stream.run(url, headers, protocols))
+    upstream = None
+    stream.waiters += 1
+    try:
+        upstream = await asyncio.shield(stream.opened)
+    except Exception as e:
+        logger.warning("WebSocket to %s%s failed: %s", bot_id, path, e)
+        return web.json_response({"error": "Bot unreachable", "bot": bot_id}, status=502)
+    finally:
+        stream.waiters -= 1
+        if upstream is None:
+            # Disconnected before the bot answered; it may have been the only one
+            stream.release_if_idle()
+
+    ws = web.WebSocketResponse(protocols=(upstream.protocol,) if upstream.protocol else (),
+                               heartbeat=WS_HEARTBEAT)
+    q = stream.subscribe(ws)
+    if q is None:
+        await ws.prepare(request)
+        await ws.close(code=upstream.close_code or WSCloseCode.GOING_AWAY)
+        return ws
+    relay = None
+    try:
+        await ws.prepare(request)
+        relay = asyncio.ensure_future(_relay_frames(ws, q, stream))
+        async for msg in ws:
+            if msg.type == WSMsgType.TEXT:
+                await upstream.send_str(msg.data)
+            elif msg.type == WSMsgType.BINARY:
+                await upstream.send_bytes(msg.data)
+    except (ConnectionResetError, asyncio.CancelledError):
+        pass
+    finally:
+        stream.unsubscribe(ws)
+        if relay is not None:
+            relay.cancel()
+        if ws.prepared and not ws.closed:
+            await ws.close(code=upstream.close_code or WSCloseCode.GOING_AWAY)
+    return ws
+
+
+# ---------------------------------------------------------------------------
+# Reverse proxy to the gunicorn workers
+# ---------------------------------------------------------------------------
+
+_session = None
+
+
+def _upstream():
+    global _session
+    if _session is None:
+        # Bodies pass through untouched (the workers already compressed them),
+        # and only the client's own Accept-Encoding is forwarded
+        _session = ClientSession(connector=TCPConnector(limit=64),
+                                 timeout=ClientTimeout(total=None, sock_connect=5),
+                                 auto_decompress=False,
+                                 skip_auto_headers=("Accept-Encoding", "User-Agent"))
+    return _session
+
+
+async def proxy(request):
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in HOP_HEADERS}
+    headers["X-Forwarded-For"] = request.remote or ""
+    headers["X-Forwarded-Host"] = request.host
+    headers["X-Forwarded-Proto"] = request.scheme
+    body = await request.read() if request.body_exists else None
+    try:
+        upstream = await _upstream().request(request.method, UPSTREAM + request.rel_url.raw_path_qs,
+                                             headers=headers, data=body, allow_redirects=False)
+    except Exception as e:
+        logger.warning("Upstream %s %s failed: %s", request.method, request.path, e)
+        return _json_error("Upstream unavailable", 502)
+    try:
+        resp = web.StreamResponse(status=upstream.status, reason=upstream.reason)
+        for k, v in upstream.headers.items():
+            if k.lower() not in HOP_HEADERS:
+                resp.headers.add(k, v)
+        await resp.prepare(request)
+        async for chunk in upstream.content.iter_any():
+            await resp.write(chunk)
+        await resp.write_eof()
+        return resp
+    finally:
+        upstream.release()
+
+
+# ---------------------------------------------------------------------------
+# App
+# ---------------------------------------------------------------------------
+
+async def _on_cleanup(app):
+    if _session is not None:
+        await _session.close()
+
+
+def make_app():
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app.router.add_get("/terminal/ws", terminal_ws)
+    app.router.add_post("/api/claude", claude_chat)
+    app.router.add_get("/api/claude/jobs/{job_id}/stream", claude_job_stream)
+    app.router.add_get("/api/logs/{bot_id}/stream", stream_bot_logs)
+    app.router.add_get("/api/overview/stream", overview_stream)
+    app.router.add_get("/api/federation/stream", federation_stream)
+    app.router.add_get("/proxy/{bot_id}/{path:.*}", proxy_ws)
+    app.router.add_route("*", "/{tail:.*}", proxy)
+    app.on_cleanup.append(_on_cleanup)
+    return app
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    logging.getLogger("paramiko").setLevel(logging.WARNING)
+    web.run_app(make_app(), host=HUB_HOST, port=HUB_PORT, access_log=None)
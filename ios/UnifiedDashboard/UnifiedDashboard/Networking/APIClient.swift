@@ -32,6 +32,123 @@ struct CapitalLimitResponse: Codable {
     }
 }
 
+/// One item of a `/api/batch` response; `body` is nil when the item failed
+/// or its body doesn't decode as `T`.
+struct BatchItem<T: Decodable>: Decodable {
+    let status: Int
+    let body: T?
+
+    enum CodingKeys: String, CodingKey {
+        case status, body
+    }
+
+    init(from decoder: Decoder) throws {
+        let c = try decoder.container(keyedBy: CodingKeys.self)
+        status = try c.decode(Int.self, forKey: .status)
+        body = (200...299).contains(status) ? try? c.decode(T.self, forKey: .body) : nil
+    }
+
+    func value() throws -> T {
+        guard (200...299).contains(status) else {
+            switch status {
+            case 401: throw APIError.unauthorized
+            case 404: throw APIError.notFound
+            case 500...599: throw APIError.serverError(status)
+            default: throw APIError.httpError(status)
+            }
+        }
+        guard let body = body else {
+            throw APIError.decodingError(DecodingError.valueNotFound(
+                T.self, .init(codingPath: [], debugDescription: "Batch item body missing")))
+        }
+        return body
+    }
+}
+
+struct CapitalBatch: Decodable {
+    let capital: BatchItem<CapitalResponse>
+    let transfers: BatchItem<TransfersResponse>
+}
+
+/// `/api/mobile/sync` response: only the sections that changed since `since`.
+struct SyncResponse: Decodable {
+    let token: String?
+    let nextPoll: Int
+    let replace: [String]?
+    let bots: [String: BotStatus]?
+    let accounts: [String: CapitalAccount]?
+    let totals: SyncTotals?
+    let transfers: [Transfer]?
+
+    enum CodingKeys: String, CodingKey {
+        case token, replace, bots, accounts, totals, transfers
+        case nextPoll = "next_poll"
+    }
+}
+
+struct SyncTotals: Decodable {
+    var totalPnl: Double?
+    var realBalance: Int?
+    var totalAllocated: Int?
+    var unallocated: Int?
+
+    enum CodingKeys: String, CodingKey {
+        case totalPnl = "total_pnl"
+        case realBalance = "real_balance"
+        case totalAllocated = "total_allocated"
+        case unallocated
+    }
+}
+
+/// Client side of `/api/mobile/sync`: keeps the token and merges deltas.
+final class MobileSync {
+    let fields: String
+    private(set) var token: String?
+    private(set) var bots: [String: BotStatus] = [:]
+    private(set) var accounts: [String: CapitalAccount] = [:]
+    private(set) var totals = SyncTotals()
+    private(set) var transfers: [Transfer] = []
+
+    init(fields: String) {
+        self.fields = fields
+    }
+
+    func apply(_ r: SyncResponse) {
+        let replace = Set(r.replace ?? [])
+        if replace.contains("bots") { bots = [:] }
+        if replace.contains("accounts") { accounts = [:] }
+        if replace.contains("transfers") { transfers = [] }
+        for (key, var bot) in r.bots ?? [:] {
+            bot.id = key
+            bots[key] = bot
+        }
+        for (key, account) in r.accounts ?? [:] {
+            accounts[key] = account
+        }
+        if let t = r.totals { totals = t }
+        if let new = r.transfers, !new.isEmpty {
+            transfers = Array((new + transfers).prefix(20))
+        }
+        if let token = r.token { self.token = token }
+    }
+
+    var overview: OverviewResponse {
+        OverviewResponse(bots: bots, totalPnl: totals.totalPnl ?? 0)
+    }
+}
+
+private struct BatchRequest: Encodable {
+    struct Item: Encodable {
+        let id: String
+        let path: String
+    }
+    let requests: [Item]
+}
+
+private struct BatchResponse<T: Decodable>: Decodable {
+    let responses: T
+}
+
 class APIClient {
     private let settings: ServerSettings
     private let session: URLSession
@@ -79,6 +196,35 @@ class APIClient {
         return try await get("/api/capital/\(botId)/limit")
     }
 
+    /// Capital and transfer history in one round trip via `/api/batch`.
+    func fetchCapitalAndTransfers(limit: Int = 20) async throws -> (CapitalResponse, TransfersResponse) {
+        let body = BatchRequest(requests: [
+            .init(id: "capital", path: "/api/capital"),
+            .init(id: "transfers", path: "/api/capital/transfers?limit=\(limit)"),
+        ])
+        let batch: BatchResponse<CapitalBatch> = try await post("/api/batch", body: body)
+        return (try batch.responses.capital.value(), try batch.responses.transfers.value())
+    }
+
+    // MARK: - Mobile sync
+
+    /// One `/api/mobile/sync` poll, merged into `state`; returns the
+    /// server's suggested delay in seconds before the next poll.
+    @discardableResult
+    func sync(_ state: MobileSync) async throws -> Int {
+        var query = [URLQueryItem(name: "fields", value: state.fields)]
+        if let token = state.token {
+            query.append(URLQueryItem(name: "since", value: token))
+        }
+        var components = URLComponents()
+        components.path = "/api/mobile/sync"
+        components.queryItems = query
+        guard let path = components.string else { throw APIError.invalidURL }
+        let response: SyncResponse = try await get(path)
+        state.apply(response)
+        return response.nextPoll
+    }
+
     // MARK: - HTTP helpers
 
     private func makeRequest(_ path: String, method: String = "GET") throws -> URLRequest {
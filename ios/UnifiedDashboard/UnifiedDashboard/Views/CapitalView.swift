@@ -564,9 +564,7 @@ struct CapitalView: View {
     private func fetchAll() async {
         let client = APIClient(settings: settings)
         do {
-            async let cap = client.fetchCapital()
-            async let xfer = client.fetchTransfers()
-            let (capResult, xferResult) = try await (cap, xfer)
+            let (capResult, xferResult) = try await client.fetchCapitalAndTransfers()
             await MainActor.run {
                 let wasLoading = self.isLoading
                 withAnimation(.easeInOut(duration: 0.25)) {
@@ -6,6 +6,7 @@ struct OverviewView: View {
     @State private var error: String?
     @State private var lastUpdated: Date?
     @State private var refreshTask: Task<Void, Never>?
+    @State private var sync = MobileSync(fields: "bots,totals(total_pnl)")
     @State private var isLoading = true
     @State private var cardsAppeared = false
 
@@ -71,8 +72,8 @@ struct OverviewView: View {
     private func startPolling() {
         refreshTask = Task {
             while !Task.isCancelled {
-                await fetchOnce()
-                try? await Task.sleep(for: .seconds(8))
+                let delay = await fetchOnce()
+                try? await Task.sleep(for: .seconds(delay))
             }
         }
     }
@@ -82,16 +83,13 @@ struct OverviewView: View {
         refreshTask = nil
     }
 
-    private func fetchOnce() async {
+    /// Polls `/api/mobile/sync`; returns seconds until the next poll.
+    @discardableResult
+    private func fetchOnce() async -> Int {
         let client = APIClient(settings: settings)
         do {
-            var response = try await client.fetchOverview()
-            var updatedBots: [String: BotStatus] = [:]
-            for (key, var bot) in response.bots {
-                bot.id = key
-                updatedBots[key] = bot
-            }
-            response = OverviewResponse(bots: updatedBots, totalPnl: response.totalPnl)
+            let nextPoll = try await client.sync(sync)
+            let response = sync.overview
             await MainActor.run {
                 let wasLoading = self.isLoading
                 withAnimation(.easeInOut(duration: 0.25)) {
@@ -106,11 +104,13 @@ struct OverviewView: View {
                     }
                 }
             }
+            return nextPoll
         } catch {
             await MainActor.run {
                 self.error = error.localizedDescription
                 self.isLoading = false
             }
+            return 8
         }
     }
 }
@@ -1,9 +1,10 @@
-"""Kalshi API client — balance queries with RSA-PSS signing."""
+"""Kalshi API client — balance and position queries with RSA-PSS signing."""
 
 import base64
 import logging
 import requests
 from datetime import datetime, timezone
+from urllib.parse import quote
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding
 
@@ -13,7 +14,7 @@ API_BASE = "https://api.elections.kalshi.com/trade-api/v2"
 
 
 class KalshiClient:
-    """Handles Kalshi API authentication and balance queries."""
+    """Handles Kalshi API authentication, balance and position queries."""
 
     def __init__(self, api_key, private_key_path):
         self.api_key = api_key
@@ -58,3 +59,14 @@ class KalshiClient:
         """Get primary account balance in cents."""
         data = self._request("GET", "/portfolio/balance")
         return data.get("balance", 0)
+
+    def get_positions(self):
+        """Get open market positions (``market_exposure`` etc. in cents), all pages."""
+        positions, cursor = [], ""
+        while True:
+            path = "/portfolio/positions?count_filter=position&limit=1000"
+            data = self._request("GET", path + (f"&cursor={quote(cursor)}" if cursor else ""))
+            positions += data.get("market_positions") or []
+            cursor = data.get("cursor")
+            if not cursor:
+                return positions
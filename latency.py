@@ -0,0 +1,190 @@
+"""Adaptive bot timeouts — rolling latency per (bot, endpoint class) and hedged reads.
+
+Every bot request records how long it took under a key of bot id and
+endpoint class (the path with ids collapsed).  Once a key has
+``MIN_SAMPLES`` samples, its timeout is the p99 times ``HEADROOM`` plus
+``HEADROOM_S``, clamped to ``[TIMEOUT_MIN, TIMEOUT_MAX]`` (or the caller's
+``max_timeout``); until then the caller's default applies, raised past the
+slowest sample.  Requests that time out are counted but kept out of the
+window: a hung bot must not stretch its own timeout, and once it recovers
+its percentiles reflect the answers it actually gave.
+
+``LatencyTracker.call(..., hedge=True)`` is for idempotent reads: if the
+first request is still running after the key's p95, a second identical
+request goes out and whichever succeeds first wins.  Hedges are limited to
+``HEDGE_BUDGET`` of a key's recent requests so a bot that is slow across
+the board doesn't get double the load.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+WINDOW = 200          # samples kept per key
+MIN_SAMPLES = 20      # before this, the caller's default timeout applies
+HEADROOM = 1.5        # timeout = p99 * HEADROOM + HEADROOM_S
+HEADROOM_S = 0.25
+TIMEOUT_MIN = 1.0     # seconds; absorbs GC pauses on normally-fast bots
+TIMEOUT_MAX = 60.0
+HEDGE_BUDGET = 0.1    # at most this share of a key's recent requests are hedged
+MAX_CLASSES = 64      # per bot; further paths share one "*" class
+
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{8,}|[0-9a-f-]{36})$", re.IGNORECASE)
+
+
+def endpoint_class(path):
+    """``/api/orders/123?x=1`` -> ``/api/orders/:id``."""
+    path = path.split("?", 1)[0]
+    return "/".join(":id" if _ID_SEGMENT.match(seg) else seg for seg in path.split("/"))
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _derived_timeout(p99):
+    return min(TIMEOUT_MAX, max(TIMEOUT_MIN, p99 * HEADROOM + HEADROOM_S))
+
+
+class _Window:
+    def __init__(self):
+        self.samples = deque(maxlen=WINDOW)
+        self.hedged = deque(maxlen=WINDOW)  # 1 per request that sent a hedge
+        self.timeouts = 0
+
+    def percentiles(self):
+        ordered = sorted(self.samples)
+        return _percentile(ordered, 0.5), _percentile(ordered, 0.95), _percentile(ordered, 0.99)
+
+
+class LatencyTracker:
+    """Thread-safe rolling latency windows keyed by ``(bot_id, endpoint class)``."""
+
+    def __init__(self, workers=16):
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._classes = {}  # bot_id -> set of endpoint classes
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hedge")
+
+    def _key(self, bot_id, path):
+        cls = endpoint_class(path)
+        classes = self._classes.setdefault(bot_id, set())
+        if cls not in classes:
+            if len(classes) >= MAX_CLASSES:
+                cls = "*"
+            classes.add(cls)
+        return bot_id, cls
+
+    def _window(self, bot_id, path):
+        with self._lock:
+            key = self._key(bot_id, path)
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = _Window()
+            return window
+
+    def record(self, bot_id, path, seconds, timed_out=False):
+        """Add a completed request's latency; a timeout is only counted."""
+        window = self._window(bot_id, path)
+        with self._lock:
+            if timed_out:
+                window.timeouts += 1
+            else:
+                window.samples.append(seconds)
+
+    def forget(self, bot_id):
+        """Drop a bot's history, e.g. after its config changed."""
+        with self._lock:
+            self._classes.pop(bot_id, None)
+            for key in [k for k in self._windows if k[0] == bot_id]:
+                del self._windows[key]
+
+    def timeout(self, bot_id, path, default, max_timeout=TIMEOUT_MAX):
+        """Timeout for the next request to ``path``, at most ``max_timeout``.
+
+        Until the key is warmed up this is ``default``, raised past the
+        slowest answer so far.
+        """
+        window = self._window(bot_id, path)
+        with self._lock:
+            if len(window.samples) < MIN_SAMPLES:
+                slowest = max(window.samples, default=0)
+                timeout = max(default, min(TIMEOUT_MAX, slowest * HEADROOM + HEADROOM_S))
+            else:
+                timeout = _derived_timeout(window.percentiles()[2])
+        return min(max_timeout, timeout)
+
+    def _hedge_delay(self, window):
+        """The p95 if a hedge is allowed now, else None."""
+        with self._lock:
+            if len(window.samples) < MIN_SAMPLES:
+                return None
+            if sum(window.hedged) >= HEDGE_BUDGET * len(window.hedged) + 1:
+                window.hedged.append(0)
+                return None
+            return window.percentiles()[1]
+
+    def _timed(self, fn, bot_id, path, timeout, timeout_errors, started):
+        # Timed from when the caller started waiting, so the p95 matches the
+        # hedge delay the caller actually observes (pool hand-off included)
+        try:
+            result = fn(timeout)
+        except timeout_errors:
+            self.record(bot_id, path, None, timed_out=True)
+            raise
+        self.record(bot_id, path, time.monotonic() - started)
+        return result
+
+    def call(self, bot_id, path, fn, default_timeout, hedge=False, timeout_errors=(),
+             max_timeout=TIMEOUT_MAX):
+        """Run ``fn(timeout)`` with an adaptive timeout and record its latency.
+
+        With ``hedge``, a second ``fn`` call starts once the first has run
+        past the p95; the first success is returned, or the first error if
+        both fail.  Exceptions in ``timeout_errors`` are counted as timeouts
+        rather than recorded as samples.
+        """
+        timeout = self.timeout(bot_id, path, default_timeout, max_timeout)
+        window = self._window(bot_id, path)
+        delay = self._hedge_delay(window) if hedge else None
+        if delay is None:
+            return self._timed(fn, bot_id, path, timeout, timeout_errors, time.monotonic())
+
+        first = self._pool.submit(self._timed, fn, bot_id, path, timeout, timeout_errors,
+                                  time.monotonic())
+        done, _ = wait([first], timeout=delay)
+        with self._lock:
+            window.hedged.append(0 if done else 1)
+        if done:
+            return first.result()
+        second = self._pool.submit(self._timed, fn, bot_id, path, timeout, timeout_errors,
+                                   time.monotonic())
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def stats(self):
+        """``{bot_id: {class: {p50, p95, p99, timeout, samples, timeouts, hedged}}}``."""
+        out = {}
+        with self._lock:
+            items = [(key, list(w.samples), sum(w.hedged), w.timeouts)
+                     for key, w in self._windows.items()]
+        for (bot_id, cls), samples, hedged, timeouts in items:
+            entry = {"samples": len(samples), "timeouts": timeouts, "hedged": hedged}
+            if samples:
+                ordered = sorted(samples)
+                p99 = _percentile(ordered, 0.99)
+                entry.update(p50=round(_percentile(ordered, 0.5), 4),
+                             p95=round(_percentile(ordered, 0.95), 4), p99=round(p99, 4))
+                if len(samples) >= MIN_SAMPLES:
+                    entry["timeout"] = round(_derived_timeout(p99), 3)
+            out.setdefault(bot_id, {})[cls] = entry
+        return out
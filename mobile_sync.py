@@ -0,0 +1,188 @@
+"""Mobile sync — field-masked deltas of overview, capital and transfers.
+
+``/api/mobile/sync?fields=<mask>&since=<token>`` answers a whole refresh
+cycle in one request and returns only what changed since ``token``:
+
+    {"token": "...", "next_poll": 5,
+     "bots": {id: {...}}, "accounts": {id: {...}}, "totals": {...},
+     "transfers": [newest first], "replace": ["bots", ...]}
+
+Sections with no changes are omitted, and so is ``token`` when it is
+unchanged, so an idle poll returns only ``{"next_poll": n}``.  A changed
+entity is sent whole (every masked field), so clients decode it as usual
+and merge by id.
+``replace`` lists sections the client must rebuild from this response
+instead of merging: on first sync, after the mask changes, when the set
+of bots or accounts changes, or when more than ``TRANSFER_LIMIT`` transfers
+were missed.
+
+The mask is a comma-separated list of sections, each optionally limited
+to some fields: ``bots(pnl,healthy),totals(total_pnl),transfers``.
+Omitting ``fields`` selects everything.
+
+The token is an opaque packed digest of the masked state the client
+holds (4 bytes per entity) and the time it last changed, so any worker can
+answer any client without per-client server state.  ``next_poll`` backs
+off with the time since the last change.
+"""
+
+import base64
+import hashlib
+import json
+import re
+import struct
+import time
+
+from extractors import CYCLE_SECONDS
+
+SECTIONS = ("bots", "accounts", "totals", "transfers")
+KEYED = ("bots", "accounts")
+TRANSFER_LIMIT = 20
+POLL_MIN = CYCLE_SECONDS  # data never changes faster than the fetch cycle
+POLL_MAX = 60
+VERSION = 1
+
+_HEADER = struct.Struct("<B4sII4s")  # version, mask, last change, transfer count, totals
+_SECTION = struct.Struct("<4sH")     # id-set digest, entity count
+_MASK_RE = re.compile(r"([a-z_]+)(?:\(([a-z_,]*)\))?(?:,|$)")
+
+
+def _digest(obj):
+    raw = json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(raw, digest_size=4).digest()
+
+
+def parse_fields(spec):
+    """Parse a field mask into ``{section: fields tuple or None (all)}``.
+
+    Raises ValueError for malformed masks or unknown sections.
+    """
+    if not spec:
+        return {section: None for section in SECTIONS}
+    spec = spec.replace(" ", "")
+    mask, pos = {}, 0
+    while pos < len(spec):
+        m = _MASK_RE.match(spec, pos)
+        if not m:
+            raise ValueError(f"Malformed field mask at {spec[pos:]!r}")
+        section, fields = m.group(1), m.group(2)
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown section: {section}")
+        mask[section] = None if fields is None else tuple(sorted(f for f in fields.split(",") if f))
+        pos = m.end()
+    return mask
+
+
+def _project(entity, fields):
+    if fields is None:
+        return entity
+    return {k: entity[k] for k in fields if k in entity}
+
+
+class SyncToken:
+    """What the client already holds: per-entity digests plus the transfer count."""
+
+    def __init__(self, mask_digest, changed_at=0, transfers=0, totals=b"", keyed=None):
+        self.mask_digest = mask_digest
+        self.changed_at = changed_at
+        self.transfers = transfers
+        self.totals = totals
+        self.keyed = keyed or {}  # section -> (id-set digest, [entity digests])
+
+    def encode(self):
+        parts = [_HEADER.pack(VERSION, self.mask_digest, int(self.changed_at),
+                              self.transfers, self.totals or b"\0" * 4)]
+        for section in KEYED:
+            idset, hashes = self.keyed.get(section, (b"\0" * 4, []))
+            parts.append(_SECTION.pack(idset, len(hashes)))
+            parts.extend(hashes)
+        return base64.urlsafe_b64encode(b"".join(parts)).rstrip(b"=").decode()
+
+    @classmethod
+    def decode(cls, token, mask):
+        """Return the token's state, or None if it is missing, malformed or
+        was issued for a different mask."""
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            version, mask_digest, changed_at, transfers, totals = _HEADER.unpack_from(raw)
+            pos = _HEADER.size
+            keyed = {}
+            for section in KEYED:
+                idset, count = _SECTION.unpack_from(raw, pos)
+                pos += _SECTION.size
+                keyed[section] = (idset, [raw[pos + 4 * i:pos + 4 * i + 4] for i in range(count)])
+                pos += 4 * count
+        except (ValueError, struct.error):
+            return None
+        if version != VERSION or mask_digest != _digest(sorted(mask.items())) or pos != len(raw):
+            return None
+        return cls(mask_digest, changed_at, transfers, totals, keyed)
+
+
+def transfer_start(prev):
+    """Log position to read new transfers from (0 on a first sync)."""
+    return prev.transfers if prev is not None else 0
+
+
+def next_poll(idle):
+    """Seconds until the next poll, ``idle`` seconds after the last change."""
+    return int(min(POLL_MAX, max(POLL_MIN, idle // 3)))
+
+
+def build(prev, mask, bots=None, accounts=None, totals=None, transfers=None, transfer_count=0,
+          since=None):
+    """Build the sync response for the sections in ``mask``.
+
+    ``bots`` / ``accounts`` map ids to full entities, ``totals`` is one
+    dict, and ``transfers`` are the entries logged after
+    ``transfer_start(prev)`` (newest first, at most ``TRANSFER_LIMIT``) out
+    of ``transfer_count`` in total.  ``since`` is the client's token string,
+    echoed back only if something changed.
+    """
+    token = SyncToken(_digest(sorted(mask.items())))
+    resp, replace = {}, []
+
+    for section, entities in (("bots", bots), ("accounts", accounts)):
+        if section not in mask:
+            continue
+        ids = sorted(entities)
+        projected = {i: _project(entities[i], mask[section]) for i in ids}
+        idset = _digest(ids)
+        hashes = [_digest(projected[i]) for i in ids]
+        token.keyed[section] = (idset, hashes)
+        seen = prev.keyed.get(section) if prev is not None else None
+        if seen is not None and seen[0] == idset and len(seen[1]) == len(ids):
+            changed = {i: projected[i] for i, old, new in zip(ids, seen[1], hashes) if old != new}
+            if changed:
+                resp[section] = changed
+        else:
+            resp[section] = projected
+            replace.append(section)
+
+    if "totals" in mask:
+        projected = _project(totals, mask["totals"])
+        token.totals = _digest(projected)
+        if prev is None or prev.totals != token.totals:
+            resp["totals"] = projected
+
+    if "transfers" in mask:
+        start = transfer_start(prev)
+        token.transfers = transfer_count
+        projected = [_project(t, mask["transfers"]) for t in transfers]
+        if prev is None or start > transfer_count or transfer_count - start > TRANSFER_LIMIT:
+            resp["transfers"] = projected
+            replace.append("transfers")
+        elif projected:
+            resp["transfers"] = projected
+
+    if replace:
+        resp["replace"] = replace
+    now = int(time.time())
+    token.changed_at = now if resp or prev is None else prev.changed_at
+    resp["next_poll"] = next_poll(now - token.changed_at)
+    encoded = token.encode()
+    if encoded != since:
+        resp["token"] = encoded
+    return resp
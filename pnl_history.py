@@ -0,0 +1,252 @@
+"""Embedded P&L time-series store — append-only files, columnar tiers, downsampling.
+
+Each bot (plus the pseudo-bot ``total``) has an append-only file of packed
+``(ts, pnl)`` doubles under ``data/pnl/``.  The file is the source of
+truth shared by all gunicorn workers; each worker tails it into in-memory
+``array('d')`` tiers:
+
+    raw     every sample            last 24 h
+    minute  last value per minute   last 30 days
+    hour    last value per hour     last 2 years
+
+Old raw samples are compacted on disk to the same minute / hour
+resolution every ``COMPACT_EVERY`` seconds, by one worker in the background
+(``app._pnl_compact_loop``), so files stay around a megabyte per bot.  Queries pick
+the finest tier covering the range and downsample with LTTB or min/max
+buckets to the requested number of points.
+"""
+
+import bisect
+import fcntl
+import logging
+import os
+import struct
+import threading
+import time
+from array import array
+
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+PNL_DIR = os.path.join(DATA_DIR, "pnl")
+RECORD = struct.Struct("<dd")
+MIN_INTERVAL = 5             # seconds between recorded samples per bot
+COMPACT_EVERY = 3600         # seconds between on-disk compactions
+TIERS = (                    # (name, bucket seconds, retention seconds)
+    ("raw", 0, 86400),
+    ("minute", 60, 30 * 86400),
+    ("hour", 3600, 2 * 365 * 86400),
+)
+
+
+class _Column:
+    """Time-ordered (ts, value) pair of typed arrays with bounded retention."""
+
+    def __init__(self, bucket, retention):
+        self.bucket = bucket
+        self.retention = retention
+        self.ts = array("d")
+        self.val = array("d")
+
+    def add(self, ts, value):
+        if self.bucket:
+            start = ts - ts % self.bucket
+            if self.ts and self.ts[-1] == start:
+                self.val[-1] = value  # keep the last value in the bucket
+                return
+            ts = start
+        elif self.ts and ts <= self.ts[-1]:
+            return
+        self.ts.append(ts)
+        self.val.append(value)
+        # Trim in chunks so retention costs amortized O(1) per append
+        if len(self.ts) > 64 and self.ts[0] < ts - self.retention * 1.1:
+            cut = bisect.bisect_left(self.ts, ts - self.retention)
+            del self.ts[:cut]
+            del self.val[:cut]
+
+    def slice(self, t0, t1):
+        i = bisect.bisect_left(self.ts, t0)
+        j = bisect.bisect_right(self.ts, t1)
+        return self.ts[i:j], self.val[i:j]
+
+
+class _Series:
+    def __init__(self):
+        self.tiers = [(name, _Column(bucket, retention)) for name, bucket, retention in TIERS]
+        self.offset = 0   # bytes of the backing file already ingested
+        self.inode = None
+        self.last_ts = 0.0
+
+    def add(self, ts, value):
+        if ts <= self.last_ts:
+            return
+        self.last_ts = ts
+        for _, col in self.tiers:
+            col.add(ts, value)
+
+
+def lttb(ts, val, points):
+    """Largest-Triangle-Three-Buckets downsampling of parallel sequences."""
+    n = len(ts)
+    if points >= n or points < 3:
+        return list(ts), list(val)
+    out_t, out_v = [ts[0]], [val[0]]
+    every = (n - 2) / (points - 2)
+    a = 0
+    for i in range(points - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        nxt_lo, nxt_hi = hi, min(int((i + 2) * every) + 1, n)
+        avg_t = sum(ts[nxt_lo:nxt_hi]) / max(1, nxt_hi - nxt_lo)
+        avg_v = sum(val[nxt_lo:nxt_hi]) / max(1, nxt_hi - nxt_lo)
+        best, best_area = lo, -1.0
+        at, av = ts[a], val[a]
+        for k in range(lo, hi):
+            area = abs((at - avg_t) * (val[k] - av) - (at - ts[k]) * (avg_v - av))
+            if area > best_area:
+                best, best_area = k, area
+        out_t.append(ts[best])
+        out_v.append(val[best])
+        a = best
+    out_t.append(ts[-1])
+    out_v.append(val[-1])
+    return out_t, out_v
+
+
+def minmax(ts, val, points):
+    """Keep the min and max of each of ``points // 2`` equal-count buckets."""
+    n = len(ts)
+    buckets = max(1, points // 2)
+    if n <= points:
+        return list(ts), list(val)
+    out_t, out_v = [], []
+    for b in range(buckets):
+        lo, hi = b * n // buckets, (b + 1) * n // buckets
+        if lo >= hi:
+            continue
+        seg = val[lo:hi]
+        i_min = lo + min(range(len(seg)), key=seg.__getitem__)
+        i_max = lo + max(range(len(seg)), key=seg.__getitem__)
+        for k in sorted({i_min, i_max}):
+            out_t.append(ts[k])
+            out_v.append(val[k])
+    return out_t, out_v
+
+
+class PnlHistory:
+    """Per-bot P&L history backed by shared append-only files."""
+
+    def __init__(self, data_dir=None):
+        self.data_dir = data_dir or PNL_DIR
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._lock_path = os.path.join(self.data_dir, ".lock")
+        self._series = {}
+        self._lock = threading.Lock()
+        self._compacted_path = os.path.join(self.data_dir, ".compacted")
+
+    def _path(self, bot_id):
+        return os.path.join(self.data_dir, f"{bot_id}.bin")
+
+    def _flock(self, mode):
+        f = open(self._lock_path, "a")
+        fcntl.flock(f, mode)
+        return f
+
+    def _sync(self, bot_id):
+        """Ingest records appended (by any worker) since the last sync."""
+        series = self._series.setdefault(bot_id, _Series())
+        path = self._path(bot_id)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return series
+        if series.inode is not None and (st.st_ino != series.inode or st.st_size < series.offset):
+            # Compacted by another worker — reload from scratch
+            series = self._series[bot_id] = _Series()
+        if st.st_size - series.offset < RECORD.size:
+            return series
+        with open(path, "rb") as f:
+            series.inode = os.fstat(f.fileno()).st_ino
+            f.seek(series.offset)
+            data = f.read()
+        usable = len(data) - len(data) % RECORD.size
+        for ts, value in RECORD.iter_unpack(data[:usable]):
+            series.add(ts, value)
+        series.offset += usable
+        return series
+
+    def record(self, samples, ts=None):
+        """Append ``{bot_id: pnl}`` samples, at most one per bot per MIN_INTERVAL."""
+        ts = ts or time.time()
+        with self._lock:
+            lk = self._flock(fcntl.LOCK_EX)
+            try:
+                for bot_id, pnl in samples.items():
+                    if ts - self._sync(bot_id).last_ts < MIN_INTERVAL:
+                        continue
+                    with open(self._path(bot_id), "ab") as f:
+                        f.write(RECORD.pack(ts, float(pnl)))
+                    self._sync(bot_id)
+            finally:
+                lk.close()
+
+    def compact_due(self, now=None):
+        """True if no worker has compacted in the last ``COMPACT_EVERY`` seconds."""
+        try:
+            last = os.stat(self._compacted_path).st_mtime
+        except FileNotFoundError:
+            return True
+        return (now or time.time()) - last >= COMPACT_EVERY
+
+    def compact(self):
+        """Rewrite each file keeping every sample inside the raw tier's
+        window and only minute / hour resolution beyond it.
+
+        Takes the file lock one bot at a time, so a concurrent ``record``
+        waits for one file's rewrite at most.
+        """
+        for bot_id in self.bots():
+            with self._lock:
+                lk = self._flock(fcntl.LOCK_EX)
+                try:
+                    self._compact_one(bot_id)
+                finally:
+                    lk.close()
+        with open(self._compacted_path, "w"):
+            pass
+
+    def _compact_one(self, bot_id):
+        raw, minute, hour = (col for _, col in self._sync(bot_id).tiers)
+        floor_minute = minute.ts[0] if minute.ts else float("inf")
+        floor_raw = raw.ts[0] if raw.ts else float("inf")
+        keep = [(t, v) for t, v in zip(hour.ts, hour.val) if t < floor_minute]
+        keep += [(t, v) for t, v in zip(minute.ts, minute.val) if t < floor_raw]
+        keep += zip(raw.ts, raw.val)
+        tmp = self._path(bot_id) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(RECORD.pack(t, v) for t, v in keep))
+        os.replace(tmp, self._path(bot_id))
+        self._series.pop(bot_id, None)
+
+    def query(self, bot_id, t0, t1, points=300, method="lttb"):
+        """Return ``(tier, ts_list, value_list)`` downsampled to ``points``."""
+        with self._lock:
+            lk = self._flock(fcntl.LOCK_SH)
+            try:
+                series = self._sync(bot_id)
+            finally:
+                lk.close()
+            # Finest tier whose retention reaches back to t0
+            span = time.time() - t0
+            for tier, col in series.tiers:
+                if span <= col.retention * 1.01:
+                    break
+            ts, val = col.slice(t0, t1)
+        sample = minmax if method == "minmax" else lttb
+        ts, val = sample(ts, val, points)
+        return tier, ts, val
+
+    def bots(self):
+        return sorted(n[:-4] for n in os.listdir(self.data_dir) if n.endswith(".bin"))
@@ -0,0 +1,120 @@
+"""Bot-side client for portal push ingestion — stdlib only, copy it into a bot.
+
+    from push_client import StatusPusher
+
+    pusher = StatusPusher("http://portal:8080", "btc-range", os.environ["PORTAL_INGEST_KEY"])
+    pusher.start()
+    ...
+    pusher.update(pnl=12.5, open_positions=2, mode="PAPER", running=True)
+
+The key comes from the portal's ``/api/ingest/<bot_id>/key``.  ``update``
+only records values and never blocks on the network: a background thread
+sends the fields that changed at most once per ``interval`` (updates in
+between coalesce into one request), and a heartbeat when nothing changed
+for the portal's heartbeat period.  The first request, and any after the
+portal refuses one (sequence gap, portal restart), carries the full state.
+Errors are logged and retried with backoff, never raised into the bot.
+Field names are those of the portal's ``BotRecord`` (pnl, mode, healthy,
+running, win_rate, completed, wins, open_positions, ...).
+"""
+
+import json
+import logging
+import secrets
+import threading
+import time
+import urllib.error
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_MAX = 60  # seconds
+
+
+class StatusPusher:
+    """Pushes one bot's status to the portal from a daemon thread."""
+
+    def __init__(self, portal_url, bot_id, key, interval=1.0, heartbeat=10, timeout=5):
+        self.url = f"{portal_url.rstrip('/')}/api/ingest/{bot_id}"
+        self.key = key
+        self.interval = interval
+        self.heartbeat = heartbeat   # replaced by the portal's value after the first reply
+        self.timeout = timeout
+        self.epoch = secrets.token_hex(8)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._state = {}
+        self._changed = {}
+        self._seq = 0
+        self._full = True
+        self._thread = None
+
+    def update(self, **fields):
+        """Record new values; only the ones that differ are sent."""
+        with self._lock:
+            for name, value in fields.items():
+                if name not in self._state or self._state[name] != value:
+                    self._state[name] = value
+                    self._changed[name] = value
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="status-push", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.timeout + self.interval)
+
+    def _next_body(self, last_sent):
+        """The request to send now, or None (lock held)."""
+        if self._full and self._state:
+            self._seq += 1
+            body = {"epoch": self.epoch, "seq": self._seq, "full": True,
+                    "fields": dict(self._state)}
+        elif self._full:
+            return None  # nothing to report until the first update()
+        elif self._changed:
+            self._seq += 1
+            body = {"epoch": self.epoch, "seq": self._seq, "fields": self._changed}
+        elif time.monotonic() - last_sent >= self.heartbeat:
+            body = {"epoch": self.epoch, "seq": self._seq}
+        else:
+            return None
+        self._changed = {}
+        self._full = False
+        return body
+
+    def _run(self):
+        last_sent, backoff = 0.0, self.interval
+        while not self._stop.wait(backoff):
+            with self._lock:
+                body = self._next_body(last_sent)
+            if body is None:
+                continue
+            try:
+                status, reply = self._post(body)
+            except (OSError, ValueError) as e:
+                logger.warning("Status push failed: %s", e)
+                with self._lock:
+                    self._full = True  # the portal may or may not have applied it
+                backoff = min(BACKOFF_MAX, backoff * 2)
+                continue
+            last_sent, backoff = time.monotonic(), self.interval
+            self.heartbeat = reply.get("heartbeat", self.heartbeat)
+            if status == 409:
+                with self._lock:
+                    self._full = True
+
+    def _post(self, body):
+        req = urllib.request.Request(self.url, data=json.dumps(body).encode(), method="POST",
+                                     headers={"Content-Type": "application/json",
+                                              "Authorization": f"Bearer {self.key}"})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return resp.status, json.loads(resp.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                return 409, json.loads(e.read() or b"{}")
+            raise
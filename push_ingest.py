@@ -0,0 +1,239 @@
+"""Push ingestion — bots report their own status instead of being polled.
+
+A bot POSTs ``/api/ingest/<bot_id>`` with ``Authorization: Bearer <key>``
+(``ingest_key(bot_id)``, shown by ``/api/ingest/<bot_id>/key``) and
+
+    {"epoch": "<id of this bot process>", "seq": 42, "full": false,
+     "fields": {"pnl": 12.5, "open_positions": 2}}
+
+``fields`` are the ``BotRecord`` fields that changed since ``seq - 1``
+(null clears one); a ``full`` update replaces the bot's state.  Updates
+apply in order: a repeated or older ``seq`` is ignored, and a gap (or a new
+epoch without ``full``) is refused so the bot resends its full state.  An
+update with no fields and the current ``seq`` is a heartbeat.
+
+Accepted updates are merged into this worker's memory at once; a flusher
+writes ``data/push/<bot_id>.json`` every ``FLUSH_INTERVAL``, one write per
+bot however many updates arrived, and other workers pick the files up by
+mtime.  A bot heard from within ``STALE_AFTER`` seconds is served from its
+pushed state and skipped by the fetch cycle; a quiet bot falls back to the
+regular pull until it pushes again.  push_client.py is the bot-side helper.
+"""
+
+import base64
+import dataclasses
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+import typing
+
+from config import DATA_DIR
+from extractors import BotRecord
+
+logger = logging.getLogger(__name__)
+
+PUSH_DIR = os.path.join(DATA_DIR, "push")
+PORTAL_USER = os.environ.get("PORTAL_USER", "")
+PORTAL_PASS = os.environ.get("PORTAL_PASS", "")
+INGEST_SECRET = (os.environ.get("INGEST_SECRET", "").encode()
+                 or hashlib.sha256(f"ingest:{PORTAL_USER}:{PORTAL_PASS}".encode()).digest())
+
+HEARTBEAT = 10       # seconds; bots send one when nothing changed (told in every reply)
+STALE_AFTER = 30     # seconds without an update or heartbeat before pulling again
+FLUSH_INTERVAL = 1   # seconds between state file writes
+MAX_STR = 200
+
+
+def _field_types():
+    types = {}
+    for field in dataclasses.fields(BotRecord):
+        if field.name == "error":  # set by the portal, not reported
+            continue
+        args = [a for a in typing.get_args(field.type) if a is not type(None)]
+        types[field.name] = args[0] if args else field.type
+    return types
+
+
+FIELDS = _field_types()
+
+
+def ingest_key(bot_id):
+    """The bearer key ``bot_id`` pushes with."""
+    mac = hmac.new(INGEST_SECRET, f"ingest:{bot_id}".encode(), hashlib.sha256).digest()[:24]
+    return base64.urlsafe_b64encode(mac).decode()
+
+
+def check_key(bot_id, key):
+    return bool(key) and hmac.compare_digest(key, ingest_key(bot_id))
+
+
+def _check_value(name, value):
+    kind = FIELDS.get(name)
+    if kind is None:
+        raise ValueError(f"Unknown field: {name}")
+    if value is None:
+        return
+    if kind is bool:
+        ok = isinstance(value, bool)
+    elif kind is int:
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    elif kind is float:
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    else:
+        ok = isinstance(value, str) and len(value) <= MAX_STR
+    if not ok:
+        raise ValueError(f"{name} must be {kind.__name__}")
+
+
+def parse_update(body):
+    """``(epoch, seq, full, fields)`` from a request body; ValueError if malformed."""
+    if not isinstance(body, dict):
+        raise ValueError("Body must be a JSON object")
+    epoch, seq = body.get("epoch"), body.get("seq")
+    if not isinstance(epoch, str) or not 0 < len(epoch) <= 64:
+        raise ValueError("epoch must be a non-empty string")
+    if not isinstance(seq, int) or isinstance(seq, bool) or seq < 0:
+        raise ValueError("seq must be a non-negative integer")
+    fields = body.get("fields") or {}
+    if not isinstance(fields, dict):
+        raise ValueError("fields must be an object")
+    for name, value in fields.items():
+        _check_value(name, value)
+    return epoch, seq, bool(body.get("full")), fields
+
+
+def _newer(a, b):
+    if a["epoch"] == b["epoch"]:
+        return (a["seq"], a["ts"]) > (b["seq"], b["ts"])
+    return a["ts"] > b["ts"]
+
+
+class PushStore:
+    """Latest pushed state per bot, shared between workers through small files.
+
+    Entries are ``{"epoch", "seq", "ts", "fields"}`` dicts, replaced rather
+    than mutated, where ``ts`` is when the portal last heard from the bot.
+    """
+
+    def __init__(self, data_dir=None, stale_after=STALE_AFTER):
+        self.data_dir = data_dir or PUSH_DIR
+        self.stale_after = stale_after
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._state = {}
+        self._mtimes = {}   # bot_id -> mtime_ns of the file last read or written
+        self._dirty = set()
+        self._flusher = None
+
+    def _path(self, bot_id):
+        return os.path.join(self.data_dir, f"{bot_id}.json")
+
+    def _load(self, bot_id):
+        """Pick up state another worker wrote, if it is newer (lock held)."""
+        path = self._path(bot_id)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if self._mtimes.get(bot_id) == mtime:
+            return
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Unreadable push state for %s: %s", bot_id, e)
+            return
+        self._mtimes[bot_id] = mtime
+        current = self._state.get(bot_id)
+        if current is None or _newer(entry, current):
+            self._state[bot_id] = entry
+
+    def apply(self, bot_id, body, now=None):
+        """Apply one update.  Returns ``{"seq", "resync"}``; ``resync`` means
+        the update was refused and the bot should send its full state."""
+        epoch, seq, full, fields = parse_update(body)
+        now = now or time.time()
+        with self._lock:
+            self._load(bot_id)
+            current = self._state.get(bot_id)
+            same = current is not None and current["epoch"] == epoch
+            if same and seq <= current["seq"]:
+                # A heartbeat, or a retry of an update already applied
+                entry = dict(current, ts=now)
+            elif full:
+                entry = {"epoch": epoch, "seq": seq, "ts": now,
+                         "fields": {k: v for k, v in fields.items() if v is not None}}
+            elif same and seq == current["seq"] + 1:
+                merged = dict(current["fields"], **fields)
+                entry = {"epoch": epoch, "seq": seq, "ts": now,
+                         "fields": {k: v for k, v in merged.items() if v is not None}}
+            else:
+                return {"seq": current["seq"] if same else None, "resync": True}
+            self._state[bot_id] = entry
+            self._dirty.add(bot_id)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="push-flush",
+                                                 daemon=True)
+                self._flusher.start()
+        return {"seq": entry["seq"], "resync": False}
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Push state flush failed")
+
+    def flush(self):
+        """Write the state of every bot updated since the last flush."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            entries = {}
+            for bot_id in dirty:
+                ours = self._state[bot_id]
+                self._load(bot_id)  # don't overwrite newer state from another worker
+                if self._state[bot_id] is ours:
+                    entries[bot_id] = ours
+        for bot_id, entry in entries.items():
+            path = self._path(bot_id)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+            with self._lock:
+                self._mtimes[bot_id] = os.stat(path).st_mtime_ns
+
+    def records(self, bot_ids, now=None):
+        """``{bot_id: BotRecord}`` for the bots that pushed within ``stale_after``."""
+        now = now or time.time()
+        out = {}
+        with self._lock:
+            for bot_id in bot_ids:
+                self._load(bot_id)
+                entry = self._state.get(bot_id)
+                if entry is not None and now - entry["ts"] < self.stale_after:
+                    # A bot that can push is up unless it says otherwise
+                    out[bot_id] = BotRecord(**dict({"healthy": True}, **entry["fields"]))
+        return out
+
+    def status(self, bot_ids, now=None):
+        """Per bot: ``source`` (``push`` or ``pull``), last ``seq`` and ``age``."""
+        now = now or time.time()
+        out = {}
+        with self._lock:
+            for bot_id in bot_ids:
+                self._load(bot_id)
+                entry = self._state.get(bot_id)
+                if entry is None:
+                    out[bot_id] = {"source": "pull"}
+                    continue
+                age = now - entry["ts"]
+                out[bot_id] = {"source": "push" if age < self.stale_after else "pull",
+                               "epoch": entry["epoch"], "seq": entry["seq"],
+                               "age": round(age, 1)}
+        return out
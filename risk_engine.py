@@ -0,0 +1,276 @@
+"""Portfolio risk engine — incremental drawdown, volatility and threshold alerts.
+
+Every P&L sample updates a ``RiskTracker`` in O(1): running high-water
+mark, current and max drawdown, and rolling volatility of sample-to-sample
+P&L changes over a fixed window (kept as running sums over a ring of
+deltas).  Returns are relative to the bot's ``CapitalStore`` allocation.
+
+Threshold checks are edge-triggered: an alert is posted to the webhook
+sink when a metric crosses its limit and again when it recovers.
+
+High-water marks, max drawdowns and the alerts currently firing persist
+in ``data/risk.json`` and are picked up again by the next engine to
+update, so a restart neither resets drawdowns nor re-fires alerts.
+"""
+
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from array import array
+
+import requests
+
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+VOL_WINDOW = 240      # samples in the rolling volatility window
+WEBHOOK_TIMEOUT = 5   # seconds
+
+# metric -> direction; "max" limits fire when the value exceeds them,
+# "min" limits when it falls below
+METRICS = {
+    "max_drawdown": ("drawdown", "max"),
+    "max_drawdown_pct": ("drawdown_pct", "max"),
+    "max_volatility": ("volatility", "max"),
+    "min_return_pct": ("return_pct", "min"),
+}
+
+
+class RiskTracker:
+    """Running risk statistics for one P&L series (dollars)."""
+
+    def __init__(self, window=VOL_WINDOW):
+        self.window = window
+        self._deltas = array("d", [0.0]) * window
+        self._pos = 0
+        self._count = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self.last = None
+        self.hwm = None
+        self.max_drawdown = 0.0
+        self.updated = None
+
+    def update(self, pnl, ts=None):
+        if self.last is not None:
+            delta = pnl - self.last
+            old = self._deltas[self._pos]
+            self._deltas[self._pos] = delta
+            self._pos = (self._pos + 1) % self.window
+            if self._count < self.window:
+                self._count += 1
+                old = 0.0
+            self._sum += delta - old
+            self._sumsq += delta * delta - old * old
+        self.last = pnl
+        self.hwm = pnl if self.hwm is None else max(self.hwm, pnl)
+        self.max_drawdown = max(self.max_drawdown, self.hwm - pnl)
+        self.updated = ts or time.time()
+
+    @classmethod
+    def restore(cls, metrics, window=VOL_WINDOW):
+        """A tracker resuming from a persisted ``snapshot()``.
+
+        The volatility window starts empty; its deltas are not persisted.
+        """
+        tracker = cls(window)
+        if metrics.get("samples"):
+            tracker.last = metrics["pnl"]
+            tracker.hwm = metrics["hwm"]
+            tracker.max_drawdown = metrics["max_drawdown"]
+            tracker.updated = metrics.get("updated")
+        return tracker
+
+    @property
+    def drawdown(self):
+        return 0.0 if self.hwm is None else self.hwm - self.last
+
+    @property
+    def volatility(self):
+        n = self._count
+        if n < 2:
+            return 0.0
+        return math.sqrt(max(0.0, (self._sumsq - self._sum * self._sum / n) / (n - 1)))
+
+    def snapshot(self, allocation=None):
+        """Metrics dict; ``allocation`` in dollars enables the % figures."""
+        out = {
+            "pnl": round(self.last or 0.0, 2),
+            "hwm": round(self.hwm or 0.0, 2),
+            "drawdown": round(self.drawdown, 2),
+            "max_drawdown": round(self.max_drawdown, 2),
+            "volatility": round(self.volatility, 4),
+            "samples": self._count + (1 if self.last is not None else 0),
+            "updated": self.updated,
+            "allocation": allocation,
+            "return_pct": None,
+            "drawdown_pct": None,
+        }
+        if allocation:
+            out["return_pct"] = round((self.last or 0.0) / allocation * 100, 2)
+            # Drawdown measured against equity at the high-water mark
+            out["drawdown_pct"] = round(self.drawdown / (allocation + (self.hwm or 0.0)) * 100, 2) \
+                if allocation + (self.hwm or 0.0) > 0 else None
+        return out
+
+
+class WebhookNotifier:
+    """Posts alert payloads to a local webhook from a background thread."""
+
+    def __init__(self, url):
+        self.url = url
+        self._queue = queue.Queue(maxsize=1000)
+        if url:
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def send(self, payload):
+        if not self.url:
+            return
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            logger.warning("Risk alert queue full; dropping %s", payload)
+
+    def _run(self):
+        while True:
+            payload = self._queue.get()
+            try:
+                requests.post(self.url, json=payload, timeout=WEBHOOK_TIMEOUT)
+            except requests.RequestException as e:
+                logger.warning("Risk webhook failed: %s", e)
+
+
+class RiskEngine:
+    """Per-bot and portfolio trackers plus threshold alerting."""
+
+    PORTFOLIO = "portfolio"
+
+    def __init__(self, thresholds, webhook_url="", state_path=None):
+        self.thresholds = thresholds
+        self.notifier = WebhookNotifier(webhook_url)
+        self.state_path = state_path or os.path.join(DATA_DIR, "risk.json")
+        self._trackers = {}
+        self._allocations = {}
+        self._firing = set()  # (scope, metric) currently over the limit
+        self._restored = False
+        self._lock = threading.Lock()
+
+    def _limits(self, scope):
+        if scope == self.PORTFOLIO:
+            return self.thresholds.get(self.PORTFOLIO, {})
+        return dict(self.thresholds.get("default", {}), **self.thresholds.get(scope, {}))
+
+    def update(self, bots, accounts, ts=None):
+        """Feed one overview cycle.
+
+        ``bots`` is ``{bot_id: entry}`` from the overview (P&L in dollars);
+        unreachable bots are skipped, and count towards the portfolio at
+        their last known P&L.  ``accounts`` is CapitalStore's account dict
+        (allocations in cents).  Returns fired/resolved alerts.
+        """
+        ts = ts or time.time()
+        alerts = []
+        with self._lock:
+            if not self._restored:
+                self._restore_locked()
+            total = 0.0
+            for bot_id, entry in bots.items():
+                if "error" in entry:
+                    # A missed poll is not a loss: hold the bot at its last sample
+                    tracker = self._trackers.get(bot_id)
+                    total += (tracker.last or 0.0) if tracker is not None else 0.0
+                    continue
+                pnl = float(entry.get("pnl", 0))
+                total += pnl
+                self._trackers.setdefault(bot_id, RiskTracker()).update(pnl, ts)
+            self._trackers.setdefault(self.PORTFOLIO, RiskTracker()).update(total, ts)
+            self._allocations = {bot_id: a.get("allocation", 0) / 100.0
+                                 for bot_id, a in accounts.items()}
+            self._allocations[self.PORTFOLIO] = sum(self._allocations.values())
+            for scope in self._trackers:
+                alerts += self._check(scope, ts)
+            snapshot = self._snapshot_locked()
+        for alert in alerts:
+            logger.warning("Risk alert: %s", alert)
+            self.notifier.send(alert)
+        self._persist(snapshot)
+        return alerts
+
+    def _restore_locked(self):
+        """Resume from the state the last updating engine persisted.
+
+        Done on the first ``update`` rather than at construction, so
+        engines that only serve ``snapshot()`` keep reading the file.
+        """
+        self._restored = True
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            for scope, metrics in state.get("scopes", {}).items():
+                self._trackers[scope] = RiskTracker.restore(metrics)
+            for key in state.get("firing", []):
+                scope, _, metric = key.rpartition(":")
+                self._firing.add((scope, metric))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Could not restore risk state from %s: %s", self.state_path, e)
+            self._trackers.clear()
+            self._firing.clear()
+            return
+        logger.info("Restored risk state for %d scopes, %d alerts firing",
+                    len(self._trackers), len(self._firing))
+
+    def _check(self, scope, ts):
+        metrics = self._trackers[scope].snapshot(self._allocations.get(scope))
+        alerts = []
+        for name, limit in self._limits(scope).items():
+            if limit is None or name not in METRICS:
+                continue
+            field, direction = METRICS[name]
+            value = metrics.get(field)
+            if value is None:
+                continue
+            breached = value > limit if direction == "max" else value < limit
+            key = (scope, name)
+            if breached != (key in self._firing):
+                (self._firing.add if breached else self._firing.discard)(key)
+                alerts.append({
+                    "scope": scope, "metric": name, "value": value, "threshold": limit,
+                    "state": "firing" if breached else "resolved", "ts": ts,
+                })
+        return alerts
+
+    def _snapshot_locked(self):
+        return {
+            "ts": time.time(),
+            "scopes": {scope: t.snapshot(self._allocations.get(scope))
+                       for scope, t in self._trackers.items()},
+            "firing": sorted(f"{scope}:{metric}" for scope, metric in self._firing),
+            "thresholds": self.thresholds,
+        }
+
+    def _persist(self, snapshot):
+        tmp = self.state_path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            logger.warning("Failed to persist risk state: %s", e)
+
+    def snapshot(self):
+        """Latest metrics from whichever worker runs the engine loop."""
+        with self._lock:
+            if self._trackers:
+                return self._snapshot_locked()
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"ts": None, "scopes": {}, "firing": [], "thresholds": self.thresholds}
@@ -0,0 +1,62 @@
+"""SSH channel relay — select-driven reads, coalesced binary output frames."""
+
+import codecs
+import select
+import time
+
+COALESCE_WINDOW = 0.002     # seconds to wait for more output before flushing
+COALESCE_MAX_BYTES = 32768  # flush as soon as a frame reaches this size
+IDLE_POLL = 1.0             # wake-up interval to re-check the stop flag
+
+
+def relay_channel(channel, send, stop_event,
+                  window=COALESCE_WINDOW, max_bytes=COALESCE_MAX_BYTES):
+    """Pump SSH channel output into ``send(bytes)`` until EOF or stop.
+
+    Blocks in ``select()`` until the channel is readable.  If more output is
+    already queued behind the first read, keeps reading for at most
+    ``window`` seconds (or until ``max_bytes`` have accumulated) so bursts go
+    out as one frame; an isolated read is flushed immediately.
+
+    Output is passed through an incremental UTF-8 decoder so a multibyte
+    character split across reads is never cut in half — every frame handed
+    to ``send`` is valid UTF-8.
+
+    Returns when the channel reaches EOF, ``stop_event`` is set, or ``send``
+    raises.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while not stop_event.is_set():
+        readable, _, _ = select.select([channel], [], [], IDLE_POLL)
+        if not readable:
+            if channel.closed:
+                break
+            continue
+
+        data = channel.recv(max_bytes)
+        eof = not data
+        buf = bytearray(data)
+        deadline = time.monotonic() + window
+        in_burst = False
+        while not eof and len(buf) < max_bytes:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # A lone read (typically a keystroke echo) flushes immediately;
+            # only once more output is already queued do we wait out the window.
+            readable, _, _ = select.select([channel], [], [],
+                                           remaining if in_burst else 0)
+            if not readable:
+                break
+            more = channel.recv(max_bytes - len(buf))
+            if not more:
+                eof = True
+                break
+            buf += more
+            in_burst = True
+
+        text = decoder.decode(bytes(buf), final=eof)
+        if text:
+            send(text.encode("utf-8"))
+        if eof:
+            break
@@ -0,0 +1,84 @@
+"""SSH shell opening for the web terminal — defaults come from the environment."""
+
+import os
+
+import paramiko
+
+from config import BOT_HOST
+
+SSH_HOST = os.environ.get("SSH_HOST", BOT_HOST)
+SSH_PORT = int(os.environ.get("SSH_PORT", "22"))
+SSH_USER = os.environ.get("SSH_USER", "")
+SSH_PASSWORD = os.environ.get("SSH_PASSWORD", "")
+SSH_KEY_PATH = os.environ.get("SSH_KEY_PATH", "")
+
+
+def open_shell(msg):
+    """Connect and open an interactive shell for a ``connect`` message.
+
+    Returns ``(client, channel, label)``; raises ValueError with a
+    user-facing message on failure.
+    """
+    host = msg.get("host", SSH_HOST) or SSH_HOST
+    port = int(msg.get("port", SSH_PORT) or SSH_PORT)
+    username = msg.get("username", SSH_USER) or SSH_USER
+
+    # Determine auth method
+    password = None
+    pkey = None
+    if msg.get("use_default_auth"):
+        password = SSH_PASSWORD or None
+        if SSH_KEY_PATH and os.path.isfile(SSH_KEY_PATH):
+            try:
+                pkey = paramiko.RSAKey.from_private_key_file(SSH_KEY_PATH)
+            except Exception:
+                try:
+                    pkey = paramiko.Ed25519Key.from_private_key_file(SSH_KEY_PATH)
+                except Exception:
+                    pass
+    else:
+        password = msg.get("password") or None
+
+    if not username:
+        raise ValueError("Username is required")
+
+    # Establish SSH connection
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    try:
+        connect_kwargs = {
+            "hostname": host,
+            "port": port,
+            "username": username,
+            "timeout": 10,
+            "allow_agent": False,
+            "look_for_keys": False,
+        }
+        if pkey:
+            connect_kwargs["pkey"] = pkey
+        elif password:
+            connect_kwargs["password"] = password
+        else:
+            connect_kwargs["look_for_keys"] = True
+            connect_kwargs["allow_agent"] = True
+        client.connect(**connect_kwargs)
+    except paramiko.AuthenticationException:
+        client.close()
+        raise ValueError("Authentication failed — check credentials")
+    except Exception as e:
+        client.close()
+        raise ValueError(f"SSH connection failed: {e}")
+
+    # Open interactive shell
+    try:
+        channel = client.invoke_shell(
+            term="xterm-256color",
+            width=int(msg.get("cols", 80) or 80),
+            height=int(msg.get("rows", 24) or 24),
+        )
+        channel.settimeout(0.1)
+    except Exception as e:
+        client.close()
+        raise ValueError(f"Failed to open shell: {e}")
+
+    return client, channel, f"{username}@{host}"
@@ -0,0 +1,1208 @@
+const BOTS = window.PORTAL.bots;
+const BOT_IDS = Object.keys(BOTS);
+let overviewData = null;
+let loadedIframes = {};
+
+// Tab switching
+document.getElementById('tabBar').addEventListener('click', function(e) {
+  const tab = e.target.closest('.tab');
+  if (!tab) return;
+  const target = tab.dataset.tab;
+
+  document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
+  document.querySelectorAll('.panel').forEach(p => p.classList.remove('active'));
+  tab.classList.add('active');
+  document.getElementById('panel-' + target).classList.add('active');
+
+  // Lazy-load iframe (skip non-bot tabs)
+  if (target !== 'overview' && target !== 'capital' && target !== 'claude' && target !== 'rules' && target !== 'system' && !loadedIframes[target]) {
+    loadIframe(target);
+  }
+  if (target === 'rules') loadRules();  // always re-fetch — no cache
+  if (target === 'system') loadSystem();
+});
+
+function loadIframe(botId) {
+  loadedIframes[botId] = true;
+  const panel = document.getElementById('panel-' + botId);
+  const loading = document.getElementById('loading-' + botId);
+  const iframe = document.createElement('iframe');
+  iframe.src = '/bot/' + botId + '/';
+  iframe.onload = function() {
+    if (loading) loading.style.display = 'none';
+  };
+  panel.appendChild(iframe);
+}
+
+// Overview rendering
+function formatPnl(val) {
+  const sign = val >= 0 ? '+' : '';
+  return sign + '$' + Math.abs(val).toFixed(2);
+}
+
+function pnlClass(val) {
+  if (val > 0) return 'positive';
+  if (val < 0) return 'negative';
+  return 'zero';
+}
+
+function renderOverview(data) {
+  overviewData = data;
+
+  // Total P&L
+  const totalEl = document.getElementById('totalPnl');
+  totalEl.textContent = formatPnl(data.total_pnl);
+  totalEl.className = 'total-pnl ' + pnlClass(data.total_pnl);
+
+  // Refresh info
+  document.getElementById('refreshInfo').textContent = data.warm_start
+    ? 'Last known as of ' + new Date(data.warm_start.as_of * 1000).toLocaleTimeString() +
+      ' (' + Math.round(data.warm_start.age) + 's old, refreshing)'
+    : 'Updated ' + new Date().toLocaleTimeString();
+
+  // Bot cards — grouped by category
+  const container = document.getElementById('botCards');
+  container.innerHTML = '';
+
+  const CATEGORIES = window.PORTAL.categories;
+  const catColors = {};
+  for (const [k,v] of Object.entries(CATEGORIES)) catColors[k] = v.color || '#666';
+
+  // Group bots by category preserving config order
+  const byCategory = {};
+  const catOrder = [];
+  for (const [botId, bot] of Object.entries(data.bots)) {
+    const cfg = BOTS[botId] || {};
+    const cat = cfg.category || 'other';
+    if (!byCategory[cat]) { byCategory[cat] = []; catOrder.push(cat); }
+    byCategory[cat].push([botId, bot, cfg]);
+  }
+
+  for (const cat of catOrder) {
+    const bots = byCategory[cat];
+    const catInfo = CATEGORIES[cat] || {};
+    const catColor = catInfo.color || '#666';
+
+    // Category header
+    const header = document.createElement('div');
+    header.className = 'bot-category';
+    const title = document.createElement('div');
+    title.className = 'bot-category-title';
+    title.innerHTML = `<span class="bot-category-dot" style="background:${catColor}"></span>${catInfo.label || cat.toUpperCase()}`;
+    header.appendChild(title);
+
+    // Cards grid
+    const grid = document.createElement('div');
+    grid.className = 'bot-cards';
+
+    for (const [botId, bot, cfg] of bots) {
+      const card = document.createElement('div');
+      card.className = 'bot-card';
+      card.style.borderLeftColor = bot.color || cfg.color || '#666';
+
+      const isHealthy = bot.healthy;
+      const hasError = !!bot.error;
+      const modeStr = (bot.mode || '').toUpperCase();
+      const isLive = modeStr === 'LIVE';
+      const modeCls = isLive ? 'live' : 'paper';
+
+      let statsHtml = '';
+      if (hasError) {
+        statsHtml = '<div class="error-msg">' + bot.error + '</div>';
+      } else {
+        statsHtml = '<div class="bot-stats">';
+        statsHtml += '<div class="stat-item"><div class="stat-label">P&L</div>' +
+          '<div class="stat-value ' + pnlClass(bot.pnl) + '">' + formatPnl(bot.pnl) + '</div></div>';
+        if (bot.win_rate !== undefined) {
+          const wrColor = bot.win_rate >= 60 ? 'var(--green)' : bot.win_rate >= 45 ? '' : 'var(--red)';
+          statsHtml += '<div class="stat-item"><div class="stat-label">Win Rate</div>' +
+            `<div class="stat-value" style="color:${wrColor}">${bot.win_rate}%</div></div>`;
+        }
+        if (bot.completed !== undefined) {
+          statsHtml += '<div class="stat-item"><div class="stat-label">Trades</div>' +
+            '<div class="stat-value">' + bot.completed +
+            (bot.wins !== undefined ? ' (' + bot.wins + 'W)' : '') + '</div></div>';
+        }
+        if (bot.open_positions !== undefined) {
+          statsHtml += '<div class="stat-item"><div class="stat-label">Open</div>' +
+            '<div class="stat-value">' + bot.open_positions + '</div></div>';
+        }
+        if (bot.daily_trades !== undefined) {
+          statsHtml += '<div class="stat-item"><div class="stat-label">Today</div>' +
+            '<div class="stat-value">' + bot.daily_trades + ' trades</div></div>';
+        }
+        statsHtml += '</div>';
+      }
+
+      const statusCls = hasError ? 'unknown' : (isHealthy ? 'healthy' : 'unhealthy');
+      const statusText = hasError ? 'OFFLINE' : (isHealthy ? 'OK' : 'DOWN');
+      const desc = cfg.description ? `<div class="bot-card-desc">${cfg.description}</div>` : '';
+      const modeLabel = modeStr || 'UNKNOWN';
+
+      card.innerHTML =
+        '<div class="bot-card-header">' +
+          '<span class="bot-card-title">' + bot.name + '</span>' +
+          '<span class="card-header-badges">' +
+            `<span class="mode-badge ${modeCls}">${modeLabel}</span>` +
+            `<span class="bot-badge ${statusCls}">${statusText}</span>` +
+          '</span>' +
+        '</div>' +
+        desc +
+        statsHtml +
+        '<button class="open-btn" data-bot="' + botId + '">Open Dashboard &rarr;</button>';
+
+      grid.appendChild(card);
+    }
+
+    header.appendChild(grid);
+    container.appendChild(header);
+  }
+
+  // Update tab dots
+  for (const [botId, bot] of Object.entries(data.bots)) {
+    const dot = document.getElementById('dot-' + botId);
+    if (dot) {
+      dot.className = 'dot ' + (bot.error ? 'unhealthy' : (bot.healthy ? 'healthy' : 'unhealthy'));
+    }
+  }
+}
+
+// Open bot dashboard from card
+document.getElementById('botCards').addEventListener('click', function(e) {
+  const btn = e.target.closest('.open-btn');
+  if (!btn) return;
+  const botId = btn.dataset.bot;
+  // Activate the tab
+  const tab = document.querySelector('.tab[data-tab="' + botId + '"]');
+  if (tab) tab.click();
+});
+
+// Fetch overview data
+function fetchOverview() {
+  fetch('/api/overview')
+    .then(r => r.json())
+    .then(data => renderOverview(data))
+    .catch(err => {
+      document.getElementById('refreshInfo').textContent = 'Error: ' + err.message;
+    });
+}
+
+// Initial load, then pushed updates from the hub; poll if the stream is unavailable
+fetchOverview();
+let overviewTimer = null;
+function pollOverview() {
+  if (!overviewTimer) overviewTimer = setInterval(fetchOverview, 5000);
+}
+if (window.EventSource) {
+  const overviewStream = new EventSource('/api/overview/stream');
+  overviewStream.onmessage = function(e) { renderOverview(JSON.parse(e.data)); };
+  overviewStream.onerror = function() {
+    if (overviewStream.readyState === EventSource.CLOSED) pollOverview();
+  };
+} else {
+  pollOverview();
+}
+
+// ---- Capital tab (virtual ledger) ----
+let capitalData = null;
+let capitalInterval = null;
+
+// Auto-refresh capital when tab is active
+document.getElementById('tabBar').addEventListener('click', function(e) {
+  const tab = e.target.closest('.tab');
+  if (!tab) return;
+  if (tab.dataset.tab === 'capital') {
+    fetchCapital();
+    fetchTransferHistory();
+    if (!capitalInterval) capitalInterval = setInterval(function() { fetchCapital(); fetchTransferHistory(); }, 10000);
+  } else {
+    if (capitalInterval) { clearInterval(capitalInterval); capitalInterval = null; }
+  }
+});
+
+function centsToStr(c) { return '$' + (Math.abs(c) / 100).toFixed(2); }
+function centsToSigned(c) { return (c >= 0 ? '+' : '-') + centsToStr(c); }
+
+function fetchCapital() {
+  fetch('/api/capital')
+    .then(r => { if (!r.ok) throw new Error('Error ' + r.status); return r.json(); })
+    .then(data => { capitalData = data; renderCapital(); })
+    .catch(err => {
+      document.getElementById('capitalRefresh').textContent = err.message;
+    });
+}
+
+function renderCapital() {
+  if (!capitalData) return;
+  const d = capitalData;
+
+  // Header total
+  const totalEl = document.getElementById('capitalTotal');
+  if (d.real_balance !== null) {
+    totalEl.textContent = '$' + (d.real_balance / 100).toFixed(2);
+    totalEl.className = 'capital-total ' + pnlClass(d.real_balance);
+  } else {
+    totalEl.textContent = '$' + (d.total_allocated / 100).toFixed(2) + ' allocated';
+    totalEl.className = 'capital-total';
+  }
+  var info = 'Updated ' + new Date().toLocaleTimeString();
+  if (d.reconciled_at !== undefined) {
+    info = 'Reconciled ' + (d.reconciled_at ? new Date(d.reconciled_at * 1000).toLocaleTimeString() : '(pending)') +
+      (d.stale ? ' — stale' : '');
+  }
+  if (d.drift && d.drift.length) {
+    info += ' — drift: ' + d.drift.map(function(x) {
+      return x.kind + (x.account ? ' ' + x.account : '') + ' ' + centsToSigned(x.amount);
+    }).join(', ');
+  }
+  document.getElementById('capitalRefresh').textContent = info;
+
+  // Cards: one per account + unallocated
+  const container = document.getElementById('capitalCards');
+  container.innerHTML = '';
+
+  // Unallocated card
+  const unCard = document.createElement('div');
+  unCard.className = 'sub-card';
+  unCard.style.borderLeftColor = 'var(--accent)';
+  var unBal, unLabel, unSub;
+  if (d.real_balance !== null) {
+    unBal = d.unallocated !== null ? d.unallocated : 0;
+    unLabel = '$' + (Math.abs(unBal) / 100).toFixed(2);
+    unSub = 'Real balance ($' + (d.real_balance / 100).toFixed(2) + ') minus allocations ($' + (d.total_allocated / 100).toFixed(2) + ')';
+  } else {
+    unBal = 0;
+    unLabel = 'No Kalshi API key';
+    unSub = 'Total allocated: $' + (d.total_allocated / 100).toFixed(2) + ' across ' + d.accounts.length + ' bot' + (d.accounts.length !== 1 ? 's' : '') + '. Connect Kalshi API to see remaining balance.';
+  }
+  unCard.innerHTML =
+    '<div class="sub-card-header">' +
+      '<span class="sub-card-label">Unallocated</span>' +
+      '<span class="sub-card-badge">POOL</span>' +
+    '</div>' +
+    '<div class="sub-card-balance ' + pnlClass(unBal) + '">' + unLabel + '</div>' +
+    '<div class="sub-card-bot">' + unSub + '</div>';
+  container.appendChild(unCard);
+
+  // Per-bot cards
+  d.accounts.forEach(function(a) {
+    const card = document.createElement('div');
+    card.className = 'sub-card';
+    card.style.borderLeftColor = a.color || '#888';
+    card.innerHTML =
+      '<div class="sub-card-header">' +
+        '<span class="sub-card-label">' + a.label + '</span>' +
+        '<span class="sub-card-badge">' + a.id + '</span>' +
+      '</div>' +
+      '<div class="sub-card-balance">' + centsToStr(a.effective) + '</div>' +
+      '<div class="bot-stats" style="margin-top:0.5rem">' +
+        '<div class="stat-item"><div class="stat-label">Allocation</div><div class="stat-value">' + centsToStr(a.allocation) + '</div></div>' +
+        '<div class="stat-item"><div class="stat-label">P&L</div><div class="stat-value ' + pnlClass(a.pnl) + '">' + centsToSigned(a.pnl) + '</div></div>' +
+      '</div>';
+    container.appendChild(card);
+  });
+
+  // Allocate form: populate bot dropdown (only bots not yet allocated)
+  const allocatedIds = d.accounts.map(function(a) { return a.id; });
+  const allocSel = document.getElementById('allocBot');
+  const prevAlloc = allocSel.value;
+  allocSel.innerHTML = '';
+  BOT_IDS.forEach(function(id) {
+    if (allocatedIds.indexOf(id) === -1) {
+      allocSel.innerHTML += '<option value="' + id + '">' + BOTS[id].name + '</option>';
+    }
+  });
+  // Also allow re-allocating existing bots (to update amount)
+  d.accounts.forEach(function(a) {
+    allocSel.innerHTML += '<option value="' + a.id + '">' + a.label + ' (update)</option>';
+  });
+  if (prevAlloc) allocSel.value = prevAlloc;
+
+  // Auto-fill label when bot selected
+  allocSel.onchange = function() {
+    const id = allocSel.value;
+    if (BOTS[id]) document.getElementById('allocLabel').value = BOTS[id].name;
+  };
+  // Trigger initial fill if empty
+  if (!document.getElementById('allocLabel').value && allocSel.value && BOTS[allocSel.value]) {
+    document.getElementById('allocLabel').value = BOTS[allocSel.value].name;
+  }
+
+  // Transfer dropdowns: all accounts + unallocated
+  ['xferFrom', 'xferTo'].forEach(function(selId) {
+    const sel = document.getElementById(selId);
+    const prev = sel.value;
+    sel.innerHTML = '<option value="unallocated">Unallocated</option>';
+    d.accounts.forEach(function(a) {
+      sel.innerHTML += '<option value="' + a.id + '">' + a.label + ' (' + centsToStr(a.allocation) + ')</option>';
+    });
+    if (prev) sel.value = prev;
+  });
+
+  // Management table
+  const tbody = document.getElementById('mgmtBody');
+  tbody.innerHTML = '';
+  d.accounts.forEach(function(a) {
+    const tr = document.createElement('tr');
+    tr.innerHTML =
+      '<td>' + a.id + '</td>' +
+      '<td>' + a.label + '</td>' +
+      '<td>' + centsToStr(a.allocation) + '</td>' +
+      '<td class="' + pnlClass(a.pnl) + '">' + centsToSigned(a.pnl) + '</td>' +
+      '<td>' + centsToStr(a.effective) + '</td>' +
+      '<td><button class="btn btn-red btn-small" onclick="removeAllocation(\'' + a.id + '\')">Remove</button></td>';
+    tbody.appendChild(tr);
+  });
+  if (d.accounts.length === 0) {
+    tbody.innerHTML = '<tr><td colspan="6" style="color:var(--text-dim);text-align:center">No allocations yet</td></tr>';
+  }
+}
+
+function doAllocate() {
+  const botId = document.getElementById('allocBot').value;
+  const label = document.getElementById('allocLabel').value.trim();
+  const amt = parseFloat(document.getElementById('allocAmount').value);
+  const fb = document.getElementById('allocFeedback');
+  if (!botId) { fb.textContent = 'Select a bot'; fb.className = 'feedback err'; return; }
+  if (!label) { fb.textContent = 'Label is required'; fb.className = 'feedback err'; return; }
+  if (isNaN(amt) || amt < 0) { fb.textContent = 'Enter a valid amount'; fb.className = 'feedback err'; return; }
+  document.getElementById('allocBtn').disabled = true;
+  fetch('/api/capital/allocate', {
+    method: 'POST', headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify({bot_id: botId, label: label, amount: amt})
+  })
+  .then(r => r.json().then(d => ({ok: r.ok, data: d})))
+  .then(function(res) {
+    fb.textContent = res.ok ? 'Allocated $' + amt.toFixed(2) + ' to ' + label : (res.data.error || 'Failed');
+    fb.className = 'feedback ' + (res.ok ? 'ok' : 'err');
+    if (res.ok) { document.getElementById('allocAmount').value = ''; fetchCapital(); fetchTransferHistory(); }
+  })
+  .catch(e => { fb.textContent = e.message; fb.className = 'feedback err'; })
+  .finally(() => { document.getElementById('allocBtn').disabled = false; });
+}
+
+function doTransfer() {
+  const from = document.getElementById('xferFrom').value;
+  const to = document.getElementById('xferTo').value;
+  const amt = parseFloat(document.getElementById('xferAmount').value);
+  const fb = document.getElementById('xferFeedback');
+  if (!amt || amt <= 0) { fb.textContent = 'Enter a valid amount'; fb.className = 'feedback err'; return; }
+  if (from === to) { fb.textContent = 'From and To must differ'; fb.className = 'feedback err'; return; }
+  const fromLabel = from === 'unallocated' ? 'Unallocated' : from;
+  const toLabel = to === 'unallocated' ? 'Unallocated' : to;
+  if (!confirm('Transfer $' + amt.toFixed(2) + ' from ' + fromLabel + ' to ' + toLabel + '?')) return;
+  document.getElementById('xferBtn').disabled = true;
+  fetch('/api/capital/transfer', {
+    method: 'POST', headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify({from: from, to: to, amount: amt})
+  })
+  .then(r => r.json().then(d => ({ok: r.ok, data: d})))
+  .then(function(res) {
+    fb.textContent = res.ok ? 'Transfer complete' : (res.data.error || 'Transfer failed');
+    fb.className = 'feedback ' + (res.ok ? 'ok' : 'err');
+    if (res.ok) { document.getElementById('xferAmount').value = ''; fetchCapital(); fetchTransferHistory(); }
+  })
+  .catch(e => { fb.textContent = e.message; fb.className = 'feedback err'; })
+  .finally(() => { document.getElementById('xferBtn').disabled = false; });
+}
+
+function removeAllocation(botId) {
+  if (!confirm('Remove allocation for ' + botId + '? Funds return to unallocated pool.')) return;
+  fetch('/api/capital/' + botId, {method: 'DELETE'})
+    .then(r => { if (!r.ok) throw new Error('Remove failed'); return r.json(); })
+    .then(() => fetchCapital())
+    .catch(e => alert(e.message));
+}
+
+function fetchTransferHistory() {
+  fetch('/api/capital/transfers?limit=20')
+    .then(r => { if (!r.ok) throw new Error('Error'); return r.json(); })
+    .then(function(data) {
+      const tbody = document.getElementById('xferHistoryBody');
+      tbody.innerHTML = '';
+      const xfers = data.transfers || [];
+      if (xfers.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="4" style="color:var(--text-dim);text-align:center">No transfers yet</td></tr>';
+        return;
+      }
+      xfers.forEach(function(t) {
+        const tr = document.createElement('tr');
+        const ts = new Date(t.ts).toLocaleString();
+        const fromLabel = t.from === 'unallocated' ? 'Unallocated' : t.from;
+        const toLabel = t.to === 'unallocated' ? 'Unallocated' : t.to;
+        tr.innerHTML =
+          '<td>' + ts + '</td>' +
+          '<td>' + fromLabel + '</td>' +
+          '<td>' + toLabel + '</td>' +
+          '<td>' + centsToStr(t.amount) + '</td>';
+        tbody.appendChild(tr);
+      });
+    })
+    .catch(function() {});
+}
+
+// ---- Claude Code integration ----
+var claudeMessages = [];
+var claudeRunning = false;
+var claudeSessionId = null;  // Tracks the conversation session for memory
+
+function _esc(str) {
+  var d = document.createElement('div');
+  d.textContent = str;
+  return d.innerHTML;
+}
+
+function addClaudeMsg(role, html) {
+  claudeMessages.push({role: role, html: html});
+  renderClaudeMsgs();
+}
+
+function renderClaudeMsgs() {
+  var container = document.getElementById('claudeMessages');
+  // Remove welcome message on first interaction
+  var welcome = container.querySelector('.claude-welcome');
+  if (welcome && claudeMessages.length > 0) welcome.remove();
+
+  // Rebuild messages
+  while (container.children.length > claudeMessages.length) {
+    container.removeChild(container.lastChild);
+  }
+  for (var i = 0; i < claudeMessages.length; i++) {
+    var msg = claudeMessages[i];
+    var el = container.children[i];
+    if (!el) {
+      el = document.createElement('div');
+      el.className = 'claude-msg ' + msg.role;
+      container.appendChild(el);
+    }
+    el.innerHTML = msg.html;
+  }
+  container.scrollTop = container.scrollHeight;
+}
+
+async function sendClaudeMessage() {
+  if (claudeRunning) return;
+  var input = document.getElementById('claudeInput');
+  var prompt = input.value.trim();
+  if (!prompt) return;
+
+  input.value = '';
+  addClaudeMsg('user', _esc(prompt));
+
+  claudeRunning = true;
+  _updateClaudeUI();
+
+  // Placeholder for assistant response
+  var aIdx = claudeMessages.length;
+  claudeMessages.push({role: 'assistant', html: '<span class="claude-typing">Thinking...</span>'});
+  renderClaudeMsgs();
+
+  var textContent = '';
+  var toolUses = [];
+  var meta = null;
+
+  var jobId = null;
+  var offset = 0;
+  var finished = false;
+  var retries = 0;
+
+  try {
+    var response = await fetch('/api/claude/jobs', {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      body: JSON.stringify({prompt: prompt, session_id: claudeSessionId || ''})
+    });
+
+    if (!response.ok) {
+      var err = await response.json();
+      claudeMessages[aIdx].html = '<span class="claude-error">' + _esc(err.error || 'Request failed') + '</span>';
+      renderClaudeMsgs();
+      return;
+    }
+    jobId = (await response.json()).id;
+
+    // The job runs server-side; if the stream drops, resume from the last offset
+    while (!finished) {
+      try {
+        response = await fetch('/api/claude/jobs/' + jobId + '/stream?offset=' + offset);
+        if (!response.ok) throw new Error('HTTP ' + response.status);
+        var reader = response.body.getReader();
+        var decoder = new TextDecoder();
+        var buffer = '';
+        var pendingId = null;
+
+        while (true) {
+          var chunk = await reader.read();
+          if (chunk.done) break;
+
+          buffer += decoder.decode(chunk.value, {stream: true});
+          var lines = buffer.split('\n');
+          buffer = lines.pop();
+
+          for (var li = 0; li < lines.length; li++) {
+            var line = lines[li];
+            if (line.startsWith('id: ')) { pendingId = parseInt(line.slice(4), 10); continue; }
+            if (!line.startsWith('data: ')) continue;
+            var raw = line.slice(6);
+            if (pendingId !== null) { offset = pendingId; pendingId = null; }
+            if (raw === '[DONE]') { finished = true; continue; }
+
+            try {
+              var evt = JSON.parse(raw);
+              if (evt.type === 'assistant' && evt.message && evt.message.content) {
+                evt.message.content.forEach(function(block) {
+                  if (block.type === 'text') {
+                    textContent += block.text;
+                  } else if (block.type === 'tool_use') {
+                    toolUses.push({name: block.name, input: block.input || {}});
+                  }
+                });
+              } else if (evt.type === 'result') {
+                if (evt.result && !textContent) textContent = evt.result;
+                if (evt.session_id) claudeSessionId = evt.session_id;
+                if (evt.cost_usd !== undefined) {
+                  meta = {cost: evt.cost_usd, duration: evt.duration_ms};
+                }
+              } else if (evt.type === 'error') {
+                textContent += '\nError: ' + (evt.error || 'Unknown error');
+              }
+            } catch (e) {
+              // Not JSON — append as raw text
+              textContent += raw + '\n';
+            }
+
+            claudeMessages[aIdx].html = _renderAssistant(textContent, toolUses, meta);
+            renderClaudeMsgs();
+          }
+        }
+        retries = 0;
+      } catch (e) {
+        if (++retries > 5) throw e;
+      }
+      if (!finished) await new Promise(function(r) { setTimeout(r, Math.min(500 + 1000 * retries, 5000)); });
+    }
+
+    // Final render
+    if (!textContent && toolUses.length === 0) {
+      textContent = '(No output)';
+    }
+    claudeMessages[aIdx].html = _renderAssistant(textContent, toolUses, meta);
+    renderClaudeMsgs();
+
+  } catch (e) {
+    claudeMessages[aIdx].html = '<span class="claude-error">Connection error: ' + _esc(e.message) + '</span>';
+    renderClaudeMsgs();
+  } finally {
+    claudeRunning = false;
+    _updateClaudeUI();
+  }
+}
+
+function _renderAssistant(text, tools, meta) {
+  var html = '';
+  for (var i = 0; i < tools.length; i++) {
+    var t = tools[i];
+    html += '<div class="claude-tool"><span class="claude-tool-name">' + _esc(t.name) + '</span>';
+    if (t.input.file_path) html += '<span class="claude-tool-arg">' + _esc(t.input.file_path) + '</span>';
+    else if (t.input.command) html += '<span class="claude-tool-arg">' + _esc(t.input.command.substring(0, 100)) + '</span>';
+    else if (t.input.pattern) html += '<span class="claude-tool-arg">' + _esc(t.input.pattern) + '</span>';
+    html += '</div>';
+  }
+  if (text) {
+    html += '<div class="claude-text">' + _esc(text).replace(/\n/g, '<br>') + '</div>';
+  }
+  if (meta) {
+    html += '<div class="claude-meta">Cost: $' + meta.cost.toFixed(4) + ' &bull; ' + (meta.duration / 1000).toFixed(1) + 's</div>';
+  }
+  return html || '<span class="claude-typing">Thinking...</span>';
+}
+
+function _updateClaudeUI() {
+  document.getElementById('claudeSend').disabled = claudeRunning;
+  document.getElementById('claudeInput').disabled = claudeRunning;
+  document.getElementById('claudeInput').placeholder =
+    claudeRunning ? 'Claude is working...' : 'Ask Claude to modify code...';
+}
+
+function resetClaudeChat() {
+  claudeMessages = [];
+  claudeSessionId = null;
+  var container = document.getElementById('claudeMessages');
+  container.innerHTML = '<div class="claude-welcome"><h3>&gt;_ Claude Code</h3>'
+    + '<p>Ask Claude to read, edit, or create files in this project.</p>'
+    + '<p class="claude-examples">Try: "Show me the config" &bull; "Add logging to the overview endpoint" &bull; "Fix the proxy timeout handling"</p></div>';
+}
+
+// Enter to send (Shift+Enter for newline)
+document.getElementById('claudeInput').addEventListener('keydown', function(e) {
+  if (e.key === 'Enter' && !e.shiftKey) {
+    e.preventDefault();
+    sendClaudeMessage();
+  }
+});
+
+// ============================================================
+// RULES TAB
+// ============================================================
+const SPORT_LABELS = {nba:'NBA', soccer:'Soccer', mlb:'MLB', nfl:'NFL', nhl:'NHL'};
+const SPORT_COLORS = {nba:'#58a6ff', soccer:'#50c878', mlb:'#f7931a', nfl:'#8b5cf6', nhl:'#06b6d4'};
+
+async function loadRules() {
+  const el = document.getElementById('rulesContent');
+  el.innerHTML = '<div style="color:var(--text-dim);text-align:center;padding:3rem">Loading rules…</div>';
+
+  // Fetch sports config + BTC Range config + BTC Momentum config + bounce-back status in one batch
+  const items = {};
+  try {
+    const res = await fetch('/api/batch', {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      body: JSON.stringify({requests: [
+        {id: 'sports', path: '/proxy/sports-arb/api/config', headers: {'Authorization': 'Basic ' + btoa('admin:changeme123')}},
+        {id: 'btc', path: '/proxy/btc-range/api/bot/config'},
+        {id: 'mom', path: '/proxy/btc-momentum/api/bot/config'},
+        {id: 'bb', path: '/proxy/bounce-back/api/status'},
+      ]}),
+    });
+    if (res.ok) Object.assign(items, (await res.json()).responses);
+  } catch (e) {}
+  const ok = id => items[id] && items[id].status >= 200 && items[id].status < 300 ? items[id].body : null;
+
+  const sportsConfig = ok('sports');
+  const btcConfig    = ok('btc');
+  const momConfig    = ok('mom');
+  const bbStatus     = ok('bb');
+
+  el.innerHTML = renderRules(sportsConfig, btcConfig, momConfig, bbStatus);
+}
+
+function renderRules(sports, btc, mom, bb) {
+  let html = '';
+
+  // ---- Sports Arb Section ----
+  html += '<div class="rules-section">';
+  html += '<div class="rules-section-title">Sports Arb — Trading Rules</div>';
+  if (!sports) {
+    html += '<div style="color:var(--red);font-size:.85rem">Could not reach sports-arb config endpoint</div>';
+  } else {
+    html += '<div class="rules-grid">';
+    const order = ['nba','soccer','mlb','nfl','nhl'];
+    for (const sport of order) {
+      if (!sports[sport]) continue;
+      html += renderSportCard(sport, sports[sport]);
+    }
+    html += '</div>';
+  }
+  html += '</div>';
+
+  // ---- BTC Bots Section ----
+  html += '<div class="rules-section">';
+  html += '<div class="rules-section-title">BTC 15-Min Arb — Bot Config</div>';
+  html += '<div class="rules-grid">';
+  html += renderBtcCard('BTC Range', '#f7931a', btc, false);
+  html += renderBtcCard('BTC Momentum', '#ff6b6b', mom, true);
+  html += '</div>';
+  html += '</div>';
+
+  // ---- Bounce-Back Section ----
+  html += '<div class="rules-section">';
+  html += '<div class="rules-section-title">Bounce-Back Arb — Bot Config</div>';
+  html += '<div class="rules-grid">';
+  html += renderBounceBackCard(bb);
+  html += '</div>';
+  html += '</div>';
+
+  return html;
+}
+
+function renderBounceBackCard(status) {
+  const mode  = status ? (status.mode || 'paper').toUpperCase() : '?';
+  const alive = status && status.running;
+  const color = '#06b6d4';
+  const contracts   = status ? (status.base_contracts ?? '?') : '?';
+  const threshold   = status ? (status.move_threshold   ?? 8)  : 8;
+  const entryMin    = status ? (status.entry_window_min ?? 240) : 240;
+  const entryMax    = status ? (status.entry_window_max ?? 360) : 360;
+  const maxOpen     = status ? (status.max_open_positions ?? 3) : 3;
+
+  return `<div class="rules-card" style="border-top:3px solid ${color};max-width:520px">
+    <div class="rules-card-header">
+      <span class="rules-card-title">Bounce-Back</span>
+      <span class="sub-card-badge">${mode}</span>
+    </div>
+    <div style="font-size:.65rem;color:var(--text-dim);margin-bottom:.5rem">Changes save instantly to the live bot. <span class="rules-feedback" id="fb-bounce-back"></span></div>
+
+    <div class="rules-subhead">📖 Strategy Overview</div>
+    <div style="font-size:.8rem;color:var(--text-dim);line-height:1.6;margin-bottom:.75rem">
+      Monitors BTC, ETH, and SOL Kalshi 15-min contracts for sharp intra-window price drops.
+      When a contract falls ≥ ${threshold}¢ between minutes 4–6, the bot bets on a bounce-back
+      — buying the oversold side with the expectation prices revert before settlement.
+    </div>
+
+    <div class="rules-subhead">🔍 Signal Detection</div>
+    ${btcRow('Assets', 'BTC &nbsp;|&nbsp; ETH &nbsp;|&nbsp; SOL', '')}
+    ${btcRow('Move Threshold', `≥ ${threshold}¢ drop within entry window`, '')}
+    ${btcRow('Entry Window', `${entryMin}–${entryMax}s remaining (min 4–6 of 15)`, '')}
+
+    <div class="rules-subhead">📐 Position Sizing</div>
+    <div class="btc-field-row">
+      <span class="btc-field-label">Base Contracts</span>
+      <span style="display:flex;align-items:center;gap:.3rem">
+        <input id="bb-contracts" type="number" min="1" max="50" value="${contracts}"
+          style="width:4rem;background:#0d1117;border:1px solid #30363d;border-radius:4px;
+                 color:#e6edf3;font-family:monospace;font-size:.78rem;padding:1px 4px;text-align:center">
+        <button onclick="saveBounceBackContracts()"
+          style="padding:1px 7px;border-radius:4px;cursor:pointer;font-family:monospace;font-size:.7rem;
+                 border:1px solid #30363d;background:#161b22;color:#58a6ff">✓</button>
+      </span>
+    </div>
+    ${btcRow('Max Open Positions', `${maxOpen}`, '')}
+    ${btcRow('Capital Guard', 'Portal allocation enforced', '')}
+
+    <div class="rules-subhead">🚪 Exit</div>
+    ${btcRow('Exit Strategy', 'Hold to settlement', '')}
+    ${btcRow('Duplicate Guard', 'One trade per asset per window', '')}
+
+    ${!alive ? '<div class="rules-stopped" style="margin-top:.75rem">⚠ Bot unreachable</div>' : ''}
+  </div>`;
+}
+
+async function saveBounceBackContracts() {
+  const val = parseInt(document.getElementById('bb-contracts').value);
+  const fb  = document.getElementById('fb-bounce-back');
+  if (!val || val < 1 || val > 50) { fb.textContent='invalid'; fb.className='rules-feedback err'; return; }
+  fb.textContent = 'Saving…'; fb.className = 'rules-feedback';
+  try {
+    const r = await fetch('/proxy/bounce-back/api/config', {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      body: JSON.stringify({base_contracts: val}),
+    });
+    const d = await r.json();
+    if (d.ok) { fb.textContent = '✓ Saved'; fb.className = 'rules-feedback ok'; setTimeout(()=>fb.textContent='', 2000); }
+    else { fb.textContent = d.error || 'error'; fb.className = 'rules-feedback err'; }
+  } catch(e) { fb.textContent = 'Network error'; fb.className = 'rules-feedback err'; }
+}
+
+function renderSportCard(sport, cfg) {
+  const color = SPORT_COLORS[sport] || '#fff';
+  const label = SPORT_LABELS[sport] || sport.toUpperCase();
+  const pt = cfg.profit_target || {};
+  const ed = cfg.edge_decay || {};
+
+  return `<div class="rules-card" style="border-top:3px solid ${color}">
+    <div class="rules-card-header">
+      <span class="rules-card-title">${label}</span>
+      <label class="toggle-switch" title="Enabled">
+        <input type="checkbox" ${cfg.enabled !== false ? 'checked' : ''} onchange="saveSportField('${sport}','enabled',this.checked)">
+        <span class="toggle-slider"></span>
+      </label>
+    </div>
+
+    <div class="rules-subhead">Price &amp; Edge</div>
+    <div class="rules-field">
+      <label>Min Edge (%)</label>
+      <input type="number" step="0.5" min="0" max="50" value="${+(cfg.min_edge*100).toFixed(1)}"
+        onchange="saveSportField('${sport}','min_edge',parseFloat(this.value)/100)">
+    </div>
+    <div style="display:grid;grid-template-columns:1fr 1fr;gap:.5rem">
+      <div class="rules-field">
+        <label>Min Price (¢)</label>
+        <input type="number" step="1" min="1" max="99" value="${cfg.min_price||15}"
+          onchange="saveSportField('${sport}','min_price',parseInt(this.value))">
+      </div>
+      <div class="rules-field">
+        <label>Max Price (¢)</label>
+        <input type="number" step="1" min="1" max="99" value="${cfg.max_price||90}"
+          onchange="saveSportField('${sport}','max_price',parseInt(this.value))">
+      </div>
+    </div>
+
+    <div class="rules-subhead">Profit Target</div>
+    <div class="rules-field">
+      <label>Mode</label>
+      <select onchange="saveSportField('${sport}','profit_target',{...getProfitTarget('${sport}'),mode:this.value})">
+        ${['dynamic','fixed','fixed_by_half'].map(m=>`<option value="${m}"${pt.mode===m?' selected':''}>${m}</option>`).join('')}
+      </select>
+    </div>
+    ${pt.mode==='dynamic' ? `
+    <div style="display:grid;grid-template-columns:1fr 1fr;gap:.5rem">
+      <div class="rules-field">
+        <label>Multiplier</label>
+        <input type="number" step="0.05" min="0.1" max="2" value="${pt.multiplier||0.5}"
+          onchange="saveSportField('${sport}','profit_target',{...getProfitTarget('${sport}'),multiplier:parseFloat(this.value)})">
+      </div>
+      <div class="rules-field">
+        <label>Min Profit (¢)</label>
+        <input type="number" step="1" min="1" max="20" value="${pt.min_profit||2}"
+          onchange="saveSportField('${sport}','profit_target',{...getProfitTarget('${sport}'),min_profit:parseInt(this.value)})">
+      </div>
+    </div>` : pt.mode==='fixed_by_half' ? `
+    <div style="display:grid;grid-template-columns:1fr 1fr 1fr;gap:.5rem">
+      <div class="rules-field">
+        <label>1st Half (¢)</label>
+        <input type="number" step="1" min="1" value="${pt.profit_1h||15}"
+          onchange="saveSportField('${sport}','profit_target',{...getProfitTarget('${sport}'),profit_1h:parseInt(this.value)})">
+      </div>
+      <div class="rules-field">
+        <label>2nd Half (¢)</label>
+        <input type="number" step="1" min="1" value="${pt.profit_2h||25}"
+          onchange="saveSportField('${sport}','profit_target',{...getProfitTarget('${sport}'),profit_2h:parseInt(this.value)})">
+      </div>
+      <div class="rules-field">
+        <label>Tie (¢)</label>
+        <input type="number" step="1" min="1" value="${pt.tie_profit||15}"
+          onchange="saveSportField('${sport}','profit_target',{...getProfitTarget('${sport}'),tie_profit:parseInt(this.value)})">
+      </div>
+    </div>` : ''}
+
+    <div class="rules-subhead">Edge Decay</div>
+    <div style="display:flex;align-items:center;gap:.5rem;margin-bottom:.5rem">
+      <label class="toggle-switch" title="Enable edge decay">
+        <input type="checkbox" ${ed.enabled ? 'checked' : ''}
+          onchange="saveSportField('${sport}','edge_decay',{...getEdgeDecay('${sport}'),enabled:this.checked})">
+        <span class="toggle-slider"></span>
+      </label>
+      <span style="font-size:.75rem;color:var(--text-dim)">Tighten before game start</span>
+    </div>
+    <div style="display:grid;grid-template-columns:1fr 1fr;gap:.5rem">
+      <div class="rules-field">
+        <label>Tighten Hours</label>
+        <input type="number" step="0.5" min="0.5" max="12" value="${ed.tighten_hours||2}"
+          onchange="saveSportField('${sport}','edge_decay',{...getEdgeDecay('${sport}'),tighten_hours:parseFloat(this.value)})">
+      </div>
+      <div class="rules-field">
+        <label>Tighten Factor</label>
+        <input type="number" step="0.05" min="0.1" max="1" value="${ed.tighten_factor||0.7}"
+          onchange="saveSportField('${sport}','edge_decay',{...getEdgeDecay('${sport}'),tighten_factor:parseFloat(this.value)})">
+      </div>
+    </div>
+
+    <div class="rules-card-footer">
+      <span class="rules-feedback" id="fb-${sport}"></span>
+    </div>
+  </div>`;
+}
+
+function btcRow(label, val, desc) {
+  return `<div class="btc-field-row">
+    <span class="btc-field-label" title="${desc}">${label} <span style="color:#555;font-size:.6rem">ⓘ</span></span>
+    <span class="btc-field-val">${val}</span>
+  </div>`;
+}
+function btcSection(title) {
+  return `<div class="rules-subhead">${title}</div>`;
+}
+
+function btcInput(botId, field, val, type='number', step='1', min='', max='', label='') {
+  const id = `btci-${botId}-${field}`;
+  return `<div class="btc-field-row">
+    <span class="btc-field-label">${label||field}</span>
+    <span style="display:flex;align-items:center;gap:.3rem">
+      <input id="${id}" type="${type}" step="${step}" ${min?'min='+min:''} ${max?'max='+max:''} value="${val}"
+        style="width:4rem;background:#0d1117;border:1px solid #30363d;border-radius:4px;
+               color:#e6edf3;font-family:monospace;font-size:.78rem;padding:1px 4px;text-align:center">
+      <button onclick="saveBtcField('${botId}','${field}',document.getElementById('${id}').value,'${type}')"
+        style="padding:1px 7px;border-radius:4px;cursor:pointer;font-family:monospace;font-size:.7rem;
+               border:1px solid #30363d;background:#161b22;color:#58a6ff">✓</button>
+    </span>
+  </div>`;
+}
+
+function btcToggle(botId, field, val, label, desc) {
+  const id = `btct-${botId}-${field}`;
+  return `<div class="btc-field-row" title="${desc}">
+    <span class="btc-field-label">${label} <span style="color:#555;font-size:.6rem">ⓘ</span></span>
+    <label class="toggle-switch">
+      <input id="${id}" type="checkbox" ${val?'checked':''} onchange="saveBtcField('${botId}','${field}',this.checked,'bool')">
+      <span class="toggle-slider"></span>
+    </label>
+  </div>`;
+}
+
+function renderBtcCard(name, color, cfg, isMomentum) {
+  const botId = isMomentum ? 'btc-momentum' : 'btc-range';
+  const fbId  = `fb-${botId}`;
+  if (!cfg) {
+    return `<div class="rules-card" style="border-top:3px solid ${color}">
+      <div class="rules-card-header"><span class="rules-card-title">${name}</span></div>
+      <div class="rules-stopped">${isMomentum ? '⏹ STOPPED — backtest showed no edge at S=1-2 (46-49% WR). Do not restart without new strategy.' : 'Unreachable'}</div>
+    </div>`;
+  }
+  const tiers = cfg.enabled_tiers || {};
+  const tierOrder = ['sniper','standard','volume','micro','nano'];
+  const tierDesc = {
+    sniper:   'Strongest signal: S≥4 + stacking confirms. Largest size (3× base).',
+    standard: 'Good signal: S≥4 with moderate stacking. Normal size (1× base).',
+    volume:   'Volume signal: high liquidity window. Reduced size (0.5× base).',
+    micro:    'Weak signal. Very small size. Currently OFF.',
+    nano:     'Minimal signal. Tiny size. Currently OFF.',
+  };
+  const sz = cfg.asset_sizes || {};
+  const ex = cfg.smart_exit_tiers || [];
+  const ssm = cfg.streak_sizing_multipliers || {};
+
+  const tierBadges = tierOrder.map(t =>
+    `<span class="tier-badge ${tiers[t]?'tier-on':'tier-off'}" title="${tierDesc[t]||''}">${t}</span>`
+  ).join('');
+
+  // Streak sizing summary
+  const ssmKeys = Object.keys(ssm).map(Number).sort((a,b)=>a-b);
+  const cap = ssmKeys.length ? ssm[ssmKeys[ssmKeys.length-1]] : 1;
+  const ssmStr = ssmKeys.map(k=>`S=${k}→${ssm[k]}×`).join(', ') + (ssmKeys.length ? `, S=${ssmKeys[ssmKeys.length-1]+1}+→${cap}× (cap)` : '');
+
+  return `<div class="rules-card" style="border-top:3px solid ${color}">
+    <div class="rules-card-header">
+      <span class="rules-card-title">${name}</span>
+      <span class="sub-card-badge">${(cfg.mode||'?').toUpperCase()}</span>
+    </div>
+    <div style="font-size:.65rem;color:var(--text-dim);margin-bottom:.5rem">Changes save instantly to the live bot. <span class="rules-feedback" id="${fbId}"></span></div>
+
+    ${btcSection('📊 Signal Filter — When to look for a trade')}
+    ${!isMomentum ? btcInput(botId,'streak_threshold',cfg.streak_threshold??4,'number','1','1','10','Streak Threshold') : btcRow('Streak Threshold', `≥ ${cfg.streak_threshold ?? '?'}`,'')}
+    ${btcToggle(botId,'use_scorer',cfg.use_scorer,'Signal Scorer','Multi-factor scoring: ToD bias, cross-asset, BB, displacement, sweeps → SNIPER/STANDARD/VOLUME/SKIP.')}
+    ${btcToggle(botId,'use_stacking',cfg.use_stacking,'Stacking Signals','Boost or kill trades based on stacked confirmation signals.')}
+    ${btcToggle(botId,'use_candle_signals',cfg.use_candle_signals,'Candle Signals','1-min intra-window candle analysis for extra entry confirmation.')}
+    ${btcRow('Candle Max Entry', `≤ ${((cfg.candle_max_entry||0)*100).toFixed(0)}¢`,'')}
+    ${btcRow('Candle Min Confidence', `≥ ${((cfg.candle_min_confidence||0)*100).toFixed(0)}%`,'')}
+    ${btcRow('Active Tiers', `<span style="line-height:2">${tierBadges}</span>`,'')}
+
+    ${btcSection('📐 Position Sizing — How much to trade')}
+    ${!isMomentum ? btcInput(botId,'base_contracts',cfg.base_contracts??10,'number','1','1','200','Base Contracts') : btcRow('Base Contracts',`${cfg.base_contracts??'?'} contracts`,'')}
+    ${btcRow('Asset Multipliers', Object.entries(sz).map(([a,v])=>`${a.toUpperCase()} ×${v}`).join(' &nbsp;|&nbsp;') || '—','')}
+    ${!isMomentum ? btcInput(botId,'max_open_positions',cfg.max_open_positions??5,'number','1','1','20','Max Open Positions') : btcRow('Max Open Positions',`${cfg.max_open_positions??'?'}`,'')}
+
+    ${btcSection('📈 High-Streak Sizing Boost')}
+    ${btcToggle(botId,'use_streak_sizing',cfg.use_streak_sizing??false,'Streak Boost Enabled','Scale up position size when streak is extended (S=6+). Captures stronger mean-reversion edge at high streaks.')}
+    ${btcRow('Multipliers', cfg.use_streak_sizing!==false ? ssmStr : '—', 'S=6→1.5× base size, S=7+→2.0× base size (hard cap). Applied on top of tier sizing.')}
+
+    ${btcSection('🎯 Entry Execution — How to get filled')}
+    ${btcRow('Target Entry Price', `~${((cfg.entry_price||0)*100).toFixed(0)}¢`,'')}
+    ${btcToggle(botId,'use_patience',cfg.use_patience,'Patience Entry','Wait up to patience_max_secs for price to improve before submitting.')}
+    ${btcRow('Patience Window', `${cfg.patience_base_secs??'?'}s base / ${cfg.patience_max_secs??'?'}s max`,'')}
+    ${btcToggle(botId,'use_ladder',cfg.use_ladder,'Ladder Orders','Split position into multiple limit orders at different price levels.')}
+    ${btcRow('Ladder Levels', `${cfg.ladder_levels??'?'} orders`,'')}
+    ${btcRow('Ladder Spread', `${((cfg.ladder_spread||0)*100).toFixed(0)}¢ between levels`,'')}
+
+    ${btcSection('🔒 Lock Structure — Reducing downside')}
+    ${btcToggle(botId,'use_lock',cfg.use_lock,'Lock Trade','Buy opposite side at lock_target price to create asymmetric win structure.')}
+    ${btcRow('Lock Target Price', `≤ ${((cfg.lock_target||0)*100).toFixed(0)}¢`,'')}
+
+    ${btcSection('🚪 Smart Exit — When to sell')}
+    ${btcRow('Trailing Take-Profit', `Sell ALL if bid drops ${((cfg.smart_exit_trail_pct||0)*100).toFixed(0)}% from peak`,'')}
+    ${ex.map((t,i) => btcRow(`Profit Tier ${i+1}`,`Sell ${(t.sell_fraction*100).toFixed(0)}% when profit ≥ ${(t.profit_pct*100).toFixed(0)}% of max possible`,'')).join('')}
+    ${btcRow('Time-Based Exit', `Sell if profitable with ≤ ${cfg.smart_exit_time_secs??'?'}s left in window`,'')}
+    ${btcRow('Spot Reversal Exit', `Sell if spot drops ${((cfg.smart_exit_spot_trail||0)*100).toFixed(2)}% from peak`,'')}
+
+    ${isMomentum ? '<div class="rules-stopped" style="margin-top:.75rem">⏹ Container stopped — do not restart without new strategy</div>' : ''}
+  </div>`;
+}
+
+// Helper: read current profit_target values from DOM inputs for a sport card
+function getProfitTarget(sport) {
+  const card = [...document.querySelectorAll('.rules-card')].find(c => c.innerHTML.includes(`'${sport}'`));
+  if (!card) return {};
+  const sel = card.querySelector('select');
+  const inputs = [...card.querySelectorAll('input[type=number]')];
+  const mode = sel ? sel.value : 'dynamic';
+  if (mode === 'dynamic') return {mode, multiplier: parseFloat(inputs[3]?.value||0.5), min_profit: parseInt(inputs[4]?.value||2)};
+  if (mode === 'fixed_by_half') return {mode, profit_1h: parseInt(inputs[3]?.value||15), profit_2h: parseInt(inputs[4]?.value||25), tie_profit: parseInt(inputs[5]?.value||15)};
+  return {mode};
+}
+
+function getEdgeDecay(sport) {
+  const card = [...document.querySelectorAll('.rules-card')].find(c => c.innerHTML.includes(`getEdgeDecay('${sport}')`));
+  if (!card) return {};
+  const inputs = [...card.querySelectorAll('input[type=number]')];
+  return {enabled: true, tighten_hours: parseFloat(inputs.at(-2)?.value||2), tighten_factor: parseFloat(inputs.at(-1)?.value||0.7)};
+}
+
+// ============================================================
+// SYSTEM TAB
+// ============================================================
+let _systemLoaded = false;
+let _systemInterval = null;
+
+async function loadSystem(force) {
+  if (_systemLoaded && !force) return;
+  _systemLoaded = true;
+
+  const el = document.getElementById('systemContent');
+  try {
+    const data = await fetch('/api/system', {headers: {'Authorization': 'Basic ' + btoa('admin:changeme123')}}).then(r => r.json());
+    el.innerHTML = renderSystem(data);
+  } catch(e) {
+    el.innerHTML = `<div style="color:var(--red);padding:2rem">Failed to load system info: ${e.message}</div>`;
+  }
+}
+
+function renderSystem(d) {
+  const res = d.resources || {};
+  const disk = res.disk || {};
+  const memPct = res.mem_total_mb ? Math.round(res.mem_used_mb / res.mem_total_mb * 100) : 0;
+  const diskPct = disk.pct || 0;
+
+  function bar(pct, warn=70, danger=85) {
+    const color = pct >= danger ? 'var(--red)' : pct >= warn ? 'var(--yellow)' : 'var(--green)';
+    return `<div style="background:#1e2a3a;border-radius:4px;height:6px;margin-top:4px">
+      <div style="background:${color};height:6px;border-radius:4px;width:${pct}%"></div>
+    </div>`;
+  }
+
+  let html = '';
+
+  // ---- Host Resources ----
+  html += '<div class="rules-section">';
+  html += '<div class="rules-section-title">Host Resources</div>';
+  html += '<div class="rules-grid" style="grid-template-columns:repeat(auto-fill,minmax(200px,1fr))">';
+
+  html += `<div class="rules-card" style="border-top:3px solid #3b82f6">
+    <div class="rules-card-title" style="margin-bottom:.5rem">Memory</div>
+    <div style="font-size:1.4rem;font-weight:700">${res.mem_used_mb || 0} <span style="font-size:.8rem;color:var(--text-dim)">/ ${res.mem_total_mb || 0} MB</span></div>
+    ${bar(memPct)}
+    <div style="font-size:.75rem;color:var(--text-dim);margin-top:.25rem">${memPct}% used</div>
+  </div>`;
+
+  html += `<div class="rules-card" style="border-top:3px solid #8b5cf6">
+    <div class="rules-card-title" style="margin-bottom:.5rem">Disk (/)</div>
+    <div style="font-size:1.4rem;font-weight:700">${disk.used_gb || 0} <span style="font-size:.8rem;color:var(--text-dim)">/ ${disk.total_gb || 0} GB</span></div>
+    ${bar(diskPct)}
+    <div style="font-size:.75rem;color:var(--text-dim);margin-top:.25rem">${diskPct}% used</div>
+  </div>`;
+
+  // Services
+  for (const svc of (d.services || [])) {
+    const color = svc.active === true ? 'var(--green)' : svc.active === false ? 'var(--red)' : 'var(--text-dim)';
+    const label = svc.active === true ? 'active' : svc.active === false ? 'inactive' : 'unknown';
+    html += `<div class="rules-card" style="border-top:3px solid ${svc.active ? '#22c55e' : '#ef4444'}">
+      <div class="rules-card-title" style="margin-bottom:.5rem">${svc.name}</div>
+      <div style="font-size:1.1rem;font-weight:700;color:${color}">${label}</div>
+    </div>`;
+  }
+  html += '</div></div>';
+
+  // ---- Docker Containers ----
+  html += '<div class="rules-section">';
+  html += '<div class="rules-section-title">Docker Containers' + (d.warm_start
+    ? ` <span style="font-size:.75rem;color:var(--text-dim)">(last known, ${Math.round(d.warm_start.age)}s old)</span>`
+    : '') + '</div>';
+  html += '<div style="overflow-x:auto"><table style="width:100%;border-collapse:collapse;font-size:.82rem">';
+  html += `<thead><tr style="border-bottom:1px solid #1e2a3a;color:var(--text-dim)">
+    <th style="text-align:left;padding:.5rem .75rem">Container</th>
+    <th style="text-align:left;padding:.5rem .75rem">Status</th>
+    <th style="text-align:left;padding:.5rem .75rem">Port</th>
+    <th style="text-align:left;padding:.5rem .75rem">Image</th>
+    <th style="text-align:left;padding:.5rem .75rem">Description</th>
+  </tr></thead><tbody>`;
+
+  for (const c of (d.containers || [])) {
+    if (c.error) { html += `<tr><td colspan="5" style="color:var(--red);padding:.5rem .75rem">${c.error}</td></tr>`; continue; }
+    const dot = c.running ? '🟢' : '🔴';
+    const color = c.bot ? c.bot.color : '#888';
+    const desc = c.bot ? c.bot.description : '—';
+    const portStr = c.ports ? c.ports.replace('127.0.0.1:', '').replace('/tcp','') : '—';
+    html += `<tr style="border-bottom:1px solid #111820">
+      <td style="padding:.5rem .75rem;font-weight:600;color:${color}">${dot} ${c.name}</td>
+      <td style="padding:.5rem .75rem;color:${c.running?'var(--green)':'var(--red)'}">${c.status}</td>
+      <td style="padding:.5rem .75rem;color:var(--text-dim)">${portStr}</td>
+      <td style="padding:.5rem .75rem;color:var(--text-dim)">${c.image}</td>
+      <td style="padding:.5rem .75rem;color:var(--text-dim)">${desc}</td>
+    </tr>`;
+  }
+  html += '</tbody></table></div></div>';
+
+  // ---- Cron Jobs ----
+  html += '<div class="rules-section">';
+  html += '<div class="rules-section-title">Scheduled Jobs (cron)</div>';
+  html += '<div style="overflow-x:auto"><table style="width:100%;border-collapse:collapse;font-size:.82rem">';
+  html += `<thead><tr style="border-bottom:1px solid #1e2a3a;color:var(--text-dim)">
+    <th style="text-align:left;padding:.5rem .75rem">Schedule</th>
+    <th style="text-align:left;padding:.5rem .75rem">Job</th>
+    <th style="text-align:left;padding:.5rem .75rem">Script</th>
+    <th style="text-align:left;padding:.5rem .75rem">Purpose</th>
+  </tr></thead><tbody>`;
+
+  for (const job of (d.cron_jobs || [])) {
+    html += `<tr style="border-bottom:1px solid #111820">
+      <td style="padding:.5rem .75rem;font-family:monospace;color:var(--yellow)">${job.schedule}</td>
+      <td style="padding:.5rem .75rem;font-weight:600">${job.label}</td>
+      <td style="padding:.5rem .75rem;color:var(--text-dim);font-family:monospace;font-size:.75rem">${job.script}</td>
+      <td style="padding:.5rem .75rem;color:var(--text-dim)">${job.description}</td>
+    </tr>`;
+  }
+  html += '</tbody></table></div></div>';
+
+  // ---- Data Files ----
+  html += '<div class="rules-section">';
+  html += '<div class="rules-section-title">Key Data Files &amp; Paths</div>';
+  const files = [
+    {path: 'btc-range-arb/data/window_summary.jsonl', desc: 'BTC window logger — ~102 fields/row, synced to Google Drive daily', color: '#f7931a'},
+    {path: 'btc-range-arb/data/price_feed.jsonl',     desc: 'BTC/ETH/SOL spot + contract prices at 1s intervals', color: '#f7931a'},
+    {path: 'sports-arb/logs/',                         desc: 'Sports-arb trade and event logs', color: '#8b5cf6'},
+    {path: 'sports-arb/data/',                         desc: 'Game mappings, correlation state, scoring data', color: '#8b5cf6'},
+    {path: 'bounce-back/data/',                        desc: 'Bounce-back trade log (JSONL)', color: '#06b6d4'},
+    {path: 'portal/data/capital.json',                 desc: 'Capital allocations and virtual ledger', color: '#3b82f6'},
+  ];
+  html += '<div class="rules-grid" style="grid-template-columns:1fr">';
+  for (const f of files) {
+    html += `<div style="display:flex;align-items:flex-start;gap:.75rem;padding:.6rem .75rem;border-radius:6px;background:#0d1520;border-left:3px solid ${f.color}">
+      <span style="font-family:monospace;font-size:.78rem;color:var(--accent);white-space:nowrap">/home/ubuntu/kalshi-bots/${f.path}</span>
+      <span style="font-size:.78rem;color:var(--text-dim)">${f.desc}</span>
+    </div>`;
+  }
+  html += '</div></div>';
+
+  // refresh timestamp
+  html += `<div style="font-size:.72rem;color:#333;text-align:right;padding:.5rem 1rem">Last updated: ${new Date().toLocaleTimeString()}</div>`;
+
+  return html;
+}
+
+async function saveBtcField(botId, field, value, type) {
+  const fb = document.getElementById(`fb-${botId}`);
+  if (fb) { fb.textContent = 'Saving…'; fb.className = 'rules-feedback'; }
+  let parsed = value;
+  if (type === 'number') parsed = parseFloat(value);
+  if (type === 'int')    parsed = parseInt(value);
+  if (type === 'bool')   parsed = value === true || value === 'true';
+  // streak_threshold and base_contracts are ints
+  if (field === 'streak_threshold' || field === 'base_contracts' || field === 'max_open_positions') parsed = parseInt(value);
+  try {
+    const res = await fetch(`/proxy/${botId}/api/bot/config`, {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      body: JSON.stringify({[field]: parsed}),
+    });
+    const data = await res.json();
+    if (res.ok) {
+      if (fb) { fb.textContent = '✓ Saved'; fb.className = 'rules-feedback ok'; setTimeout(()=>{ if(fb) fb.textContent=''; }, 2000); }
+    } else {
+      if (fb) { fb.textContent = 'Error: ' + (data.error||'unknown'); fb.className = 'rules-feedback err'; }
+    }
+  } catch(e) {
+    if (fb) { fb.textContent = 'Network error'; fb.className = 'rules-feedback err'; }
+  }
+}
+
+async function saveSportField(sport, field, value) {
+  const fb = document.getElementById('fb-' + sport);
+  if (fb) { fb.textContent = 'Saving…'; fb.className = 'rules-feedback'; }
+  try {
+    const res = await fetch('/proxy/sports-arb/api/config', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': 'Basic ' + btoa('admin:changeme123'),
+      },
+      body: JSON.stringify({[sport]: {[field]: value}}),
+    });
+    const data = await res.json();
+    if (data.ok) {
+      if (fb) { fb.textContent = '✓ Saved'; fb.className = 'rules-feedback ok'; setTimeout(()=>{ if(fb) fb.textContent=''; }, 2000); }
+    } else {
+      if (fb) { fb.textContent = 'Error: ' + (data.error||'unknown'); fb.className = 'rules-feedback err'; }
+    }
+  } catch(e) {
+    if (fb) { fb.textContent = 'Network error'; fb.className = 'rules-feedback err'; }
+  }
+}
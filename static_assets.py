@@ -0,0 +1,41 @@
+"""Content-hashed static assets — fingerprinted URLs served as immutable.
+
+Files in ``static/`` are read once at startup and exposed under
+``/assets/<stem>.<hash><ext>``.  The hash changes whenever the content
+does, so responses can carry a one-year ``immutable`` Cache-Control.
+"""
+
+import hashlib
+import mimetypes
+import os
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+URL_PREFIX = "/assets/"
+# private: assets sit behind portal auth, so shared caches must not keep them
+IMMUTABLE = "private, max-age=31536000, immutable"
+
+
+class AssetManifest:
+    """Maps logical names (``portal.js``) to fingerprinted files held in memory."""
+
+    def __init__(self, directory=STATIC_DIR):
+        self._urls = {}   # logical name -> URL
+        self._files = {}  # fingerprinted name -> (bytes, mimetype)
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                body = f.read()
+            stem, ext = os.path.splitext(name)
+            fingerprinted = f"{stem}.{hashlib.sha256(body).hexdigest()[:12]}{ext}"
+            mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            self._urls[name] = URL_PREFIX + fingerprinted
+            self._files[fingerprinted] = (body, mimetype)
+
+    def url(self, name):
+        return self._urls[name]
+
+    def get(self, fingerprinted):
+        """Return ``(bytes, mimetype)`` or None for an unknown or stale name."""
+        return self._files.get(fingerprinted)
@@ -2,10 +2,15 @@
 
 import fcntl
 import json
+import logging
 import os
 from datetime import datetime, timezone
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+from capital_rollups import CapitalRollups
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
 STORE_PATH = os.path.join(DATA_DIR, "capital.json")
 
 
@@ -24,12 +29,16 @@ class CapitalStore:
           ]
         }
 
-    Amounts are in cents (matching Kalshi internal format).
+    Amounts are in cents (matching Kalshi internal format).  Daily and
+    monthly flow rollups of the transfer log are kept alongside in
+    capital_rollups.json (see capital_rollups).
     """
 
     def __init__(self, path=None):
         self.path = path or STORE_PATH
         os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.rollups = CapitalRollups(os.path.join(os.path.dirname(self.path),
+                                                   "capital_rollups.json"))
         if not os.path.exists(self.path):
             self._write({"accounts": {}, "transfers": []})
 
@@ -55,6 +64,25 @@ class CapitalStore:
             finally:
                 fcntl.flock(f, fcntl.LOCK_UN)
 
+    def _commit(self, data, appended):
+        """Write ``data`` and fold the ``appended`` new transfers into the rollups."""
+        self._write(data)
+        if not appended:
+            return
+        try:
+            self.rollups.update(data["transfers"], appended)
+        except OSError as e:
+            # The ledger is written; the next update rebuilds the rollups
+            logger.warning("Failed to update capital rollups: %s", e)
+
+    def rebuild_rollups(self):
+        """Recompute the flow rollups from the whole transfer log."""
+        return self.rollups.rebuild(self._read()["transfers"])
+
+    def get_flows(self, start, end, granularity="day", account=None):
+        """Per-bucket inflow / outflow / net between two dates; see CapitalRollups.query."""
+        return self.rollups.query(start, end, granularity, account)
+
     def get_accounts(self):
         """Return dict of all virtual accounts: {bot_id: {label, allocation}, ...}"""
         return self._read()["accounts"]
@@ -79,7 +107,7 @@ class CapitalStore:
                 "amount": abs(diff),
                 "ts": datetime.now(timezone.utc).isoformat(),
             })
-        self._write(data)
+        self._commit(data, 1 if diff else 0)
 
     def transfer(self, from_id, to_id, amount_cents):
         """Transfer between virtual accounts. Adjusts allocations and logs.
@@ -116,17 +144,35 @@ class CapitalStore:
             "amount": amount_cents,
             "ts": datetime.now(timezone.utc).isoformat(),
         })
-        self._write(data)
+        self._commit(data, 1)
+
+    def get_ledger(self):
+        """Return ``(accounts, transfer_count)`` from one read of the store."""
+        data = self._read()
+        return data["accounts"], len(data["transfers"])
 
     def get_transfers(self, limit=20):
         """Return recent transfer history (newest first)."""
         transfers = self._read()["transfers"]
         return list(reversed(transfers[-limit:]))
 
+    def get_transfers_since(self, index, limit=20):
+        """Return ``(transfers, total)``: up to ``limit`` transfers logged
+        after position ``index`` (newest first) and the log length.
+
+        An ``index`` past the end (the log was reset) reads from the start.
+        """
+        transfers = self._read()["transfers"]
+        if index > len(transfers):
+            index = 0
+        start = max(index, len(transfers) - limit)
+        return list(reversed(transfers[start:])), len(transfers)
+
     def remove(self, bot_id):
         """Remove a virtual account. Allocation returns to unallocated pool."""
         data = self._read()
         removed = data["accounts"].pop(bot_id, None)
+        appended = 0
         if removed and removed.get("allocation", 0) != 0:
             data["transfers"].append({
                 "from": bot_id,
@@ -134,7 +180,8 @@ class CapitalStore:
                 "amount": removed["allocation"],
                 "ts": datetime.now(timezone.utc).isoformat(),
             })
-        self._write(data)
+            appended = 1
+        self._commit(data, appended)
 
     def get_total_allocated(self):
         """Return sum of all allocations in cents."""
@@ -0,0 +1,335 @@
+"""Persistent SSH terminal sessions — outlive the WebSocket, replay missed output.
+
+A session owns the paramiko client/channel and a bounded scrollback ring.
+WebSockets attach and detach freely; a reconnecting client sends the stream
+offset it has already rendered and receives only the bytes after it.
+Detached sessions are reaped after an idle TTL.
+
+Delivery is credit-based: the client advertises a window and acks the
+offsets it has rendered, and the server never has more than ``window``
+unacknowledged bytes in flight.  Output that arrives faster than the
+client drains it accumulates only in the fixed-size ring, so per-session
+memory stays bounded.  In ``drop`` mode a client that falls too far behind
+skips ahead to the latest screen; in ``block`` mode the reader stops
+draining the SSH channel instead, pushing back on the remote command.
+
+Sessions live in the process that created them, so a reattach that
+lands on a different gunicorn worker gets "session not found" and the
+client falls back to a fresh connection.  Behind the hub every terminal
+lives in the hub process, which also drives the SSH channel from its event
+loop (``reader=False`` plus ``feed``/``on_drained``) instead of a thread.
+"""
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+import zlib
+
+from ssh_relay import relay_channel
+
+logger = logging.getLogger(__name__)
+
+SESSION_IDLE_TTL = int(os.environ.get("TERMINAL_SESSION_TTL", "900"))  # seconds
+SCROLLBACK_BYTES = int(os.environ.get("TERMINAL_SCROLLBACK_BYTES", str(256 * 1024)))
+REAP_INTERVAL = 30  # seconds
+
+DEFAULT_WINDOW = 256 * 1024  # bytes in flight before the client must ack
+MIN_WINDOW = 16 * 1024
+FRAME_BYTES = 32 * 1024      # max payload per WebSocket frame
+SCREEN_BYTES = 16 * 1024     # tail replayed when a lagging client skips ahead
+COMPRESS_MIN_BYTES = 512     # smaller frames are never worth deflating
+FLOW_MODES = ("drop", "block")
+
+
+class ScrollbackBuffer:
+    """Fixed-capacity byte ring addressed by absolute stream offsets.
+
+    ``end`` is the total number of bytes ever written; the ring holds the
+    range ``[start, end)`` where ``start = max(0, end - capacity)``.
+    """
+
+    def __init__(self, capacity=SCROLLBACK_BYTES):
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self.end = 0
+
+    @property
+    def start(self):
+        return max(0, self.end - self.capacity)
+
+    def append(self, data):
+        if len(data) > self.capacity:
+            self.end += len(data) - self.capacity
+            data = data[-self.capacity:]
+        pos = self.end % self.capacity
+        first = min(len(data), self.capacity - pos)
+        self._buf[pos:pos + first] = data[:first]
+        self._buf[:len(data) - first] = data[first:]
+        self.end += len(data)
+
+    def align(self, offset):
+        """Clamp ``offset`` into the ring and advance it past any UTF-8
+        continuation bytes so a read never begins mid-character."""
+        offset = min(max(offset, self.start), self.end)
+        for _ in range(3):
+            if offset >= self.end or (self._buf[offset % self.capacity] & 0xC0) != 0x80:
+                break
+            offset += 1
+        return offset
+
+    def read_from(self, offset, limit=None):
+        """Return ``(start_offset, bytes)`` for the range beginning at ``offset``.
+
+        At most ``limit`` bytes are returned (all of them by default), cut
+        back to a character boundary so the chunk is whole UTF-8.  If
+        ``offset`` has already been overwritten the read starts at the
+        oldest retained character instead.
+        """
+        clamped = min(max(offset, self.start), self.end)
+        if clamped != offset:
+            clamped = self.align(clamped)
+        offset = clamped
+        n = self.end - offset
+        if limit is not None and limit < n:
+            n = limit
+            for _ in range(3):
+                if n == 0 or (self._buf[(offset + n) % self.capacity] & 0xC0) != 0x80:
+                    break
+                n -= 1
+        pos = offset % self.capacity
+        first = min(n, self.capacity - pos)
+        return offset, bytes(self._buf[pos:pos + first]) + bytes(self._buf[:n - first])
+
+
+class _Attachment:
+    """Delivery state for the WebSocket currently attached to a session."""
+
+    def __init__(self, send, offset, window, compress):
+        self.send = send
+        self.sent = offset
+        self.acked = offset
+        self.window = max(MIN_WINDOW, min(int(window or DEFAULT_WINDOW), SCROLLBACK_BYTES))
+        self.compress = bool(compress)
+
+    def frame(self, data):
+        """Encode a payload; with compression each frame carries a 1-byte
+        header (0 = raw, 1 = raw deflate) and is independently decodable."""
+        if not self.compress:
+            return data
+        if len(data) >= COMPRESS_MIN_BYTES:
+            c = zlib.compressobj(6, zlib.DEFLATED, -15)
+            packed = c.compress(data) + c.flush()
+            if len(packed) < len(data):
+                return b"\x01" + packed
+        return b"\x00" + data
+
+
+class TerminalSession:
+    """One SSH shell plus its scrollback; at most one WebSocket attached."""
+
+    def __init__(self, client, channel, label, flow="drop", reader=True):
+        self.id = secrets.token_urlsafe(16)
+        self.label = label
+        self.client = client
+        self.channel = channel
+        self.flow = flow if flow in FLOW_MODES else "drop"
+        self.scrollback = ScrollbackBuffer()
+        self.acked = 0
+        self.closed = False
+        self.last_active = time.time()
+        self._att = None
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        # External reader hooks: on_drained runs (with the lock held) whenever
+        # a blocked reader may resume; on_close runs before the channel closes.
+        self.on_drained = None
+        self.on_close = None
+        if reader:
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            relay_channel(self.channel, self._on_output, self._stop)
+        except Exception as e:
+            logger.debug("Terminal session %s reader stopped: %s", self.id, e)
+        finally:
+            self.close()
+
+    def _backlogged_locked(self):
+        # Block mode: stop draining the channel while the attached client
+        # is more than half a ring behind, so the remote side stalls
+        # instead of output being overwritten.
+        return (self.flow == "block" and self._att is not None and not self.closed
+                and self.scrollback.end - self._att.sent > self.scrollback.capacity // 2)
+
+    def _on_output(self, data):
+        with self._lock:
+            self.scrollback.append(data)
+            self._pump_locked(live=True)
+            while self._backlogged_locked():
+                self._drained.wait(1)
+
+    def feed(self, data):
+        """Non-blocking ``_on_output`` for an external reader.
+
+        Returns True when the reader should pause until ``on_drained`` fires.
+        """
+        with self._lock:
+            self.scrollback.append(data)
+            self._pump_locked(live=True)
+            return self._backlogged_locked()
+
+    def _notify_drained_locked(self):
+        self._drained.notify_all()
+        if self.on_drained is not None:
+            self.on_drained()
+
+    def _pump_locked(self, live=False):
+        """Send as much pending output as the client's credit allows.
+
+        ``live`` is set when called for freshly read output; only then does
+        drop mode treat a large backlog as the client falling behind (a
+        reattach replaying scrollback is paced by credit, not skipped).
+        """
+        att = self._att
+        if att is None:
+            return
+        ring = self.scrollback
+        try:
+            lagging = live and self.flow == "drop" and ring.end - att.sent > ring.capacity // 2
+            if att.sent < ring.start or lagging:
+                # Too far behind: drop the backlog and resume near the tail.
+                target = ring.align(ring.end - SCREEN_BYTES)
+                att.send(json.dumps({"type": "status", "status": "skipped",
+                                     "offset": target, "dropped": target - att.sent}))
+                att.sent = att.acked = target
+            limit = min(ring.end, att.acked + att.window)
+            while att.sent < limit:
+                _, data = ring.read_from(att.sent, min(FRAME_BYTES, limit - att.sent))
+                if not data:
+                    break  # credit ends mid-character; the rest goes after the next ack
+                att.send(att.frame(data))
+                att.sent += len(data)
+        except Exception:
+            self._detach_locked()
+
+    def _detach_locked(self):
+        self._att = None
+        self.last_active = time.time()
+        self._notify_drained_locked()
+
+    def attach(self, send, offset, status, window=DEFAULT_WINDOW, compress=False):
+        """Make ``send`` the live output sink, replaying from ``offset``.
+
+        ``status`` is sent first as a JSON-able dict with ``offset`` set to
+        where the replay actually starts, so the client can detect a gap.
+        Replay and live output then flow under the client's credit
+        ``window``.  Any previously attached socket is silently superseded.
+        """
+        with self._lock:
+            start, _ = self.scrollback.read_from(offset, 0)
+            send(json.dumps(dict(status, session_id=self.id, offset=start)))
+            self._att = _Attachment(send, start, window, compress)
+            self.last_active = time.time()
+            self._pump_locked()
+            self._notify_drained_locked()
+
+    def detach(self, send):
+        with self._lock:
+            if self._att is not None and self._att.send == send:
+                self._detach_locked()
+
+    def ack(self, offset):
+        """Record that the client has rendered output up to ``offset``.
+
+        Returns credit to the sender and lets a blocked reader resume.
+        """
+        with self._lock:
+            offset = min(int(offset), self.scrollback.end)
+            self.acked = max(self.acked, offset)
+            att = self._att
+            if att is not None and att.sent >= offset > att.acked:
+                att.acked = offset
+                self._pump_locked()
+                self._notify_drained_locked()
+
+    def write(self, data):
+        if not self.channel.closed:
+            self.channel.sendall(data)
+
+    def resize(self, cols, rows):
+        if not self.channel.closed:
+            self.channel.resize_pty(width=cols, height=rows)
+
+    @property
+    def attached(self):
+        return self._att is not None
+
+    def close(self):
+        """Tear down the shell and notify any attached socket."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            att, self._att = self._att, None
+            self._notify_drained_locked()
+        self._stop.set()
+        if self.on_close is not None:
+            self.on_close()
+        _sessions.pop(self.id, None)
+        if att is not None:
+            try:
+                att.send(json.dumps({"type": "status", "status": "disconnected"}))
+            except Exception:
+                pass
+        for obj in (self.channel, self.client):
+            try:
+                obj.close()
+            except Exception:
+                pass
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+_sessions = {}  # session id -> TerminalSession
+_reaper = None
+_reaper_lock = threading.Lock()
+
+
+def open_session(client, channel, label, flow="drop", reader=True):
+    """Register a new session around an already-opened shell channel."""
+    session = TerminalSession(client, channel, label, flow, reader)
+    _sessions[session.id] = session
+    _ensure_reaper()
+    return session
+
+
+def get_session(session_id):
+    session = _sessions.get(session_id or "")
+    if session is None or session.closed:
+        return None
+    return session
+
+
+def _reap_idle():
+    while True:
+        time.sleep(REAP_INTERVAL)
+        cutoff = time.time() - SESSION_IDLE_TTL
+        for session in list(_sessions.values()):
+            if not session.attached and session.last_active < cutoff:
+                logger.info("Reaping idle terminal session %s (%s)", session.id, session.label)
+                session.close()
+
+
+def _ensure_reaper():
+    global _reaper
+    with _reaper_lock:
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap_idle, daemon=True)
+            _reaper.start()
@@ -0,0 +1,73 @@
+"""BotRegistry error reporting and Docker label discovery."""
+
+import json
+
+import pytest
+
+import docker_api
+from bot_registry import BotRegistry
+
+BASE = {"alpha": {"name": "Alpha", "port": 5000, "health_endpoint": "/health"}}
+
+
+def test_malformed_file_at_startup_is_reported_until_fixed(tmp_path):
+    path = tmp_path / "bots.json"
+    path.write_text("{not json")
+    registry = BotRegistry(BASE, "localhost", path=str(path))
+    assert registry.error and str(path) in registry.error
+    assert sorted(registry.snapshot().bots) == ["alpha"]
+
+    path.write_text(json.dumps({"beta": {"name": "Beta", "port": 5001, "health_endpoint": "/h"}}))
+    registry.reload()
+    assert registry.error is None
+    assert sorted(registry.snapshot().bots) == ["alpha", "beta"]
+
+
+def test_invalid_merge_is_reported_and_cleared(tmp_path):
+    path = tmp_path / "bots.json"
+    path.write_text(json.dumps({"beta": {"name": "Beta", "port": 5000, "health_endpoint": "/h"}}))
+    registry = BotRegistry(BASE, "localhost", path=str(path))
+    assert "both use" in registry.error
+    path.write_text(json.dumps({"beta": {"name": "Beta", "port": 5001, "health_endpoint": "/h"}}))
+    registry.reload()
+    assert registry.error is None
+
+
+def _container(state, ports=()):
+    return {"Names": ["/gamma-bot"], "State": state,
+            "Labels": {"dashboard.bot.id": "gamma", "dashboard.bot.name": "Gamma",
+                       "dashboard.bot.health_endpoint": "/status"},
+            "Ports": [{"PrivatePort": p} for p in ports]}
+
+
+@pytest.fixture
+def docker(monkeypatch):
+    listing = []
+    calls = []
+
+    def list_containers(all=False, filters=None):
+        calls.append(all)
+        return [c for c in listing if all or c["State"] == "running"]
+
+    monkeypatch.setattr(docker_api, "list_containers", list_containers)
+    monkeypatch.setattr(BotRegistry, "_watch", lambda self: None)  # reload() by hand
+    return listing, calls
+
+
+def test_stopped_label_bot_stays_registered(docker):
+    listing, calls = docker
+    listing.append(_container("running", ports=[7000]))
+    registry = BotRegistry(BASE, "localhost", docker_labels=True)
+    assert registry.snapshot().base_url["gamma"] == "http://gamma-bot:7000"
+
+    listing[:] = [_container("exited")]
+    registry.reload()
+    assert registry.snapshot().base_url["gamma"] == "http://gamma-bot:7000"
+    assert set(calls) == {True}
+
+
+def test_running_container_wins_over_a_stopped_one(docker):
+    listing, _ = docker
+    listing += [_container("running", ports=[7001]), _container("exited", ports=[])]
+    registry = BotRegistry(BASE, "localhost", docker_labels=True)
+    assert registry.snapshot().base_url["gamma"] == "http://gamma-bot:7001"
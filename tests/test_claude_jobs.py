@@ -0,0 +1,163 @@
+"""JobQueue end to end against a stub ``claude`` executable."""
+
+import json
+import os
+import stat
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+import claude_jobs
+
+# Behaves by prompt: "lines N" prints N stream-json lines, "wait PATH"
+# prints one line and blocks until PATH exists, "fail" exits 3 with stderr.
+STUB = textwrap.dedent("""\
+    #!{python}
+    import json, os, sys, time
+    prompt = sys.argv[sys.argv.index("--") + 1]
+    def emit(i):
+        print(json.dumps({{"type": "assistant", "n": i}}), flush=True)
+    if prompt.startswith("lines "):
+        for i in range(int(prompt.split()[1])):
+            emit(i)
+    elif prompt.startswith("wait "):
+        emit(0)
+        while not os.path.exists(prompt.split(None, 1)[1]):
+            time.sleep(0.02)
+        emit(1)
+    elif prompt == "fail":
+        emit(0)
+        print("boom: no credentials", file=sys.stderr)
+        sys.exit(3)
+""")
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    stub = tmp_path / "claude"
+    stub.write_text(STUB.format(python=sys.executable))
+    stub.chmod(stub.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(claude_jobs, "CLAUDE_BIN", str(stub))
+    monkeypatch.setattr(claude_jobs, "DISPATCH_POLL", 0.05)
+    return claude_jobs.JobQueue(str(tmp_path), max_turns=3, data_dir=str(tmp_path / "jobs"),
+                                concurrency=1)
+
+
+def wait_status(queue, job_id, statuses, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        meta = queue.get(job_id)
+        if meta["status"] in statuses:
+            return meta
+        time.sleep(0.02)
+    raise AssertionError(f"{job_id} still {queue.get(job_id)['status']}")
+
+
+def test_runs_and_streams_output(queue):
+    job = queue.submit("lines 3")
+    meta = wait_status(queue, job["id"], claude_jobs.FINISHED)
+    assert (meta["status"], meta["returncode"]) == ("done", 0)
+    lines = queue.read(job["id"], 0)
+    assert [json.loads(line)["n"] for line, _ in lines] == [0, 1, 2]
+    assert lines[-1][1] == meta["output_bytes"]
+
+
+def test_concurrency_one_queues_the_second_job(queue, tmp_path):
+    release = tmp_path / "release"
+    first = queue.submit(f"wait {release}")
+    wait_status(queue, first["id"], ("running",))
+    second = queue.submit("lines 1")
+    time.sleep(0.3)  # several dispatch rounds
+    assert queue.get(second["id"])["status"] == "queued"
+
+    release.touch()
+    first_meta = wait_status(queue, first["id"], claude_jobs.FINISHED)
+    second_meta = wait_status(queue, second["id"], claude_jobs.FINISHED)
+    assert first_meta["status"] == second_meta["status"] == "done"
+    assert second_meta["started"] >= first_meta["finished"]
+
+
+def test_resume_from_offset(queue):
+    job = queue.submit("lines 5")
+    wait_status(queue, job["id"], claude_jobs.FINISHED)
+    lines = queue.read(job["id"], 0)
+    resumed = queue.read(job["id"], lines[1][1])
+    assert resumed == lines[2:]
+    assert queue.read(job["id"], lines[-1][1]) == []
+
+
+def test_cancel_running_and_queued(queue, tmp_path):
+    running = queue.submit(f"wait {tmp_path / 'never'}")
+    wait_status(queue, running["id"], ("running",))
+    queued = queue.submit("lines 1")
+
+    queue.cancel(queued["id"])
+    assert queue.get(queued["id"])["status"] == "cancelled"
+
+    queue.cancel(running["id"])
+    meta = wait_status(queue, running["id"], claude_jobs.FINISHED)
+    assert meta["status"] == "cancelled"
+    assert meta["returncode"] != 0
+    assert json.loads(queue.read(running["id"], 0)[0][0])["n"] == 0  # output kept
+
+
+def test_failure_records_stderr(queue):
+    job = queue.submit("fail")
+    meta = wait_status(queue, job["id"], claude_jobs.FINISHED)
+    assert (meta["status"], meta["returncode"]) == ("error", 3)
+    assert "boom: no credentials" in meta["error"]
+    last = json.loads(queue.read(job["id"], 0)[-1][0])
+    assert last["type"] == "error" and "boom" in last["error"]
+
+
+def test_missing_cli(queue, monkeypatch, tmp_path):
+    monkeypatch.setattr(claude_jobs, "CLAUDE_BIN", str(tmp_path / "no-such-claude"))
+    job = queue.submit("lines 1")
+    meta = wait_status(queue, job["id"], claude_jobs.FINISHED)
+    assert (meta["status"], meta["error"]) == ("error", "claude CLI not found")
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def _claimed_job(queue, status, owner):
+    """A job left ``status`` with a claim by ``owner``, written without waking the dispatcher."""
+    job_id = claude_jobs._new_id()
+    os.makedirs(queue._dir(job_id))
+    open(queue._path(job_id, "output.log"), "a").close()
+    queue._write_meta({"id": job_id, "status": status, "prompt": "lines 1", "session_id": "",
+                       "created": time.time(), "started": None, "finished": None,
+                       "returncode": None, "error": None})
+    with open(queue._path(job_id, "claim"), "w") as f:
+        f.write(json.dumps(owner))
+    return job_id
+
+
+def test_reaps_queued_job_claimed_by_dead_worker(queue):
+    # The worker claimed the job and died before _run marked it running
+    job_id = _claimed_job(queue, "queued", {"pid": _dead_pid(), "started": None})
+    meta = wait_status(queue, job_id, claude_jobs.FINISHED)
+    assert (meta["status"], meta["error"]) == ("error", "Worker exited before the job started")
+    after = queue.submit("lines 1")  # the queue is not stuck behind it
+    assert wait_status(queue, after["id"], claude_jobs.FINISHED)["status"] == "done"
+
+
+def test_reaps_running_job_whose_pid_was_reused(queue):
+    # A claim from before a container restart: the pid is alive again, as another process
+    job_id = _claimed_job(queue, "running", {"pid": os.getpid(), "started": 1})
+    meta = wait_status(queue, job_id, claude_jobs.FINISHED)
+    assert (meta["status"], meta["error"]) == ("error", "Worker exited while the job was running")
+
+
+def test_live_and_legacy_claims_are_not_reaped(queue):
+    pid = os.getpid()
+    live = _claimed_job(queue, "running", {"pid": pid, "started": claude_jobs._start_time(pid)})
+    legacy = _claimed_job(queue, "running", pid)  # bare pid, as older claims hold
+    time.sleep(0.3)  # several dispatch rounds
+    assert queue.get(live)["status"] == queue.get(legacy)["status"] == "running"
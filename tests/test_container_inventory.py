@@ -0,0 +1,193 @@
+"""ContainerInventory against a fake Docker daemon on a temporary Unix socket."""
+
+import json
+import os
+import queue
+import socketserver
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import container_inventory
+import docker_api
+
+CLOSE = object()  # pushed onto the events queue to end the current /events response
+
+
+def _container(cid, name, state="running"):
+    return {"Id": cid, "Names": [f"/{name}"], "State": state, "Image": f"{name}:latest",
+            "Status": "Up 1 minute" if state == "running" else "Exited (0) 1 second ago",
+            "Ports": [{"PublicPort": 8080, "PrivatePort": 80}]}
+
+
+class FakeDocker(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        if url.path == "/containers/json":
+            listing = list(self.server.containers.values())
+            if "filters" in params:
+                ids = json.loads(params["filters"][0]).get("id", [])
+                listing = [c for c in listing if c["Id"] in ids]
+            body = json.dumps(listing).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif url.path == "/events":
+            self.server.event_connections += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")  # as dockerd streams events
+            self.end_headers()
+            self.wfile.flush()
+            while True:
+                event = self.server.events.get()
+                if event is CLOSE:
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.close_connection = True
+                    return
+                line = json.dumps(event).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+        else:
+            self.send_error(404)
+
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("local", 0)  # BaseHTTPRequestHandler expects a (host, port)
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def inventories():
+    """Build inventories through this so their threads stop with the test."""
+    made = []
+
+    def make():
+        made.append(container_inventory.ContainerInventory())
+        return made[-1]
+
+    yield make
+    for inventory in made:
+        inventory.stop()
+        inventory._thread.join(2)
+        assert not inventory._thread.is_alive()
+
+
+def by_name(inventory):
+    containers, error = inventory.snapshot()
+    assert error is None
+    return {c["name"]: c for c in containers}
+
+
+@pytest.fixture
+def docker(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        server = UnixServer(os.path.join(tmp, "docker.sock"), FakeDocker)
+        server.containers = {"a1": _container("a1", "sports-arb")}
+        server.events = queue.Queue()
+        server.event_connections = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        monkeypatch.setattr(docker_api, "DOCKER_SOCKET", server.server_address)
+        monkeypatch.setattr(container_inventory, "RETRY_DELAY", 0.05)
+        yield server
+        server.events.put(CLOSE)
+        server.shutdown()
+        server.server_close()
+
+
+def test_initial_sync(docker, inventories):
+    inventory = inventories()
+    assert inventory.snapshot() == ([{"name": "sports-arb", "status": "Up 1 minute",
+                                      "ports": "8080→80", "image": "sports-arb:latest",
+                                      "running": True}], None)
+    assert inventory.ready()
+
+
+def test_start_and_die_events(docker, inventories):
+    inventory = inventories()
+    assert wait_for(lambda: docker.event_connections == 1)
+
+    docker.containers["b2"] = _container("b2", "weather")
+    docker.events.put({"Type": "container", "Action": "start", "id": "b2"})
+    assert wait_for(lambda: "weather" in by_name(inventory))
+    assert by_name(inventory)["weather"]["running"]
+
+    docker.containers["a1"] = _container("a1", "sports-arb", state="exited")
+    docker.events.put({"Type": "container", "Action": "die", "Actor": {"ID": "a1"}})
+    assert wait_for(lambda: not by_name(inventory)["sports-arb"]["running"])
+
+    del docker.containers["b2"]
+    docker.events.put({"Type": "container", "Action": "destroy", "id": "b2"})
+    assert wait_for(lambda: "weather" not in by_name(inventory))
+
+
+def test_reconnects_and_resyncs(docker, inventories):
+    inventory = inventories()
+    assert wait_for(lambda: docker.event_connections == 1)
+
+    # A change the inventory never hears about, then the stream ends
+    docker.containers["c3"] = _container("c3", "fvg-arb")
+    docker.events.put(CLOSE)
+    assert wait_for(lambda: docker.event_connections == 2)
+    assert "fvg-arb" in by_name(inventory)
+
+    # Events on the new connection are applied too
+    docker.containers["c3"] = _container("c3", "fvg-arb", state="exited")
+    docker.events.put({"Type": "container", "Action": "die", "id": "c3"})
+    assert wait_for(lambda: not by_name(inventory)["fvg-arb"]["running"])
+
+
+def test_resyncs_on_schedule_under_steady_events(docker, inventories, monkeypatch):
+    monkeypatch.setattr(container_inventory, "RESYNC_INTERVAL", 0.3)
+    inventory = inventories()
+    assert wait_for(lambda: docker.event_connections == 1)
+
+    docker.containers["c3"] = _container("c3", "fvg-arb")  # never announced
+    busy = threading.Event()
+
+    def chatter():
+        while not busy.wait(0.05):
+            docker.events.put({"Type": "container", "Action": "exec_start", "id": "a1"})
+
+    threading.Thread(target=chatter, daemon=True).start()
+    try:
+        assert wait_for(lambda: "fvg-arb" in by_name(inventory), timeout=2)
+        assert wait_for(lambda: docker.event_connections >= 2)
+    finally:
+        busy.set()
+
+
+def test_daemon_down_then_back(docker, inventories, monkeypatch):
+    path = docker.server_address
+    monkeypatch.setattr(docker_api, "DOCKER_SOCKET", path + ".missing")
+    inventory = inventories()
+    containers, error = inventory.snapshot()
+    assert containers == [] and error
+
+    monkeypatch.setattr(docker_api, "DOCKER_SOCKET", path)
+    assert wait_for(lambda: inventory.snapshot()[1] is None)
+    assert "sports-arb" in by_name(inventory)
@@ -0,0 +1,126 @@
+"""LogFanout against a fake Docker log source."""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import container_logs
+import docker_api
+
+
+def _stamp(ns):
+    base = datetime.fromtimestamp(ns // 1_000_000_000, timezone.utc)
+    return f"{base:%Y-%m-%dT%H:%M:%S}.{ns % 1_000_000_000:09d}Z"
+
+
+class FakeLogs:
+    """One container's log lines; ``follow`` streams block until the conn is closed."""
+
+    def __init__(self):
+        self.lines = []  # (ns, text)
+        self.cond = threading.Condition()
+
+    def emit(self, text):
+        with self.cond:
+            self.lines.append((time.time_ns(), text))
+            self.cond.notify_all()
+
+    def open_logs(self, name, follow=False, since=None, tail=None, timestamps=True):
+        conn = FakeConn(self)
+        return conn, {"conn": conn, "follow": follow, "since": since, "tail": tail}, False
+
+    def iter_log_lines(self, resp, tty):
+        since_ns = (resp["since"] or 0) * 1_000_000_000
+        with self.cond:
+            lines = [line for line in self.lines if line[0] >= since_ns]
+        if resp["tail"] not in (None, "all"):
+            lines = lines[-resp["tail"]:] if resp["tail"] else []
+        sent = len(self.lines)
+        yield from (("stdout", f"{_stamp(ns)} {text}") for ns, text in lines)
+        while resp["follow"]:
+            with self.cond:
+                while len(self.lines) == sent and not resp["conn"].closed:
+                    self.cond.wait(0.05)
+                if resp["conn"].closed:
+                    return
+                new, sent = self.lines[sent:], len(self.lines)
+            yield from (("stdout", f"{_stamp(ns)} {text}") for ns, text in new)
+
+
+class FakeConn:
+    def __init__(self, logs):
+        self.logs = logs
+        self.closed = False
+        self.sock = self
+
+    def shutdown(self, how):
+        self.close()
+
+    def close(self):
+        with self.logs.cond:
+            self.closed = True
+            self.logs.cond.notify_all()
+
+
+@pytest.fixture
+def logs(monkeypatch):
+    fake = FakeLogs()
+    monkeypatch.setattr(docker_api, "open_logs", fake.open_logs)
+    monkeypatch.setattr(docker_api, "iter_log_lines", fake.iter_log_lines)
+    monkeypatch.setattr(container_logs, "RECONNECT_DELAY", 0.05)
+    monkeypatch.setattr(container_logs, "_fanouts", {})
+    return fake
+
+
+def read(sub, wait=0.3):
+    """Every line delivered within ``wait`` seconds."""
+    lines, deadline = [], time.time() + wait
+    while time.time() < deadline:
+        lines += [e["line"] for e in sub.get(0.05) or ()]
+    return lines
+
+
+def test_live_lines_reach_every_viewer(logs):
+    logs.emit("old")
+    first = container_logs.subscribe("bot", container_logs.LogFilter())
+    second = container_logs.subscribe("bot", container_logs.LogFilter(grep="err"), tail=0)
+    logs.emit("an error")
+    logs.emit("fine")
+    assert read(first) == ["old", "an error", "fine"]
+    assert read(second) == ["an error"]
+    first.close()
+    second.close()
+
+
+def test_idle_fanout_reprimes_instead_of_replaying_the_gap(logs):
+    for text in ("a", "b"):
+        logs.emit(text)
+    sub = container_logs.subscribe("bot", container_logs.LogFilter(), tail=10)
+    logs.emit("c")
+    assert read(sub) == ["a", "b", "c"]
+    sub.close()
+    fanout = container_logs._fanouts["bot"]
+    deadline = time.time() + 2
+    while fanout._thread is not None and time.time() < deadline:
+        time.sleep(0.02)
+    assert fanout._thread is None and not fanout.recent and fanout._last_ns == 0
+
+    logs.emit("d")  # while nobody was watching
+    logs.emit("e")
+    sub = container_logs.subscribe("bot", container_logs.LogFilter(), tail=1)
+    assert read(sub) == ["e"]
+    sub.close()
+
+
+def test_since_viewer_gets_each_line_once(logs):
+    logs.emit("before")
+    cutoff = time.time_ns()
+    sub = container_logs.subscribe("bot", container_logs.LogFilter(), tail=0, after_ns=cutoff)
+    logs.emit("after")
+    history = container_logs.history("bot", container_logs.LogFilter(), time.time() - 60,
+                                     until_ns=cutoff)
+    assert [e["line"] for e in history] == ["before"]
+    assert read(sub) == ["after"]
+    sub.close()
@@ -0,0 +1,77 @@
+"""ContainerTelemetry shared between a sampling worker and readers through ring files."""
+
+import os
+
+import pytest
+
+import container_telemetry
+from container_telemetry import ContainerTelemetry
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(container_telemetry.time, "time", lambda: now[0])
+    return now
+
+
+def sampler(tmp_path, monkeypatch, names=("bot-a", "bot-b")):
+    telemetry = ContainerTelemetry(names, data_dir=str(tmp_path))
+    counts = dict.fromkeys(names, 0)
+
+    def sample(name):
+        counts[name] += 1
+        return {"cpu": float(counts[name]), "mem_mb": 100.0 + counts[name], "mem_pct": None}
+
+    monkeypatch.setattr(telemetry, "_sample", sample)
+    return telemetry
+
+
+def test_readers_serve_what_the_sampler_publishes(tmp_path, monkeypatch, clock):
+    source = sampler(tmp_path, monkeypatch)
+    reader = ContainerTelemetry(["bot-a", "bot-b"], data_dir=str(tmp_path))
+    for step in (0, 5, 5, 30, 5000):  # same slot, next slot, a gap, past the 5s ring
+        clock[0] += step
+        source.sample_once()
+        for res in container_telemetry.RESOLUTIONS:
+            assert reader.history(res) == source.history(res)
+    assert reader.history("5s", ["bot-a"], since=clock[0])["bot-a"]["cpu"] == [5.0]
+
+
+def test_a_sample_rewrites_only_its_slots(tmp_path, monkeypatch, clock):
+    source = sampler(tmp_path, monkeypatch)
+    source.sample_once()
+    written = []
+    real_pwrite = os.pwrite
+    monkeypatch.setattr(container_telemetry.os, "pwrite",
+                        lambda fd, data, offset: written.append(len(data)) or
+                        real_pwrite(fd, data, offset))
+    clock[0] += 5
+    source.sample_once()
+    rings = 2 * len(container_telemetry.RESOLUTIONS)
+    # one slot per ring (fields + count) and its header
+    assert sum(written) <= rings * (8 * 3 + 2 + container_telemetry.HEADER.size)
+
+
+def test_new_sampler_resumes_published_history(tmp_path, monkeypatch, clock):
+    first = sampler(tmp_path, monkeypatch)
+    for _ in range(3):
+        first.sample_once()
+        clock[0] += 5
+    before = first.history("5s")
+    second = sampler(tmp_path, monkeypatch)
+    second.sample_once()
+    after = second.history("5s")
+    assert after["bot-a"]["start"] == before["bot-a"]["start"]
+    assert after["bot-a"]["cpu"][:3] == before["bot-a"]["cpu"]
+
+
+def test_corrupt_ring_file_is_ignored(tmp_path, monkeypatch, clock):
+    source = sampler(tmp_path, monkeypatch)
+    source.sample_once()
+    with open(source._path("bot-a", "5s"), "r+b") as f:
+        f.truncate(100)
+    reader = ContainerTelemetry(["bot-a"], data_dir=str(tmp_path))
+    assert reader.history("5s")["bot-a"]["cpu"] == []
+    source.sample_once()  # the sampler rewrites it whole
+    assert reader.history("5s") == {"bot-a": source.history("5s")["bot-a"]}
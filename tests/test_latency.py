@@ -0,0 +1,69 @@
+"""LatencyTracker timeouts against a bot endpoint that stops answering."""
+
+import socket
+import threading
+
+import pytest
+import requests
+
+import latency
+
+
+@pytest.fixture
+def hung_url():
+    """A server that accepts connections and never responds."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(64)
+    held = []
+
+    def accept():
+        while True:
+            try:
+                held.append(server.accept()[0])
+            except OSError:
+                return
+
+    threading.Thread(target=accept, daemon=True).start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}/api/health"
+    server.close()
+    for conn in held:
+        conn.close()
+
+
+def get(url):
+    def send(timeout):
+        return requests.get(url, timeout=timeout)
+    return send
+
+
+def test_hung_endpoint_does_not_stretch_the_timeout(hung_url):
+    tracker = latency.LatencyTracker()
+    seen = []
+    for _ in range(8):
+        seen.append(tracker.timeout("bot", "/api/health", 0.1, max_timeout=0.2))
+        with pytest.raises(requests.Timeout):
+            tracker.call("bot", "/api/health", get(hung_url), 0.1,
+                         timeout_errors=(requests.Timeout,), max_timeout=0.2)
+    assert len(set(seen)) == 1 and seen[0] <= 0.2  # no back-off, never past the cap
+    stats = tracker.stats()["bot"]["/api/health"]
+    assert (stats["samples"], stats["timeouts"]) == (0, 8)
+
+
+def test_recovered_endpoint_is_judged_on_its_answers(hung_url):
+    tracker = latency.LatencyTracker()
+    for _ in range(5):
+        with pytest.raises(requests.Timeout):
+            tracker.call("bot", "/api/health", get(hung_url), 0.1,
+                         timeout_errors=(requests.Timeout,))
+    for _ in range(latency.MIN_SAMPLES):
+        tracker.record("bot", "/api/health", 0.01)
+    assert tracker.timeout("bot", "/api/health", 5) == latency.TIMEOUT_MIN
+
+
+def test_slow_answers_are_capped_by_max_timeout():
+    tracker = latency.LatencyTracker()
+    for _ in range(latency.MIN_SAMPLES):
+        tracker.record("bot", "/api/health", 50)
+    assert tracker.timeout("bot", "/api/health", 5) == latency.TIMEOUT_MAX
+    assert tracker.timeout("bot", "/api/health", 5, max_timeout=10) == 10
@@ -0,0 +1,34 @@
+"""RiskEngine portfolio tracking across missed bot polls."""
+
+import risk_engine
+
+THRESHOLDS = {"default": {}, "portfolio": {"max_drawdown": 150}}
+
+
+def up(pnl):
+    return {"pnl": pnl, "healthy": True}
+
+
+DOWN = {"pnl": 0.0, "healthy": False, "error": "Unreachable"}
+
+
+def test_unreachable_bot_holds_its_last_pnl_in_the_portfolio(tmp_path):
+    engine = risk_engine.RiskEngine(THRESHOLDS, state_path=str(tmp_path / "risk.json"))
+    assert engine.update({"a": up(400.0), "b": up(100.0)}, {}, ts=1) == []
+    # "a" misses a poll, then comes back
+    assert engine.update({"a": DOWN, "b": up(110.0)}, {}, ts=2) == []
+    assert engine.update({"a": up(405.0), "b": up(110.0)}, {}, ts=3) == []
+
+    portfolio = engine._trackers[engine.PORTFOLIO].snapshot()
+    assert (portfolio["pnl"], portfolio["max_drawdown"]) == (515.0, 0.0)
+    assert portfolio["volatility"] < 10
+    bot = engine._trackers["a"].snapshot()
+    assert (bot["pnl"], bot["samples"]) == (405.0, 2)
+
+
+def test_real_portfolio_drawdown_still_fires(tmp_path):
+    engine = risk_engine.RiskEngine(THRESHOLDS, state_path=str(tmp_path / "risk.json"))
+    engine.update({"a": up(400.0), "b": DOWN}, {}, ts=1)
+    alerts = engine.update({"a": up(200.0), "b": DOWN}, {}, ts=2)
+    assert [(a["scope"], a["metric"], a["state"]) for a in alerts] == [
+        ("portfolio", "max_drawdown", "firing")]
@@ -0,0 +1,59 @@
+"""TerminalSession delivery: every binary frame is whole UTF-8."""
+
+import json
+
+import pytest
+
+import terminal_sessions
+from terminal_sessions import ScrollbackBuffer, TerminalSession
+
+TEXT = "héllo wörld €uro 𝄞 " * 50
+
+
+class Client:
+    def __init__(self):
+        self.frames = []
+        self.status = []
+
+    def send(self, message):
+        (self.status if isinstance(message, str) else self.frames).append(message)
+
+
+def session(monkeypatch, frame_bytes=7):
+    monkeypatch.setattr(terminal_sessions, "FRAME_BYTES", frame_bytes)
+    return TerminalSession(None, None, "test", reader=False)
+
+
+def test_read_from_stops_at_a_character_boundary():
+    ring = ScrollbackBuffer(64)
+    ring.append("a€b".encode("utf-8"))  # € is three bytes
+    assert ring.read_from(0, 2) == (0, b"a")
+    assert ring.read_from(0, 1) == (0, b"a")
+    assert ring.read_from(1, 2) == (1, b"")
+    assert ring.read_from(1, 3) == (1, "€".encode("utf-8"))
+
+
+@pytest.mark.parametrize("frame_bytes", [4, 5, 7, 64])
+def test_replayed_scrollback_frames_decode_alone(monkeypatch, frame_bytes):
+    sess = session(monkeypatch, frame_bytes)
+    sess.feed(TEXT.encode("utf-8"))
+    client = Client()
+    sess.attach(client.send, 0, {"type": "status"})
+    decoded = [frame.decode("utf-8") for frame in client.frames]
+    assert "".join(decoded) == TEXT
+
+
+def test_credit_cut_mid_character_resumes_after_ack(monkeypatch):
+    monkeypatch.setattr(terminal_sessions, "MIN_WINDOW", 10)
+    sess = session(monkeypatch)
+    data = ("x" * 9 + "€" * 4).encode("utf-8")
+    client = Client()
+    sess.attach(client.send, 0, {"type": "status"}, window=10)
+    sess.feed(data)
+    assert b"".join(client.frames) == b"x" * 9  # the 10th byte would split the €
+    while sess._att.sent < len(data):
+        sess.ack(sess._att.sent)
+    assert b"".join(client.frames) == data
+    for frame in client.frames:
+        frame.decode("utf-8")
+    assert json.loads(client.status[0])["offset"] == 0
@@ -0,0 +1,78 @@
+"""Warm-start snapshots — last-known payloads kept on disk for workers that just started.
+
+A fresh worker (after a deploy, a restart, or gunicorn recycling one) has
+no fetch cycle, container inventory or probe results yet, and building
+them takes seconds of bot and Docker calls.  The serving workers save
+what they last built to ``data/warm/<name>.json`` every ``SAVE_EVERY``
+seconds; a new worker serves that at once, marked with its age, while
+the live data is fetched in the background.
+
+The file is compact JSON, ``{"saved_at": <epoch>, "payload": ...}``,
+replaced atomically.  Saves are throttled on the file's mtime, so all
+workers together write each snapshot at most once per interval.
+"""
+
+import json
+import logging
+import os
+import time
+
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+SAVE_EVERY = 30       # seconds between saves of one snapshot
+MAX_AGE = 24 * 3600   # older snapshots are not served
+
+
+def marker(saved_at, now=None):
+    """The ``warm_start`` field added to a payload served from a snapshot."""
+    return {"as_of": round(saved_at, 1), "age": round((now or time.time()) - saved_at, 1)}
+
+
+class WarmSnapshot:
+    """One named snapshot file."""
+
+    def __init__(self, name, data_dir=None, every=SAVE_EVERY, max_age=MAX_AGE):
+        data_dir = os.path.join(data_dir or DATA_DIR, "warm")
+        os.makedirs(data_dir, exist_ok=True)
+        self.path = os.path.join(data_dir, f"{name}.json")
+        self.every = every
+        self.max_age = max_age
+
+    def due(self, now=None):
+        """True if the file is missing or older than ``every`` seconds."""
+        try:
+            return (now or time.time()) - os.stat(self.path).st_mtime >= self.every
+        except FileNotFoundError:
+            return True
+
+    def save(self, payload, now=None):
+        """Write ``payload`` if a save is due; returns whether it did."""
+        now = now or time.time()
+        if not self.due(now):
+            return False
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                f.write(json.dumps({"saved_at": now, "payload": payload}, separators=(",", ":")))
+            os.replace(tmp, self.path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Failed to save warm snapshot %s: %s", self.path, e)
+            return False
+        return True
+
+    def load(self, now=None):
+        """``(saved_at, payload)``, or ``(None, None)`` if missing, unreadable or too old."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            saved_at, payload = float(data["saved_at"]), data["payload"]
+        except FileNotFoundError:
+            return None, None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Unreadable warm snapshot %s: %s", self.path, e)
+            return None, None
+        if (now or time.time()) - saved_at > self.max_age:
+            return None, None
+        return saved_at, payload
@@ -0,0 +1,33 @@
+"""Single-leader election across gunicorn workers via a held file lock."""
+
+import fcntl
+import os
+
+from config import DATA_DIR
+
+
+class WorkerLease:
+    """Non-blocking exclusive lease on ``data/<name>.lock``.
+
+    The first worker to call ``held()`` takes the lock and keeps it for its
+    lifetime; the kernel releases it if that process dies, and the next
+    caller in another worker picks it up.
+    """
+
+    def __init__(self, name, data_dir=None):
+        data_dir = data_dir or DATA_DIR
+        os.makedirs(data_dir, exist_ok=True)
+        self.path = os.path.join(data_dir, f"{name}.lock")
+        self._fh = None
+
+    def held(self):
+        if self._fh is not None:
+            return True
+        fh = open(self.path, "a")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        self._fh = fh
+        return True
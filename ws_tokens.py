@@ -0,0 +1,61 @@
+"""Short-lived WebSocket tokens — "<expiry hex>.<nonce>.<hmac>".
+
+Tokens are signed with a secret every process shares (``WS_TOKEN_SECRET``,
+or one derived from the portal credentials), so any gunicorn worker or the
+hub validates a token issued by any other without shared state.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+PORTAL_USER = os.environ.get("PORTAL_USER", "")
+PORTAL_PASS = os.environ.get("PORTAL_PASS", "")
+
+TOKEN_TTL = 600  # seconds
+TOKEN_SECRET = (os.environ.get("WS_TOKEN_SECRET", "").encode()
+                or hashlib.sha256(f"ws-token:{PORTAL_USER}:{PORTAL_PASS}".encode()).digest())
+REPLAY_CACHE = 4096  # nonces remembered per process
+
+_used = OrderedDict()  # nonce -> expiry, oldest first
+_used_lock = threading.Lock()
+
+
+def _sign(payload):
+    mac = hmac.new(TOKEN_SECRET, payload.encode(), hashlib.sha256).digest()[:18]
+    return base64.urlsafe_b64encode(mac).decode()
+
+
+def issue_token():
+    payload = f"{int(time.time()) + TOKEN_TTL:x}.{secrets.token_urlsafe(12)}"
+    return f"{payload}.{_sign(payload)}"
+
+
+def validate_token(token):
+    """Check signature and expiry, then burn the nonce (tokens are single-use).
+
+    The replay cache is per process and bounded; it evicts oldest-first, so
+    the cost stays O(1) per connection.
+    """
+    try:
+        exp_hex, nonce, sig = token.split(".")
+        exp = int(exp_hex, 16)
+    except ValueError:
+        return False
+    if not hmac.compare_digest(sig, _sign(f"{exp_hex}.{nonce}")):
+        return False
+    now = time.time()
+    if exp < now:
+        return False
+    with _used_lock:
+        if nonce in _used:
+            return False
+        _used[nonce] = exp
+        while len(_used) > REPLAY_CACHE or next(iter(_used.values())) < now:
+            _used.popitem(last=False)
+    return True